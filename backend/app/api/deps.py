@@ -3,10 +3,10 @@ from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.database import get_db
 from app.models import User, UserRole
 from app.utils.security import decode_token
+from app.services.auth_cache import get_cached_user, is_cut_off, is_jti_revoked
 
 security = HTTPBearer(auto_error=False)
 
@@ -40,8 +40,17 @@ async def get_current_user(
             detail="Неверный токен",
         )
     
-    result = await db.execute(select(User).where(User.id == UUID(user_id)))
-    user = result.scalar_one_or_none()
+    # Tokens issued before the user was blocked stay invalid after unblocking;
+    # checked from the token's blocked-epoch claim before loading the user
+    if is_cut_off(payload) or await is_jti_revoked(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный или истекший токен",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Served from the in-process user cache in the steady state
+    user = await get_cached_user(db, UUID(user_id))
     
     if not user:
         raise HTTPException(
@@ -3,7 +3,7 @@ from fastapi import APIRouter
 from app.api.v1 import (
     auth, users, companies, declarations, certificates,
     tasks, documents, clients, partnerships, requests,
-    notifications, dashboard
+    notifications, dashboard, sync
 )
 
 api_router = APIRouter(prefix="/api/v1")
@@ -20,3 +20,4 @@ api_router.include_router(partnerships.router)
 api_router.include_router(requests.router)
 api_router.include_router(notifications.router)
 api_router.include_router(dashboard.router)
+api_router.include_router(sync.router)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request as HTTPRequest, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
@@ -8,13 +9,14 @@ from app.models import User, Company, Request, RequestType, RequestStatus, UserR
 from app.schemas import (
     ApiResponse, UserLoginRequest, UserRegisterRequest, AdminLoginRequest,
     TokenResponse, AdminTokenResponse, UserWithRoleResponse, ForgotPasswordRequest,
-    ResetPasswordRequest
+    ResetPasswordRequest, RefreshTokenRequest
 )
-from app.utils.security import (
-    verify_password, get_password_hash, create_access_token,
-    verify_admin_code
-)
-from app.api.deps import get_current_user
+from app.utils.security import verify_and_update_password, get_password_hash_async, decode_token
+from app.api.deps import get_current_user, security
+from app.services.auth_cache import revoke_token
+from app.services.auth_tokens import issue_tokens, rotate_refresh_token, revoke_refresh_family
+from app.services.rate_limit import enforce_login_rate_limit, reset_login_rate_limit
+from app.services.admin_code import verify_admin_code
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -23,13 +25,23 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/login", response_model=ApiResponse[TokenResponse])
 async def login(
     request: UserLoginRequest,
+    http_request: HTTPRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """User login."""
+    await enforce_login_rate_limit(http_request, "login", request.email)
+    
     result = await db.execute(select(User).where(User.email == request.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(request.password, user.password_hash):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный email или пароль"
+        )
+    
+    is_valid, new_hash = await verify_and_update_password(request.password, user.password_hash)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль"
@@ -51,12 +63,23 @@ async def login(
                 detail="Ваша компания заблокирована."
             )
     
-    token = create_access_token({"sub": str(user.id)})
+    # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was created
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        await db.refresh(user)
+    
+    await reset_login_rate_limit("login", request.email)
+    
+    token, refresh_token = await issue_tokens(db, user)
+    await db.commit()
     
     return ApiResponse(
         data=TokenResponse(
             user=UserWithRoleResponse.model_validate(user),
-            token=token
+            token=token,
+            refresh_token=refresh_token,
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         ),
         success=True
     )
@@ -79,7 +102,7 @@ async def register(
     # Create user
     user = User(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         full_name=request.full_name,
         phone=request.phone,
         activity_type=request.activity_type,
@@ -90,12 +113,35 @@ async def register(
     await db.commit()
     await db.refresh(user)
     
-    token = create_access_token({"sub": str(user.id)})
+    token, refresh_token = await issue_tokens(db, user)
+    await db.commit()
+    
+    return ApiResponse(
+        data=TokenResponse(
+            user=UserWithRoleResponse.model_validate(user),
+            token=token,
+            refresh_token=refresh_token,
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        ),
+        success=True
+    )
+
+
+@router.post("/refresh", response_model=ApiResponse[TokenResponse])
+async def refresh(
+    request: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Exchange a refresh token for a new access/refresh token pair."""
+    user, token, refresh_token = await rotate_refresh_token(db, request.refresh_token)
+    await db.commit()
     
     return ApiResponse(
         data=TokenResponse(
             user=UserWithRoleResponse.model_validate(user),
-            token=token
+            token=token,
+            refresh_token=refresh_token,
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         ),
         success=True
     )
@@ -103,11 +149,19 @@ async def register(
 
 @router.post("/logout", response_model=ApiResponse[None])
 async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """User logout."""
-    # Token invalidation would be handled client-side
-    # For server-side, we'd need a token blacklist (not implemented)
+    # Revoke this access token and end its refresh token session
+    payload = decode_token(credentials.credentials)
+    if payload:
+        await revoke_token(db, payload)
+        if payload.get("fam"):
+            await revoke_refresh_family(db, UUID(payload["fam"]))
+        await db.commit()
+    
     return ApiResponse(data=None, success=True, message="Вы успешно вышли")
 
 
@@ -167,12 +221,15 @@ async def admin_login_info():
 @router.post("/admin/login", response_model=ApiResponse[AdminTokenResponse])
 async def admin_login(
     request: AdminLoginRequest,
+    http_request: HTTPRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """Admin login with code."""
     import logging
     logger = logging.getLogger(__name__)
     
+    await enforce_login_rate_limit(http_request, "admin_login", request.login)
+    
     # Debug logging
     logger.info(f"Admin login attempt - login: '{request.login}'")
     logger.info(f"Expected login: '{settings.ADMIN_LOGIN}', Expected password length: {len(settings.ADMIN_PASSWORD)}")
@@ -186,7 +243,7 @@ async def admin_login(
         )
     
     # Verify admin code
-    if not verify_admin_code(request.code):
+    if not await verify_admin_code(request.code):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный или истекший код администратора"
@@ -235,7 +292,7 @@ async def admin_login(
         # creates new admin if none exists
         admin_user = User(
             email=admin_email_new,
-            password_hash=get_password_hash(settings.ADMIN_PASSWORD),
+            password_hash=await get_password_hash_async(settings.ADMIN_PASSWORD),
             full_name="Администратор",
             phone="0000000000",
             activity_type="declarant",
@@ -253,9 +310,16 @@ async def admin_login(
     if not admin_user:
          raise HTTPException(status_code=500, detail="Failed to retrieve admin user")
     
-    token = create_access_token({"sub": str(admin_user.id), "is_admin": True})
+    await reset_login_rate_limit("admin_login", request.login)
+    
+    token, refresh_token = await issue_tokens(db, admin_user)
+    await db.commit()
     
     return ApiResponse(
-        data=AdminTokenResponse(token=token),
+        data=AdminTokenResponse(
+            token=token,
+            refresh_token=refresh_token,
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        ),
         success=True
     )
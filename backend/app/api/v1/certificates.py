@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
@@ -15,53 +16,62 @@ from app.schemas import (
     ApiResponse, PaginatedResponse,
     CertificateCreate, CertificateUpdate, CertificateResponse,
     CertificateRedirectRequest, CertificateStatusUpdateRequest,
-    CertificateFillNumberRequest, CertificateAttachPaymentRequest,
-    CertificateActionResponse
+    CertificateFillNumberRequest, CertificateAttachPaymentRequest
 )
 from app.api.deps import get_current_user
+from app.utils.responses import api_response, paginated_response
+from app.utils.etags import make_etag, etag_matches, etag_headers, not_modified
+from app.utils.storage import get_storage
+from app.utils.zipstream import safe_name, stream_zip, zip_response_headers
+from app.services.archives import attachment_archive
 from app.services.notification import create_notification
 
 router = APIRouter(prefix="/certificates", tags=["Certificates"])
 
 
+def certificate_to_dict(cert: Certificate) -> dict:
+    """Convert certificate model to a plain dict matching CertificateResponse."""
+    return {
+        "id": cert.id,
+        "certifier_company_id": cert.certifier_company_id,
+        "type": cert.type,
+        "deadline": cert.deadline,
+        "number": cert.number,
+        "number_to_be_filled_by_certifier": cert.number_to_be_filled_by_certifier,
+        "client_id": cert.client_id,
+        "note": cert.note,
+        "sent_date": cert.sent_date,
+        "status": cert.status,
+        "owner_id": cert.owner_id,
+        "assigned_to_id": cert.assigned_to_id,
+        "company_id": cert.company_id,
+        "certifier_company_name": cert.certifier_company.name if cert.certifier_company else None,
+        "certifier_name": cert.assigned_to.full_name if cert.assigned_to else None,
+        "declarant_company_id": cert.declarant_company_id,
+        "declarant_company_name": cert.declarant_company.name if cert.declarant_company else None,
+        "declarant_name": cert.owner.full_name if cert.owner else None,
+        "linked_declaration_ids": [d.id for d in cert.linked_declarations] if cert.linked_declarations else [],
+        "attached_document_ids": [d.id for d in cert.attached_documents] if cert.attached_documents else [],
+        "attached_folder_ids": [f.id for f in cert.attached_folders] if cert.attached_folders else [],
+        "actions": [
+            {
+                "id": a.id,
+                "certificate_id": a.certificate_id,
+                "action": a.action,
+                "note": a.note,
+                "attached_file_ids": [f.id for f in a.attached_files] if a.attached_files else [],
+                "performed_by": a.performed_by_id,
+                "created_at": a.created_at,
+            } for a in cert.actions
+        ] if cert.actions else [],
+        "created_at": cert.created_at,
+        "updated_at": cert.updated_at,
+    }
+
+
 def certificate_to_response(cert: Certificate) -> CertificateResponse:
     """Convert certificate model to response schema."""
-    return CertificateResponse(
-        id=cert.id,
-        certifier_company_id=cert.certifier_company_id,
-        type=cert.type,
-        deadline=cert.deadline,
-        number=cert.number,
-        number_to_be_filled_by_certifier=cert.number_to_be_filled_by_certifier,
-        client_id=cert.client_id,
-        note=cert.note,
-        sent_date=cert.sent_date,
-        status=cert.status,
-        owner_id=cert.owner_id,
-        assigned_to_id=cert.assigned_to_id,
-        company_id=cert.company_id,
-        certifier_company_name=cert.certifier_company.name if cert.certifier_company else None,
-        certifier_name=cert.assigned_to.full_name if cert.assigned_to else None,
-        declarant_company_id=cert.declarant_company_id,
-        declarant_company_name=cert.declarant_company.name if cert.declarant_company else None,
-        declarant_name=cert.owner.full_name if cert.owner else None,
-        linked_declaration_ids=[d.id for d in cert.linked_declarations] if cert.linked_declarations else [],
-        attached_document_ids=[d.id for d in cert.attached_documents] if cert.attached_documents else [],
-        attached_folder_ids=[f.id for f in cert.attached_folders] if cert.attached_folders else [],
-        actions=[
-            CertificateActionResponse(
-                id=a.id,
-                certificate_id=a.certificate_id,
-                action=a.action,
-                note=a.note,
-                attached_file_ids=[f.id for f in a.attached_files] if a.attached_files else [],
-                performed_by=a.performed_by_id,
-                created_at=a.created_at
-            ) for a in cert.actions
-        ] if cert.actions else [],
-        created_at=cert.created_at,
-        updated_at=cert.updated_at
-    )
+    return CertificateResponse(**certificate_to_dict(cert))
 
 
 @router.post("", response_model=ApiResponse[CertificateResponse])
@@ -165,7 +175,7 @@ async def create_certificate(
             selectinload(Certificate.linked_declarations),
             selectinload(Certificate.attached_documents),
             selectinload(Certificate.attached_folders),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate.id)
     )
@@ -176,6 +186,7 @@ async def create_certificate(
 
 @router.get("", response_model=PaginatedResponse[CertificateResponse])
 async def get_certificates(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     certifier_company_id: Optional[UUID] = None,
@@ -232,10 +243,14 @@ async def get_certificates(
     if date_to:
         query = query.where(Certificate.sent_date <= datetime.combine(date_to, datetime.max.time()))
     
-    # Count
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    # Count and latest change in one pass; they version the list for the ETag
+    filtered = query.subquery()
+    count_result = await db.execute(select(func.count(), func.max(filtered.c.updated_at)))
+    total, last_updated = count_result.one()
+    
+    etag = make_etag("certificates", current_user.id, total, last_updated, page, page_size)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
     
     # Get paginated results
     offset = (page - 1) * page_size
@@ -249,7 +264,7 @@ async def get_certificates(
             selectinload(Certificate.linked_declarations),
             selectinload(Certificate.attached_documents),
             selectinload(Certificate.attached_folders),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .order_by(Certificate.created_at.desc())
         .offset(offset)
@@ -257,21 +272,40 @@ async def get_certificates(
     )
     certificates = result.scalars().all()
     
-    return PaginatedResponse.create(
-        data=[certificate_to_response(c) for c in certificates],
+    return paginated_response(
+        data=[certificate_to_dict(c) for c in certificates],
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        headers=etag_headers(etag)
     )
 
 
 @router.get("/{certificate_id}", response_model=ApiResponse[CertificateResponse])
 async def get_certificate(
     certificate_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get certificate by ID."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Revalidate from the row's version without loading its relationships
+        result = await db.execute(
+            select(
+                Certificate.updated_at, Certificate.company_id, Certificate.certifier_company_id
+            ).where(Certificate.id == certificate_id)
+        )
+        row = result.first()
+        if row and (
+            current_user.company_id in (row.company_id, row.certifier_company_id) or
+            current_user.role == UserRole.ADMIN
+        ):
+            etag = make_etag("certificate", certificate_id, row.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
     result = await db.execute(
         select(Certificate)
         .options(
@@ -307,7 +341,49 @@ async def get_certificate(
             detail="Нет доступа к этому сертификату"
         )
     
-    return ApiResponse(data=certificate_to_response(certificate), success=True)
+    etag = make_etag("certificate", certificate.id, certificate.updated_at)
+    return api_response(certificate_to_dict(certificate), headers=etag_headers(etag))
+
+
+@router.get("/{certificate_id}/zip", response_class=StreamingResponse)
+async def download_certificate_zip(
+    certificate_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """ZIP of the certificate's attached documents and folders, streamed as it is built."""
+    result = await db.execute(
+        select(Certificate)
+        .options(selectinload(Certificate.attached_documents), selectinload(Certificate.attached_folders))
+        .where(Certificate.id == certificate_id)
+    )
+    certificate = result.scalar_one_or_none()
+    
+    if not certificate:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Сертификат не найден"
+        )
+    
+    has_access = (
+        certificate.company_id == current_user.company_id or
+        certificate.certifier_company_id == current_user.company_id or
+        current_user.role == UserRole.ADMIN
+    )
+    
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этому сертификату"
+        )
+    
+    entries = await attachment_archive(db, certificate.attached_documents, certificate.attached_folders)
+    filename = f"Сертификат {certificate.number or certificate.type}.zip"
+    return StreamingResponse(
+        stream_zip(entries, get_storage().open),
+        media_type="application/zip",
+        headers=zip_response_headers(safe_name(filename))
+    )
 
 
 @router.put("/{certificate_id}", response_model=ApiResponse[CertificateResponse])
@@ -328,7 +404,7 @@ async def update_certificate(
             selectinload(Certificate.linked_declarations),
             selectinload(Certificate.attached_documents),
             selectinload(Certificate.attached_folders),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -396,7 +472,7 @@ async def redirect_certificate(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -449,7 +525,7 @@ async def update_certificate_status(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -513,7 +589,7 @@ async def fill_certificate_number(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -554,7 +630,7 @@ async def confirm_payment(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -593,7 +669,7 @@ async def confirm_review(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions)
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
         )
         .where(Certificate.id == certificate_id)
     )
@@ -633,7 +709,7 @@ async def attach_payment_files(
             selectinload(Certificate.owner),
             selectinload(Certificate.assigned_to),
             selectinload(Certificate.declarant_company),
-            selectinload(Certificate.actions),
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files),
             selectinload(Certificate.payment_files)
         )
         .where(Certificate.id == certificate_id)
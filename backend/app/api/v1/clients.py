@@ -11,25 +11,31 @@ from app.schemas import (
     ApiResponse, ClientCreate, ClientUpdate, ClientResponse
 )
 from app.api.deps import get_current_user
+from app.utils.responses import api_response
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
 
+def client_to_dict(client: Client) -> dict:
+    """Convert client model to a plain dict matching ClientResponse."""
+    return {
+        "id": client.id,
+        "company_name": client.company_name,
+        "inn": client.inn,
+        "director_name": client.director_name,
+        "note": client.note,
+        "access_type": client.access_type,
+        "access_user_ids": [u.id for u in client.access_users] if client.access_users else [],
+        "owner_id": client.owner_id,
+        "company_id": client.company_id,
+        "created_at": client.created_at,
+        "updated_at": client.updated_at,
+    }
+
+
 def client_to_response(client: Client) -> ClientResponse:
     """Convert client model to response schema."""
-    return ClientResponse(
-        id=client.id,
-        company_name=client.company_name,
-        inn=client.inn,
-        director_name=client.director_name,
-        note=client.note,
-        access_type=client.access_type,
-        access_user_ids=[u.id for u in client.access_users] if client.access_users else [],
-        owner_id=client.owner_id,
-        company_id=client.company_id,
-        created_at=client.created_at,
-        updated_at=client.updated_at
-    )
+    return ClientResponse(**client_to_dict(client))
 
 
 @router.post("", response_model=ApiResponse[ClientResponse])
@@ -103,26 +109,21 @@ async def get_clients(
     result = await db.execute(query.order_by(Client.company_name))
     clients = result.scalars().all()
     
-    # Filter by access
-    accessible_clients = []
-    for client in clients:
-        if client.access_type == AccessType.PUBLIC:
-            accessible_clients.append(client)
-        elif client.access_type == AccessType.PRIVATE and client.owner_id == current_user.id:
-            accessible_clients.append(client)
-        elif client.access_type == AccessType.SELECTED:
-            if client.owner_id == current_user.id or current_user.id in [u.id for u in client.access_users]:
+    # Filter by access (directors can see all)
+    if current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]:
+        accessible_clients = clients
+    else:
+        accessible_clients = []
+        for client in clients:
+            if client.access_type == AccessType.PUBLIC:
                 accessible_clients.append(client)
-        
-        # Directors can see all
-        if current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]:
-            if client not in accessible_clients:
+            elif client.access_type == AccessType.PRIVATE and client.owner_id == current_user.id:
                 accessible_clients.append(client)
+            elif client.access_type == AccessType.SELECTED:
+                if client.owner_id == current_user.id or current_user.id in [u.id for u in client.access_users]:
+                    accessible_clients.append(client)
     
-    return ApiResponse(
-        data=[client_to_response(c) for c in accessible_clients],
-        success=True
-    )
+    return api_response([client_to_dict(c) for c in accessible_clients])
 
 
 @router.get("/{client_id}", response_model=ApiResponse[ClientResponse])
@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import delete, select, func
 from uuid import UUID
 
 from app.database import get_db
-from app.models import User, Company, Request, RequestType, RequestStatus, UserRole
+from app.models import (
+    User, Company, Request, RequestType, RequestStatus, UserRole, StorageQuota, StorageUsage
+)
 from app.schemas import (
     ApiResponse, PaginatedResponse, CompanyCreate, CompanyResponse, CompanyJoinRequest,
-    SendMessageRequest
+    SendMessageRequest, StorageUsageResponse, StorageQuotaUpdate
 )
 from app.api.deps import get_current_user, require_admin
+from app.services.access import FULL_ACCESS_ROLES
 from app.services.notification import create_notification
+from app.services.storage_usage import get_storage_usage
 
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
@@ -166,6 +170,61 @@ async def get_company(
     return ApiResponse(data=CompanyResponse.model_validate(company), success=True)
 
 
+async def _get_company_or_404(db: AsyncSession, company_id: UUID) -> Company:
+    company = await db.get(Company, company_id)
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Компания не найдена"
+        )
+    return company
+
+
+@router.get("/{company_id}/storage", response_model=ApiResponse[StorageUsageResponse])
+async def get_company_storage(
+    company_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Storage used by a company and its quota, with documents by folder and
+    by client (admin, or the company's director and seniors).
+    """
+    if current_user.role != UserRole.ADMIN and (
+        current_user.company_id != company_id or current_user.role not in FULL_ACCESS_ROLES
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав"
+        )
+    await _get_company_or_404(db, company_id)
+    
+    return ApiResponse(data=StorageUsageResponse(**await get_storage_usage(db, company_id)), success=True)
+
+
+@router.put("/{company_id}/storage-quota", response_model=ApiResponse[StorageUsageResponse])
+async def set_company_storage_quota(
+    company_id: UUID,
+    data: StorageQuotaUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin())
+):
+    """Set a company's storage quota in MB: 0 for unlimited, null for the default (admin only)."""
+    await _get_company_or_404(db, company_id)
+    
+    quota = await db.get(StorageQuota, company_id)
+    if data.quota_mb is None:
+        if quota is not None:
+            await db.delete(quota)
+    elif quota is None:
+        db.add(StorageQuota(company_id=company_id, quota_bytes=data.quota_mb * 1024 * 1024))
+    else:
+        quota.quota_bytes = data.quota_mb * 1024 * 1024
+    await db.commit()
+    
+    return ApiResponse(data=StorageUsageResponse(**await get_storage_usage(db, company_id)), success=True)
+
+
 @router.get("", response_model=PaginatedResponse[CompanyResponse])
 async def get_all_companies(
     page: int = 1,
@@ -262,6 +321,9 @@ async def delete_company(
     for user in users:
         user.company_id = None
     
+    # Its files are left to the orphaned upload collection (app.services.upload_gc)
+    await db.execute(delete(StorageUsage).where(StorageUsage.company_id == company_id))
+    await db.execute(delete(StorageQuota).where(StorageQuota.company_id == company_id))
     await db.delete(company)
     await db.commit()
     
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from datetime import date, datetime, timedelta
 from typing import Optional
+from uuid import UUID
 
 from app.database import get_db
 from app.models import (
@@ -11,6 +12,8 @@ from app.models import (
 )
 from app.schemas import ApiResponse, DashboardStats, AdminStats, GrowthDataPoint
 from app.api.deps import get_current_user, require_admin
+from app.models.company_stats import NO_STATUS
+from app.services.company_stats import get_counts
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -27,36 +30,50 @@ async def get_dashboard_stats(
     if not current_user.company_id:
         return ApiResponse(data=DashboardStats(), success=True)
     
-    # Base filters
-    task_filter = Task.target_employee_id == current_user.id
+    today = date.today()
+    
+    selected_employee_id = None
+    if employee_id and employee_id != "all":
+        try:
+            selected_employee_id = UUID(employee_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Неверный идентификатор сотрудника"
+            )
     
-    # Override for directors
+    # Whose tasks/declarations are counted: one employee's, or the company's (None)
+    task_employee_id = current_user.id
     if current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR]:
-        if employee_id and employee_id != "all":
-            task_filter = Task.target_employee_id == employee_id
-        else:
-            task_filter = (Task.created_by_company_id == current_user.company_id) | (Task.target_company_id == current_user.company_id)
+        task_employee_id = selected_employee_id
     
-    # Active tasks (not completed/cancelled)
-    result = await db.execute(
-        select(func.count(Task.id)).where(
-            task_filter,
-            Task.status.notin_([TaskStatus.COMPLETED, TaskStatus.CANCELLED])
-        )
-    )
-    active_tasks = result.scalar() or 0
+    decl_employee_id = None
+    if selected_employee_id:
+        decl_employee_id = selected_employee_id
+    elif current_user.role == UserRole.EMPLOYEE:
+        decl_employee_id = current_user.id
     
-    # Completed tasks
-    result = await db.execute(
-        select(func.count(Task.id)).where(
-            task_filter,
-            Task.status == TaskStatus.COMPLETED
-        )
+    # Status counts come from the precomputed company_stats counters
+    company_counts, employee_counts = await get_counts(
+        db, current_user.company_id, {task_employee_id, decl_employee_id} - {None}
     )
-    completed_tasks = result.scalar() or 0
     
-    # Overdue tasks
-    today = date.today()
+    def counts_for(entity: str, employee: Optional[UUID]) -> dict:
+        counts = employee_counts.get(employee, {}) if employee else company_counts
+        return {s: n for (e, s), n in counts.items() if e == entity}
+    
+    task_counts = counts_for("task", task_employee_id)
+    certificate_counts = counts_for("certificate", None)
+    
+    finished_tasks = {TaskStatus.COMPLETED.name, TaskStatus.CANCELLED.name}
+    active_tasks = sum(n for s, n in task_counts.items() if s not in finished_tasks)
+    completed_tasks = task_counts.get(TaskStatus.COMPLETED.name, 0)
+    
+    # Overdue depends on today's date, so it is still counted
+    if task_employee_id:
+        task_filter = Task.target_employee_id == task_employee_id
+    else:
+        task_filter = (Task.created_by_company_id == current_user.company_id) | (Task.target_company_id == current_user.company_id)
     result = await db.execute(
         select(func.count(Task.id)).where(
             task_filter,
@@ -69,37 +86,14 @@ async def get_dashboard_stats(
     # Declarations (for declarants)
     sent_declarations = None
     if current_user.activity_type == "declarant":
-        decl_filter = Declaration.company_id == current_user.company_id
-        if employee_id and employee_id != "all":
-            decl_filter = Declaration.owner_id == employee_id
-        elif current_user.role == UserRole.EMPLOYEE:
-            decl_filter = Declaration.owner_id == current_user.id
-        
-        result = await db.execute(
-            select(func.count(Declaration.id)).where(decl_filter)
-        )
-        sent_declarations = result.scalar() or 0
+        sent_declarations = counts_for("declaration", decl_employee_id).get(NO_STATUS, 0)
     
     # Certificates
     cert_filter = (Certificate.company_id == current_user.company_id) | (Certificate.certifier_company_id == current_user.company_id)
     
-    # Active certificates
-    result = await db.execute(
-        select(func.count(Certificate.id)).where(
-            cert_filter,
-            Certificate.status.notin_([CertificateStatus.COMPLETED, CertificateStatus.REJECTED])
-        )
-    )
-    active_certificates = result.scalar() or 0
-    
-    # Completed certificates
-    result = await db.execute(
-        select(func.count(Certificate.id)).where(
-            cert_filter,
-            Certificate.status == CertificateStatus.COMPLETED
-        )
-    )
-    completed_certificates = result.scalar() or 0
+    finished_certificates = {CertificateStatus.COMPLETED.name, CertificateStatus.REJECTED.name}
+    active_certificates = sum(n for s, n in certificate_counts.items() if s not in finished_certificates)
+    completed_certificates = certificate_counts.get(CertificateStatus.COMPLETED.name, 0)
     
     # Overdue certificates
     result = await db.execute(
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import selectinload
@@ -15,33 +16,43 @@ from app.schemas import (
     ApiResponse, PaginatedResponse, 
     DeclarationCreate, DeclarationUpdate, DeclarationResponse,
     DeclarationRedirectRequest, DeclarationGroupCreate, DeclarationGroupResponse,
-    DeclarationGroupAddRemove, VehicleResponse
+    DeclarationGroupAddRemove
 )
 from app.api.deps import get_current_user
+from app.utils.responses import api_response, paginated_response
+from app.utils.etags import make_etag, etag_matches, etag_headers, not_modified
+from app.utils.storage import get_storage
+from app.utils.zipstream import safe_name, stream_zip, zip_response_headers
+from app.services.archives import attachment_archive
 
 router = APIRouter(prefix="/declarations", tags=["Declarations"])
 
 
+def declaration_to_dict(decl: Declaration) -> dict:
+    """Convert declaration model to a plain dict matching DeclarationResponse."""
+    return {
+        "id": decl.id,
+        "post_number": decl.post_number,
+        "date": decl.date,
+        "declaration_number": decl.declaration_number,
+        "formatted_number": decl.formatted_number,
+        "client_id": decl.client_id,
+        "mode": decl.mode,
+        "note": decl.note,
+        "vehicles": [{"id": v.id, "number": v.number, "type": v.type} for v in decl.vehicles],
+        "attached_document_ids": [d.id for d in decl.attached_documents],
+        "attached_folder_ids": [f.id for f in decl.attached_folders],
+        "group_id": decl.group_id,
+        "owner_id": decl.owner_id,
+        "company_id": decl.company_id,
+        "created_at": decl.created_at,
+        "updated_at": decl.updated_at,
+    }
+
+
 def declaration_to_response(decl: Declaration) -> DeclarationResponse:
     """Convert declaration model to response schema."""
-    return DeclarationResponse(
-        id=decl.id,
-        post_number=decl.post_number,
-        date=decl.date,
-        declaration_number=decl.declaration_number,
-        formatted_number=decl.formatted_number,
-        client_id=decl.client_id,
-        mode=decl.mode,
-        note=decl.note,
-        vehicles=[VehicleResponse(id=v.id, number=v.number, type=v.type) for v in decl.vehicles],
-        attached_document_ids=[d.id for d in decl.attached_documents],
-        attached_folder_ids=[f.id for f in decl.attached_folders],
-        group_id=decl.group_id,
-        owner_id=decl.owner_id,
-        company_id=decl.company_id,
-        created_at=decl.created_at,
-        updated_at=decl.updated_at
-    )
+    return DeclarationResponse(**declaration_to_dict(decl))
 
 
 @router.post("", response_model=ApiResponse[DeclarationResponse])
@@ -124,6 +135,7 @@ async def create_declaration(
 
 @router.get("", response_model=PaginatedResponse[DeclarationResponse])
 async def get_declarations(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     search: Optional[str] = None,
@@ -174,10 +186,14 @@ async def get_declarations(
     if mode:
         query = query.where(Declaration.mode == mode)
     
-    # Count
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    # Count and latest change in one pass; they version the list for the ETag
+    filtered = query.subquery()
+    count_result = await db.execute(select(func.count(), func.max(filtered.c.updated_at)))
+    total, last_updated = count_result.one()
+    
+    etag = make_etag("declarations", current_user.id, total, last_updated, page, page_size)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
     
     # Get paginated results
     offset = (page - 1) * page_size
@@ -194,21 +210,35 @@ async def get_declarations(
     )
     declarations = result.scalars().all()
     
-    return PaginatedResponse.create(
-        data=[declaration_to_response(d) for d in declarations],
+    return paginated_response(
+        data=[declaration_to_dict(d) for d in declarations],
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        headers=etag_headers(etag)
     )
 
 
 @router.get("/{declaration_id}", response_model=ApiResponse[DeclarationResponse])
 async def get_declaration(
     declaration_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get declaration by ID."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Revalidate from the row's version without loading its relationships
+        result = await db.execute(
+            select(Declaration.updated_at, Declaration.company_id).where(Declaration.id == declaration_id)
+        )
+        row = result.first()
+        if row and (row.company_id == current_user.company_id or current_user.role == UserRole.ADMIN):
+            etag = make_etag("declaration", declaration_id, row.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
     result = await db.execute(
         select(Declaration)
         .options(
@@ -233,7 +263,43 @@ async def get_declaration(
             detail="Нет доступа к этой декларации"
         )
     
-    return ApiResponse(data=declaration_to_response(declaration), success=True)
+    etag = make_etag("declaration", declaration.id, declaration.updated_at)
+    return api_response(declaration_to_dict(declaration), headers=etag_headers(etag))
+
+
+@router.get("/{declaration_id}/zip", response_class=StreamingResponse)
+async def download_declaration_zip(
+    declaration_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """ZIP of the declaration's attached documents and folders, streamed as it is built."""
+    result = await db.execute(
+        select(Declaration)
+        .options(selectinload(Declaration.attached_documents), selectinload(Declaration.attached_folders))
+        .where(Declaration.id == declaration_id)
+    )
+    declaration = result.scalar_one_or_none()
+    
+    if not declaration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Декларация не найдена"
+        )
+    
+    if declaration.company_id != current_user.company_id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этой декларации"
+        )
+    
+    entries = await attachment_archive(db, declaration.attached_documents, declaration.attached_folders)
+    filename = f"Декларация {declaration.formatted_number}.zip"
+    return StreamingResponse(
+        stream_zip(entries, get_storage().open),
+        media_type="application/zip",
+        headers=zip_response_headers(safe_name(filename))
+    )
 
 
 @router.put("/{declaration_id}", response_model=ApiResponse[DeclarationResponse])
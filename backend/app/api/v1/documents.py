@@ -1,17 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_, literal
 from sqlalchemy.orm import selectinload
 from uuid import UUID
-from typing import Optional
+from typing import Literal, Optional
+from datetime import date, datetime, time, timedelta
 
+from app.config import settings
 from app.database import get_db
-from app.models import User, Document, Folder, Client, UserRole, AccessType
+from app.models import (
+    User, Document, DocumentPreview, Folder, Client, UserRole, AccessType, FolderDeletion, UploadSession,
+    UploadSessionStatus
+)
+from app.models.client import client_access
+from app.models.document import folder_access
 from app.schemas import (
-    ApiResponse, DocumentResponse, FolderCreate, FolderUpdate, FolderResponse
+    ApiResponse, CursorResponse, DocumentResponse, FolderCreate, FolderUpdate, FolderResponse, FolderTreeNode,
+    FolderDeletionResponse, UploadSessionCreate, UploadSessionResponse
 )
 from app.api.deps import get_current_user
-from app.utils.files import save_upload_file, delete_file
+from app.services.access import FULL_ACCESS_ROLES, access_filter, can_access
+from app.services.archives import folder_archive
+from app.services.folder_deletion import folder_deletions
+from app.services.folders import load_folder_tree, pending_deletions
+from app.services.uploads import (
+    ChunkSizeError, assemble_upload, direct_upload_key, received_chunks, remove_chunks, session_expires_at,
+    upload_offset, write_chunk
+)
+from app.services.documents import create_document, start_document_jobs
+from app.services.storage_usage import check_storage_quota
+from app.utils.files import save_upload_file, delete_file, generate_unique_filename
+from app.utils.cursors import encode_cursor, decode_cursor
+from app.utils.responses import api_response, cursor_response
+from app.utils.storage import get_storage
+from app.utils.zipstream import safe_name, stream_zip, zip_response_headers
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
@@ -41,43 +66,335 @@ async def upload_document(
                 detail="Папка не найдена"
             )
     
+    await check_storage_quota(db, current_user.company_id, file.size or 0)
+    
     # Save file
     file_url, file_type, file_size = await save_upload_file(file, str(current_user.company_id))
     
     # Create document record
-    document = Document(
-        name=file.filename or "file",
-        file_url=file_url,
-        file_type=file_type,
-        file_size=file_size,
-        folder_id=folder_id,
-        client_id=client_id,
+    try:
+        document, preview = await create_document(
+            db, current_user, file.filename or "file", file_url, file_type, file_size, folder_id, client_id
+        )
+    except HTTPException:
+        await delete_file(file_url)
+        raise
+    await db.commit()
+    await db.refresh(document)
+    start_document_jobs(document, preview)
+    
+    return api_response(document_to_dict(document, preview))
+
+
+async def _check_upload_target(db: AsyncSession, user: User, folder_id: Optional[UUID], client_id: Optional[UUID]):
+    """404 unless the folder and client (if given) belong to the user's company."""
+    if folder_id:
+        result = await db.execute(select(Folder.company_id).where(Folder.id == folder_id))
+        if result.scalar_one_or_none() != user.company_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Папка не найдена"
+            )
+    if client_id:
+        result = await db.execute(select(Client.company_id).where(Client.id == client_id))
+        if result.scalar_one_or_none() != user.company_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Клиент не найден"
+            )
+
+
+async def _get_upload_session(
+    db: AsyncSession, session_id: UUID, user: User, for_update: bool = False
+) -> UploadSession:
+    query = select(UploadSession).where(UploadSession.id == session_id)
+    if for_update:
+        query = query.with_for_update()
+    session = (await db.execute(query)).scalar_one_or_none()
+    if not session or session.owner_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Загрузка не найдена"
+        )
+    return session
+
+
+async def _upload_session_to_dict(session: UploadSession) -> dict:
+    received = await asyncio.to_thread(received_chunks, session)
+    upload_url, upload_headers = None, None
+    storage = get_storage()
+    if session.status == UploadSessionStatus.ACTIVE and storage.direct_uploads:
+        upload_url, upload_headers = storage.upload_url(direct_upload_key(session), session.sha256)
+    return {
+        "id": session.id,
+        "name": session.name,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": session.chunk_count,
+        "received_chunks": received,
+        "offset": upload_offset(session, received),
+        "status": session.status.value,
+        "document_id": session.document_id,
+        "expires_at": session_expires_at(session),
+        "upload_url": upload_url,
+        "upload_headers": upload_headers,
+    }
+
+
+@router.post(
+    "/uploads",
+    response_model=ApiResponse[UploadSessionResponse],
+    status_code=status.HTTP_201_CREATED
+)
+async def create_upload_session(
+    data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start a resumable upload of a file of known size and sha256. Send it
+    as chunk_count chunks of chunk_size bytes (the last one holds the rest)
+    with PUT /documents/uploads/{id}/chunks/{index}, in any order, then
+    POST /documents/uploads/{id}/complete. With object storage the whole
+    file can instead be PUT to upload_url, sending upload_headers.
+    """
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Необходимо быть в компании"
+        )
+
+    if data.size > settings.MAX_FILE_SIZE_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Файл слишком большой. Максимальный размер — {settings.MAX_FILE_SIZE_MB} МБ"
+        )
+
+    await _check_upload_target(db, current_user, data.folder_id, data.client_id)
+    await check_storage_quota(db, current_user.company_id, data.size)
+
+    session = UploadSession(
+        company_id=current_user.company_id,
         owner_id=current_user.id,
-        company_id=current_user.company_id
+        folder_id=data.folder_id,
+        client_id=data.client_id,
+        name=data.name,
+        file_type=data.file_type,
+        size=data.size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024,
+        sha256=data.sha256.lower()
     )
-    db.add(document)
+    db.add(session)
+    await db.commit()
+
+    return api_response(await _upload_session_to_dict(session), status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/uploads/{session_id}", response_model=ApiResponse[UploadSessionResponse])
+async def get_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a resumable upload: the chunks received and the offset to resume from."""
+    session = await _get_upload_session(db, session_id, current_user)
+    return api_response(await _upload_session_to_dict(session))
+
+
+@router.put("/uploads/{session_id}/chunks/{index}", response_model=ApiResponse[UploadSessionResponse])
+async def upload_chunk(
+    session_id: UUID,
+    index: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Store one chunk; the request body is the chunk's raw bytes. Sending a chunk again replaces it."""
+    session = await _get_upload_session(db, session_id, current_user)
+
+    if session.status != UploadSessionStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Загрузка уже завершена"
+        )
+
+    if not 0 <= index < session.chunk_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный номер части"
+        )
+
+    # Don't hold a database connection while the body arrives over a slow link
+    await db.commit()
+    try:
+        await write_chunk(session, index, request.stream())
+    except ChunkSizeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Часть {index} должна содержать {session.chunk_length(index)} байт"
+        )
+
+    session.updated_at = datetime.utcnow()
+    await db.commit()
+    return api_response(await _upload_session_to_dict(session))
+
+
+@router.post("/uploads/{session_id}/complete", response_model=ApiResponse[DocumentResponse])
+async def complete_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Assemble the chunks and create the document once the file's size and
+    sha256 match. Completing again returns the same document.
+    """
+    # Locked so concurrent completions create one document
+    session = await _get_upload_session(db, session_id, current_user, for_update=True)
+
+    if session.status == UploadSessionStatus.COMPLETED:
+        result = await db.execute(
+            select(Document, DocumentPreview)
+            .outerjoin(DocumentPreview, DocumentPreview.document_id == Document.id)
+            .where(Document.id == session.document_id)
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Документ не найден"
+            )
+        return api_response(document_to_dict(*row))
+
+    storage = get_storage()
+    received = await asyncio.to_thread(received_chunks, session)
+    direct_key = direct_upload_key(session)
+    # Sent as a whole to the presigned URL
+    direct = (
+        not received and storage.direct_uploads and await storage.size(direct_key) == session.size
+    )
+    if not direct and len(received) != session.chunk_count:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Получено {len(received)} из {session.chunk_count} частей файла"
+        )
+
+    await _check_upload_target(db, current_user, session.folder_id, session.client_id)
+    # Files uploaded since the session started may have used up the quota
+    await check_storage_quota(db, current_user.company_id, 0 if direct else session.size)
+
+    if direct:
+        key = direct_key
+        digest = await storage.sha256(key)
+    else:
+        key = f"{current_user.company_id}/{generate_unique_filename(session.name)}"
+        digest = await assemble_upload(session, key, session.file_type)
+    if digest != session.sha256:
+        # Some chunk was corrupted; which one can't be told, so the file is sent again
+        await storage.delete(key)
+        await asyncio.to_thread(remove_chunks, session.id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Контрольная сумма файла не совпадает, загрузите его заново"
+        )
+
+    try:
+        document, preview = await create_document(
+            db, current_user, session.name, f"/uploads/{key}", session.file_type, session.size,
+            session.folder_id, session.client_id
+        )
+    except HTTPException:
+        # The chunks (or the file uploaded directly) are kept to complete again once there is room
+        if not direct:
+            await storage.delete(key)
+        raise
+    session.status = UploadSessionStatus.COMPLETED
+    session.document_id = document.id
     await db.commit()
     await db.refresh(document)
-    
-    return ApiResponse(data=DocumentResponse.model_validate(document), success=True)
 
+    await asyncio.to_thread(remove_chunks, session.id)
+    start_document_jobs(document, preview)
+    return api_response(document_to_dict(document, preview))
+
+
+@router.delete("/uploads/{session_id}", response_model=ApiResponse[None])
+async def cancel_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a resumable upload and drop the chunks received."""
+    session = await _get_upload_session(db, session_id, current_user)
+    await db.delete(session)
+    await db.commit()
+    await asyncio.to_thread(remove_chunks, session_id)
+    storage = get_storage()
+    if session.status == UploadSessionStatus.ACTIVE and storage.direct_uploads:
+        await storage.delete(direct_upload_key(session))
+
+    return ApiResponse(data=None, success=True, message="Загрузка отменена")
 
-@router.get("", response_model=ApiResponse[list[DocumentResponse]])
+
+# Sortable columns of the document list and the type of their cursor values
+_DOCUMENT_SORTS = {
+    "created_at": (Document.created_at, datetime),
+    "name": (Document.name, str),
+    "file_size": (Document.file_size, int),
+}
+
+
+def document_to_dict(d: Document, preview: Optional[DocumentPreview]) -> dict:
+    """Plain-dict DocumentResponse; preview is the document's DocumentPreview, if any."""
+    return {
+        "id": d.id,
+        "name": d.name,
+        "folder_id": d.folder_id,
+        "client_id": d.client_id,
+        "file_url": d.file_url,
+        "file_type": d.file_type,
+        "file_size": d.file_size,
+        "owner_id": d.owner_id,
+        "company_id": d.company_id,
+        "created_at": d.created_at,
+        "updated_at": d.updated_at,
+        "preview_status": preview.status.value if preview else None,
+        "thumbnail_url": preview.thumbnail_url if preview else None,
+        "preview_url": preview.preview_url if preview else None,
+    }
+
+
+@router.get("", response_model=CursorResponse[DocumentResponse])
 async def get_documents(
     folder_id: Optional[UUID] = None,
     client_id: Optional[UUID] = None,
     owner_id: Optional[UUID] = None,
+    file_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort_by: Literal["created_at", "name", "file_size"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get documents with optional filters."""
+    """
+    Get documents with optional filters, one page at a time. file_type is a
+    MIME type, or a family ending in "/" (e.g. "image/"); dates filter on
+    the upload date, inclusive. Pass next_cursor back as cursor for the next page.
+    """
     if not current_user.company_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Необходимо быть в компании"
         )
     
-    query = select(Document).where(Document.company_id == current_user.company_id)
+    query = (
+        select(Document, DocumentPreview)
+        .outerjoin(DocumentPreview, DocumentPreview.document_id == Document.id)
+        .where(Document.company_id == current_user.company_id)
+    )
     
     if folder_id:
         query = query.where(Document.folder_id == folder_id)
@@ -88,24 +405,72 @@ async def get_documents(
     if owner_id:
         query = query.where(Document.owner_id == owner_id)
     
-    result = await db.execute(query.order_by(Document.created_at.desc()))
-    documents = result.scalars().all()
+    if file_type:
+        if file_type.endswith("/"):
+            query = query.where(Document.file_type.startswith(file_type, autoescape=True))
+        else:
+            query = query.where(Document.file_type == file_type)
+    
+    if date_from:
+        query = query.where(Document.created_at >= datetime.combine(date_from, time.min))
+    
+    if date_to:
+        query = query.where(Document.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    
+    # Documents in folders or of clients the user can't access are left out
+    if current_user.role not in FULL_ACCESS_ROLES:
+        query = query.where(
+            Document.folder_id.is_(None) |
+            Document.folder_id.in_(select(Folder.id).where(access_filter(current_user, Folder, folder_access, "folder_id"))),
+            Document.client_id.is_(None) |
+            Document.client_id.in_(select(Client.id).where(access_filter(current_user, Client, client_access, "client_id")))
+        )
     
-    return ApiResponse(
-        data=[DocumentResponse.model_validate(d) for d in documents],
-        success=True
-    )
+    # Keyset pagination on (sort column, id), so deep pages cost the same as the first
+    sort_column, value_type = _DOCUMENT_SORTS[sort_by]
+    if cursor:
+        try:
+            after_value, after_id = decode_cursor(cursor, f"{sort_by}:{order}", value_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Неверный курсор"
+            )
+        position = tuple_(sort_column, Document.id)
+        after = tuple_(literal(after_value, sort_column.type), literal(after_id, Document.id.type))
+        query = query.where(position < after if order == "desc" else position > after)
+    
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), Document.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Document.id.asc())
+    
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Document
+        next_cursor = encode_cursor(f"{sort_by}:{order}", getattr(last, sort_by), last.id)
+    
+    return cursor_response([document_to_dict(d, preview) for d, preview in rows], next_cursor)
 
 
-@router.get("/{document_id}", response_model=ApiResponse[DocumentResponse])
+@router.get("/{document_id:uuid}", response_model=ApiResponse[DocumentResponse])
 async def get_document(
     document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get document by ID."""
-    result = await db.execute(select(Document).where(Document.id == document_id))
-    document = result.scalar_one_or_none()
+    result = await db.execute(
+        select(Document, DocumentPreview)
+        .outerjoin(DocumentPreview, DocumentPreview.document_id == Document.id)
+        .where(Document.id == document_id)
+    )
+    row = result.first()
+    document, preview = row if row else (None, None)
     
     if not document:
         raise HTTPException(
@@ -119,10 +484,10 @@ async def get_document(
             detail="Нет доступа к документу"
         )
     
-    return ApiResponse(data=DocumentResponse.model_validate(document), success=True)
+    return api_response(document_to_dict(document, preview))
 
 
-@router.delete("/{document_id}", response_model=ApiResponse[None])
+@router.delete("/{document_id:uuid}", response_model=ApiResponse[None])
 async def delete_document(
     document_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -231,7 +596,8 @@ async def get_folders(
         )
     
     query = select(Folder).options(selectinload(Folder.access_users)).where(
-        Folder.company_id == current_user.company_id
+        Folder.company_id == current_user.company_id,
+        Folder.id.not_in(pending_deletions())
     )
     
     if parent_id:
@@ -277,6 +643,71 @@ async def get_folders(
     )
 
 
+@router.get("/folders/tree", response_model=ApiResponse[list[FolderTreeNode]])
+async def get_folder_tree(
+    parent_id: Optional[UUID] = None,
+    depth: int = Query(3, ge=1, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Folder tree below parent_id (or the root) down to depth levels, with
+    document counts and total sizes of each whole subtree.
+    """
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Необходимо быть в компании"
+        )
+    
+    if parent_id:
+        result = await db.execute(select(Folder.company_id).where(Folder.id == parent_id))
+        if result.scalar_one_or_none() != current_user.company_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Папка не найдена"
+            )
+    
+    roots = await load_folder_tree(db, current_user, parent_id)
+    return api_response([node.to_dict(depth) for node in roots])
+
+
+@router.get("/folders/{folder_id}/zip", response_class=StreamingResponse)
+async def download_folder_zip(
+    folder_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """ZIP of the folder with every subfolder and document the user can see, streamed as it is built."""
+    result = await db.execute(
+        select(Folder).options(selectinload(Folder.access_users)).where(
+            Folder.id == folder_id,
+            Folder.id.not_in(pending_deletions())
+        )
+    )
+    folder = result.scalar_one_or_none()
+
+    if not folder or folder.company_id != current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Папка не найдена"
+        )
+
+    if not can_access(current_user, folder.access_type, folder.owner_id,
+                      current_user.id in [u.id for u in folder.access_users]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этой папке"
+        )
+
+    entries = await folder_archive(db, current_user, folder)
+    return StreamingResponse(
+        stream_zip(entries, get_storage().open),
+        media_type="application/zip",
+        headers=zip_response_headers(f"{safe_name(folder.name)}.zip")
+    )
+
+
 @router.put("/folders/{folder_id}", response_model=ApiResponse[FolderResponse])
 async def update_folder(
     folder_id: UUID,
@@ -334,13 +765,20 @@ async def update_folder(
     )
 
 
-@router.delete("/folders/{folder_id}", response_model=ApiResponse[None])
+@router.delete(
+    "/folders/{folder_id}",
+    response_model=ApiResponse[FolderDeletionResponse],
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def delete_folder(
     folder_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete a folder."""
+    """
+    Delete a folder with its subfolders, documents and files. Runs in the
+    background; poll GET /documents/folders/deletions/{id} for progress.
+    """
     result = await db.execute(select(Folder).where(Folder.id == folder_id))
     folder = result.scalar_one_or_none()
     
@@ -356,7 +794,46 @@ async def delete_folder(
             detail="Нет прав для удаления"
         )
     
-    await db.delete(folder)
-    await db.commit()
+    # Deleting a folder that is already being deleted returns the running job
+    result = await db.execute(
+        select(FolderDeletion).where(
+            FolderDeletion.folder_id == folder_id,
+            FolderDeletion.finished_at.is_(None)
+        )
+    )
+    job = result.scalars().first()
+    if job is None:
+        job = FolderDeletion(
+            folder_id=folder.id,
+            folder_name=folder.name,
+            company_id=folder.company_id,
+            requested_by_id=current_user.id
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        folder_deletions.start(job.id)
+    
+    return ApiResponse(
+        data=FolderDeletionResponse.model_validate(job),
+        success=True,
+        message="Удаление папки запущено"
+    )
+
+
+@router.get("/folders/deletions/{job_id}", response_model=ApiResponse[FolderDeletionResponse])
+async def get_folder_deletion(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a folder deletion."""
+    job = await db.get(FolderDeletion, job_id)
+    
+    if not job or job.company_id != current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Удаление папки не найдено"
+        )
     
-    return ApiResponse(data=None, success=True, message="Папка удалена")
+    return ApiResponse(data=FolderDeletionResponse.model_validate(job), success=True)
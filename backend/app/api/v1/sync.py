@@ -0,0 +1,170 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import selectinload
+from typing import Optional
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.config import settings
+from app.database import get_db
+from app.models import (
+    User, Certificate, CertificateAction, Declaration, Task, Notification,
+    DeletedRecord, UserRole
+)
+from app.schemas import ApiResponse, NotificationResponse, SyncResponse
+from app.api.deps import get_current_user
+from app.api.v1.certificates import certificate_to_dict
+from app.api.v1.declarations import declaration_to_dict
+from app.api.v1.tasks import task_to_dict
+from app.services.sync import encode_sync_token, decode_sync_token, oldest_sync_position
+from app.utils.responses import api_response
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("", response_model=ApiResponse[SyncResponse])
+async def sync_changes(
+    since: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Certificates, declarations, tasks and notifications created, updated or
+    deleted since a previous sync token. Without a token only a starting
+    token is returned: take it before loading the lists, then sync with it.
+    """
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Необходимо быть в компании"
+        )
+
+    # Rows committed shortly after their updated_at was set are picked up by
+    # re-sending a small overlap window; clients apply changes idempotently
+    next_position = datetime.utcnow() - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    if since is None:
+        return api_response(SyncResponse(token=encode_sync_token(next_position)))
+
+    try:
+        since_at, after = decode_sync_token(since)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный токен синхронизации"
+        )
+    if min([since_at, *(at for at, _ in after.values())]) < oldest_sync_position():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Токен синхронизации устарел, загрузите данные заново"
+        )
+
+    limit = settings.SYNC_MAX_CHANGES
+    # (position, id) of the last row sent for each type that had more than limit changes
+    truncated: dict[str, tuple[datetime, UUID]] = {}
+
+    async def changed(entity, query, column, id_column):
+        # A type cut off last time resumes after its last row sent; ordering by
+        # id as well pages through any number of rows sharing one timestamp
+        position = after.get(entity)
+        if position is None:
+            query = query.where(column >= since_at)
+        else:
+            query = query.where(tuple_(column, id_column) > position)
+        result = await db.execute(query.order_by(column, id_column).limit(limit + 1))
+        rows = result.scalars().all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            truncated[entity] = (getattr(rows[-1], column.key), rows[-1].id)
+        return rows
+
+    company_id = current_user.company_id
+
+    certificates = await changed(
+        "certificates",
+        select(Certificate)
+        .where(
+            (Certificate.company_id == company_id) |
+            (Certificate.certifier_company_id == company_id)
+        )
+        .options(
+            selectinload(Certificate.certifier_company),
+            selectinload(Certificate.owner),
+            selectinload(Certificate.assigned_to),
+            selectinload(Certificate.declarant_company),
+            selectinload(Certificate.linked_declarations),
+            selectinload(Certificate.attached_documents),
+            selectinload(Certificate.attached_folders),
+            selectinload(Certificate.actions).selectinload(CertificateAction.attached_files)
+        ),
+        Certificate.updated_at,
+        Certificate.id
+    )
+
+    declarations = await changed(
+        "declarations",
+        select(Declaration)
+        .where(Declaration.company_id == company_id)
+        .options(
+            selectinload(Declaration.vehicles),
+            selectinload(Declaration.attached_documents),
+            selectinload(Declaration.attached_folders)
+        ),
+        Declaration.updated_at,
+        Declaration.id
+    )
+
+    # Same visibility as the task list
+    if current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]:
+        task_filter = (Task.created_by_company_id == company_id) | (Task.target_company_id == company_id)
+    else:
+        task_filter = (Task.target_employee_id == current_user.id) | (Task.created_by_user_id == current_user.id)
+    tasks = await changed(
+        "tasks",
+        select(Task)
+        .where(task_filter)
+        .options(
+            selectinload(Task.attached_documents),
+            selectinload(Task.attached_declarations),
+            selectinload(Task.attached_certificates),
+            selectinload(Task.status_history)
+        ),
+        Task.updated_at,
+        Task.id
+    )
+
+    # Notifications are never edited apart from being marked read by their owner
+    notifications = await changed(
+        "notifications",
+        select(Notification).where(Notification.user_id == current_user.id),
+        Notification.created_at,
+        Notification.id
+    )
+
+    tombstones = await changed(
+        "deleted",
+        select(DeletedRecord).where(
+            (DeletedRecord.company_id == company_id) |
+            (DeletedRecord.user_id == current_user.id)
+        ),
+        DeletedRecord.deleted_at,
+        DeletedRecord.id
+    )
+    deleted = {"certificates": [], "declarations": [], "tasks": [], "notifications": []}
+    for tombstone in tombstones:
+        ids = deleted.get(tombstone.entity_type)
+        if ids is not None and tombstone.entity_id not in ids:
+            ids.append(tombstone.entity_id)
+
+    # Types that were cut off carry on from their last row; the others from now
+    has_more = bool(truncated)
+
+    return api_response({
+        "token": encode_sync_token(next_position, truncated),
+        "has_more": has_more,
+        "certificates": [certificate_to_dict(c) for c in certificates],
+        "declarations": [declaration_to_dict(d) for d in declarations],
+        "tasks": [task_to_dict(t) for t in tasks],
+        "notifications": [NotificationResponse.model_validate(n) for n in notifications],
+        "deleted": deleted,
+    })
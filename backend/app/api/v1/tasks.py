@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
@@ -14,43 +15,53 @@ from app.models import (
 from app.schemas import (
     ApiResponse, PaginatedResponse,
     TaskCreate, TaskUpdate, TaskResponse,
-    TaskStatusUpdateRequest, TaskStatusChangeResponse
+    TaskStatusUpdateRequest
 )
 from app.api.deps import get_current_user
 from app.services.notification import create_notification
+from app.utils.responses import api_response, paginated_response
+from app.utils.etags import make_etag, etag_matches, etag_headers, not_modified
+from app.utils.storage import get_storage
+from app.utils.zipstream import safe_name, stream_zip, zip_response_headers
+from app.services.archives import attachment_archive
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def task_to_dict(task: Task) -> dict:
+    """Convert task model to a plain dict matching TaskResponse."""
+    return {
+        "id": task.id,
+        "target_company_id": task.target_company_id,
+        "target_employee_id": task.target_employee_id,
+        "name": task.name,
+        "note": task.note,
+        "priority": task.priority,
+        "status": task.status,
+        "deadline": task.deadline,
+        "created_by_user_id": task.created_by_user_id,
+        "created_by_company_id": task.created_by_company_id,
+        "attached_document_ids": [d.id for d in task.attached_documents] if task.attached_documents else [],
+        "attached_declaration_ids": [d.id for d in task.attached_declarations] if task.attached_declarations else [],
+        "attached_certificate_ids": [c.id for c in task.attached_certificates] if task.attached_certificates else [],
+        "status_history": [
+            {
+                "id": s.id,
+                "task_id": s.task_id,
+                "from_status": s.from_status,
+                "to_status": s.to_status,
+                "changed_by": s.changed_by_id,
+                "created_at": s.created_at,
+            } for s in task.status_history
+        ] if task.status_history else [],
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+    }
+
+
 def task_to_response(task: Task) -> TaskResponse:
     """Convert task model to response schema."""
-    return TaskResponse(
-        id=task.id,
-        target_company_id=task.target_company_id,
-        target_employee_id=task.target_employee_id,
-        name=task.name,
-        note=task.note,
-        priority=task.priority,
-        status=task.status,
-        deadline=task.deadline,
-        created_by_user_id=task.created_by_user_id,
-        created_by_company_id=task.created_by_company_id,
-        attached_document_ids=[d.id for d in task.attached_documents] if task.attached_documents else [],
-        attached_declaration_ids=[d.id for d in task.attached_declarations] if task.attached_declarations else [],
-        attached_certificate_ids=[c.id for c in task.attached_certificates] if task.attached_certificates else [],
-        status_history=[
-            TaskStatusChangeResponse(
-                id=s.id,
-                task_id=s.task_id,
-                from_status=s.from_status,
-                to_status=s.to_status,
-                changed_by=s.changed_by_id,
-                created_at=s.created_at
-            ) for s in task.status_history
-        ] if task.status_history else [],
-        created_at=task.created_at,
-        updated_at=task.updated_at
-    )
+    return TaskResponse(**task_to_dict(task))
 
 
 @router.post("", response_model=ApiResponse[TaskResponse])
@@ -154,6 +165,7 @@ async def create_task(
 
 @router.get("", response_model=PaginatedResponse[TaskResponse])
 async def get_tasks(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     search: Optional[str] = None,
@@ -205,10 +217,15 @@ async def get_tasks(
     if task_status:
         query = query.where(Task.status == task_status)
     
-    # Count
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    # Count and latest change in one pass; they version the list for the ETag
+    filtered = query.subquery()
+    count_result = await db.execute(select(func.count(), func.max(filtered.c.updated_at)))
+    total, last_updated = count_result.one()
+    
+    # Visibility depends on the role, so it is part of the version
+    etag = make_etag("tasks", current_user.id, current_user.role.value, total, last_updated, page, page_size)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
     
     # Get paginated results
     offset = (page - 1) * page_size
@@ -226,21 +243,39 @@ async def get_tasks(
     )
     tasks = result.scalars().all()
     
-    return PaginatedResponse.create(
-        data=[task_to_response(t) for t in tasks],
+    return paginated_response(
+        data=[task_to_dict(t) for t in tasks],
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        headers=etag_headers(etag)
     )
 
 
 @router.get("/{task_id}", response_model=ApiResponse[TaskResponse])
 async def get_task(
     task_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get task by ID."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Revalidate from the row's version without loading its relationships
+        result = await db.execute(
+            select(Task.updated_at, Task.target_employee_id, Task.created_by_user_id)
+            .where(Task.id == task_id)
+        )
+        row = result.first()
+        if row and (
+            current_user.id in (row.target_employee_id, row.created_by_user_id) or
+            current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]
+        ):
+            etag = make_etag("task", task_id, row.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
     result = await db.execute(
         select(Task)
         .options(
@@ -272,7 +307,46 @@ async def get_task(
             detail="Нет доступа к этой задаче"
         )
     
-    return ApiResponse(data=task_to_response(task), success=True)
+    etag = make_etag("task", task.id, task.updated_at)
+    return api_response(task_to_dict(task), headers=etag_headers(etag))
+
+
+@router.get("/{task_id}/zip", response_class=StreamingResponse)
+async def download_task_zip(
+    task_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """ZIP of the task's attached documents, streamed as it is built."""
+    result = await db.execute(
+        select(Task).options(selectinload(Task.attached_documents)).where(Task.id == task_id)
+    )
+    task = result.scalar_one_or_none()
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача не найдена"
+        )
+    
+    has_access = (
+        task.target_employee_id == current_user.id or
+        task.created_by_user_id == current_user.id or
+        current_user.role in [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]
+    )
+    
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этой задаче"
+        )
+    
+    entries = await attachment_archive(db, task.attached_documents, [])
+    return StreamingResponse(
+        stream_zip(entries, get_storage().open),
+        media_type="application/zip",
+        headers=zip_response_headers(f"{safe_name(task.name)}.zip")
+    )
 
 
 @router.put("/{task_id}", response_model=ApiResponse[TaskResponse])
@@ -5,6 +5,7 @@ from sqlalchemy.orm import selectinload
 from uuid import UUID
 from typing import Optional
 
+from app.config import settings
 from app.database import get_db
 from app.models import User, Company, UserRole
 from app.schemas import (
@@ -12,8 +13,10 @@ from app.schemas import (
     AssignRoleRequest, RemoveUserRequest, SendMessageRequest
 )
 from app.api.deps import get_current_user, require_admin, require_director
-from app.utils.files import save_upload_file
 from app.services.notification import create_notification
+from app.services.auth_cache import revoke_user_tokens
+from app.services.avatars import avatar_urls, remove_unused_avatar, save_avatar
+from app.services.storage_usage import check_storage_quota, set_avatar_usage
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -141,7 +144,10 @@ async def update_avatar(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload user avatar."""
+    """
+    Upload user avatar. It is cropped to squares of every AVATAR_SIZES size;
+    avatar_url is the largest and avatar_urls lists all of them.
+    """
     if current_user.id != user_id and current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -157,13 +163,34 @@ async def update_avatar(
             detail="Пользователь не найден"
         )
     
-    # Save avatar file
-    file_url, _, _ = await save_upload_file(avatar, "avatars")
-    user.avatar_url = file_url
+    max_size = settings.AVATAR_MAX_SIZE_MB * 1024 * 1024
+    data = await avatar.read(max_size + 1)
+    if len(data) > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Файл слишком большой. Максимальный размер — {settings.AVATAR_MAX_SIZE_MB} МБ"
+        )
+    
+    if user.company_id:
+        await check_storage_quota(db, user.company_id, len(data))
     
+    try:
+        file_url = await save_avatar(data)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Файл не является изображением"
+        )
+    
+    old_url = user.avatar_url
+    user.avatar_url = file_url
+    await set_avatar_usage(db, user, file_url)
     await db.commit()
     
-    return ApiResponse(data={"avatar_url": file_url}, success=True)
+    if old_url != file_url:
+        await remove_unused_avatar(db, old_url)
+    
+    return ApiResponse(data={"avatar_url": file_url, "avatar_urls": avatar_urls(file_url)}, success=True)
 
 
 @router.post("/{user_id}/block", response_model=ApiResponse[UserWithRoleResponse])
@@ -196,6 +223,8 @@ async def block_user(
         )
     
     user.is_blocked = True
+    # Invalidate all of the user's existing tokens immediately
+    await revoke_user_tokens(db, user.id)
     await db.commit()
     await db.refresh(user)
     
@@ -28,15 +28,103 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100_000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_CACHE_SYNC_SECONDS: int = 60
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
     
-    # File Storage
+    # Login rate limiting ("memory" per worker, "database" shared across workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = 5
+    TRUST_PROXY_HEADERS: bool = False
+    
+    # File Storage ("local" under UPLOAD_DIR, or "s3" for S3 and compatible servers like MinIO)
+    STORAGE_BACKEND: str = "local"
     UPLOAD_DIR: str = "./uploads"
+    S3_ENDPOINT_URL: str = ""  # empty for AWS S3 in S3_REGION, e.g. http://localhost:9000 for MinIO
+    S3_PATH_STYLE: bool = False  # address objects as <endpoint>/<bucket>/<key> (MinIO)
+    S3_BUCKET: str = ""
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_PART_SIZE_MB: int = 8  # larger files are uploaded to the bucket in parts of this size
+    S3_PRESIGN_EXPIRE_SECONDS: int = 3600
     MAX_FILE_SIZE_MB: int = 50
+    STORAGE_QUOTA_MB: int = 0  # per company unless set for it (PUT /companies/{id}/storage-quota); 0 for unlimited
+    FOLDER_DELETE_BATCH_SIZE: int = 500  # documents deleted per transaction
+    FOLDER_DELETE_FILE_CONCURRENCY: int = 8  # files removed in parallel
+    FOLDER_DELETE_STALE_SECONDS: int = 300  # unfinished jobs idle this long are taken over by another run
+    UPLOAD_PARTIAL_DIR: str = "./uploads_partial"  # chunks of resumable uploads; not served
+    UPLOAD_CHUNK_SIZE_MB: int = 5
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # idle resumable uploads are swept after this
+    UPLOAD_SWEEP_INTERVAL_SECONDS: int = 3600
+    # Orphaned uploads (files no row refers to)
+    UPLOAD_GC_ENABLED: bool = True
+    UPLOAD_GC_INTERVAL_SECONDS: int = 86400
+    UPLOAD_GC_GRACE_HOURS: int = 24  # younger files are never collected, so uploads in flight are safe
+    UPLOAD_GC_ACTION: str = "quarantine"  # "quarantine" (kept under .orphaned/ for a while) or "delete"
+    UPLOAD_GC_QUARANTINE_DAYS: int = 7
+    UPLOAD_GC_BATCH_SIZE: int = 1000  # files looked up per query
+    IMAGE_WORKERS: int = 2  # processes rendering previews and avatars
+    AVATAR_MAX_SIZE_MB: int = 10
+    # Comma-separated square sizes, px; avatar_url points at the largest
+    AVATAR_SIZES_STR: str = "64,128,256"
+    PREVIEWS_ENABLED: bool = True
+    PREVIEW_THUMBNAIL_SIZE: int = 256  # longest side, px
+    PREVIEW_SIZE: int = 1280
+    PREVIEW_STALE_SECONDS: int = 300  # pending previews idle this long are taken over by another run
     
     # Telegram Bot
     TELEGRAM_BOT_TOKEN: Optional[str] = None
     ADMIN_TELEGRAM_CHAT_ID: Optional[str] = None
+    TELEGRAM_POOL_SIZE: int = 8
+    TELEGRAM_MAX_CONCURRENCY: int = 4
+    TELEGRAM_TIMEOUT_SECONDS: float = 10.0
+    
+    # Monitoring
+    METRICS_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_MS: int = 500
+    QUERY_STATS_ENABLED: bool = True
+    N_PLUS_ONE_DETECTION: Optional[bool] = None  # None: enabled when DEBUG
+    N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # Incremental sync (/sync)
+    SYNC_MAX_CHANGES: int = 500  # per entity type and request
+    SYNC_OVERLAP_SECONDS: int = 5  # re-sent on the next sync to cover in-flight transactions
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    
+    # Deadline reminders (tasks and certificates)
+    DEADLINE_REMINDERS_ENABLED: bool = True
+    DEADLINE_CHECK_INTERVAL_SECONDS: int = 900
+    DEADLINE_REMINDER_DAYS: int = 1  # "due soon" when the deadline is at most this many days away
+    DEADLINE_REMINDER_MAX_ITEMS: int = 10  # items listed per notification
+    
+    # Response compression (brotli when the client accepts it, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_STREAMING: bool = True
+    # Comma-separated; entries ending in "/" match a whole family
+    COMPRESSION_CONTENT_TYPES_STR: str = (
+        "application/json,text/,application/javascript,application/xml,image/svg+xml"
+    )
+    
+    @property
+    def AVATAR_SIZES(self) -> List[int]:
+        """Get the avatar sizes, smallest first."""
+        return sorted(int(s) for s in self.AVATAR_SIZES_STR.split(",") if s.strip())
+    
+    @property
+    def COMPRESSION_CONTENT_TYPES(self) -> List[str]:
+        """Get list of content types eligible for compression."""
+        return [t.strip() for t in self.COMPRESSION_CONTENT_TYPES_STR.split(",") if t.strip()]
     
     # CORS
     FRONTEND_URL: str = "https://crm88.netlify.app"
@@ -53,6 +141,9 @@ class Settings(BaseSettings):
     # Admin
     ADMIN_LOGIN: str = "admin"
     ADMIN_PASSWORD: str = "admin123"
+    ADMIN_CODE_BACKEND: str = "database"  # "database" (shared by workers) or "memory"
+    ADMIN_CODE_TTL_HOURS: int = 24
+    ADMIN_CODE_CHECK_INTERVAL_SECONDS: int = 300
     
     class Config:
         env_file = ".env"
@@ -1,4 +1,10 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
 
@@ -30,3 +36,75 @@ async def get_db() -> AsyncSession:
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+
+
+def _create_missing_indexes(sync_conn):
+    """create_all skips existing tables, so indexes added to them later are created here."""
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+# Query instrumentation
+
+class QueryStats:
+    """Queries executed while handling one request."""
+    
+    __slots__ = ("count", "duration", "statements")
+    
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        # statement text -> executions, only kept for N+1 detection
+        self.statements: Optional[Counter] = Counter() if track_statements else None
+    
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least threshold times."""
+        if self.statements is None:
+            return []
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats(track_statements: bool = False) -> tuple[QueryStats, Token]:
+    """Start collecting query stats for the current request/task."""
+    stats = QueryStats(track_statements)
+    return stats, _query_stats.set(stats)
+
+
+def stop_query_stats(token: Token):
+    _query_stats.reset(token)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    start = getattr(context, "_query_start", None)
+    if stats is None or start is None:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - start
+    if stats.statements is not None:
+        stats.statements[statement] += 1
+
+
+def instrument_engine(async_engine: AsyncEngine):
+    """Attach query counting/timing hooks to an engine."""
+    sync_engine = getattr(async_engine, "sync_engine", async_engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
@@ -1,12 +1,12 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 import logging
 import os
 import sys
 from pathlib import Path
+import asyncio
 
 # Configure logging FIRST
 logging.basicConfig(
@@ -51,51 +51,150 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         # Continue running - health check will still work
     
-    # Generate admin code
+    # Build dashboard counters for data that predates the company_stats table
+    try:
+        from app.database import engine
+        from app.services.company_stats import ensure_company_stats
+        async with engine.begin() as conn:
+            if await ensure_company_stats(conn):
+                logger.info("Dashboard counters built")
+    except Exception as e:
+        logger.error(f"Dashboard counters initialization failed: {e}")
+    
+    # Build storage counters for files that predate the storage_usage table
+    try:
+        from app.database import engine
+        from app.services.storage_usage import ensure_storage_usage
+        async with engine.begin() as conn:
+            if await ensure_storage_usage(conn):
+                logger.info("Storage usage counters built")
+    except Exception as e:
+        logger.error(f"Storage usage counters initialization failed: {e}")
+    
+    # Prepare JWT signing/verification keys once
+    from app.utils.security import init_jwt_keys
+    init_jwt_keys()
+    
+    # Load token revocations and subscribe to cross-worker auth invalidations
+    try:
+        from app.services.auth_cache import start_auth_cache
+        await start_auth_cache()
+        logger.info("Auth cache started")
+    except Exception as e:
+        logger.error(f"Auth cache start failed: {e}")
+    
+    # Generate admin code (only one worker issues a code per rotation)
     admin_code = None
     try:
-        from app.utils.security import generate_admin_code
-        admin_code = generate_admin_code()
-        logger.info(f"Admin code generated: {admin_code}")
+        from app.services.admin_code import rotate_admin_code
+        admin_code = await rotate_admin_code()
+        if admin_code:
+            logger.info(f"Admin code generated: {admin_code}")
+        else:
+            logger.info("Valid admin code already issued, not generating a new one")
     except Exception as e:
         logger.error(f"Admin code generation failed: {e}")
     
     # Create upload directory
-    upload_dir = Path(settings.UPLOAD_DIR)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Upload directory: {upload_dir}")
+    if settings.STORAGE_BACKEND == "s3":
+        logger.info(f"Uploads stored in bucket {settings.S3_BUCKET}")
+    else:
+        upload_dir = Path(settings.UPLOAD_DIR)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Upload directory: {upload_dir}")
     
-    # Send admin code via Telegram if configured (no polling - just send messages)
-    if settings.TELEGRAM_BOT_TOKEN and admin_code and settings.ADMIN_TELEGRAM_CHAT_ID:
+    # Start shared Telegram client and send admin code if configured (no polling - just send messages)
+    if settings.TELEGRAM_BOT_TOKEN:
         try:
-            from telegram import Bot
+            from app.services.telegram import init_telegram_service
+            await init_telegram_service()
+            logger.info("Telegram client started")
             
-            logger.info("Sending admin code via Telegram...")
-            
-            bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-            await bot.send_message(
-                chat_id=settings.ADMIN_TELEGRAM_CHAT_ID,
-                text=f"🔐 <b>Код администратора</b>\n\n<code>{admin_code}</code>\n\n⏰ Действителен 24 часа",
-                parse_mode='HTML'
-            )
-            logger.info("Admin code sent to Telegram successfully")
+            if admin_code:
+                from app.services.admin_code import send_admin_code
+                logger.info("Sending admin code via Telegram...")
+                await send_admin_code(admin_code)
         except Exception as e:
             logger.error(f"Failed to send admin code to Telegram: {e}")
-    elif not settings.TELEGRAM_BOT_TOKEN:
+    else:
         logger.info("Telegram not configured (TELEGRAM_BOT_TOKEN not set)")
     
+    # Issue and send a fresh admin code whenever the current one expires
+    from app.services.admin_code import admin_code_rotation_loop
+    admin_code_task = asyncio.create_task(admin_code_rotation_loop())
+    
+    # Drop sync tombstones older than any usable sync token
+    from app.services.sync import tombstone_purge_loop
+    tombstone_task = asyncio.create_task(tombstone_purge_loop())
+    
+    background_tasks = [admin_code_task, tombstone_task]
+    
+    # Remind assignees of tasks and certificates nearing or past their deadline
+    if settings.DEADLINE_REMINDERS_ENABLED:
+        from app.services.deadlines import deadline_reminder_loop
+        background_tasks.append(asyncio.create_task(deadline_reminder_loop()))
+    
+    # Drop resumable uploads abandoned midway, with their chunks
+    from app.services.uploads import upload_sweep_loop
+    background_tasks.append(asyncio.create_task(upload_sweep_loop()))
+    
+    # Quarantine or delete stored files no row refers to any more
+    if settings.UPLOAD_GC_ENABLED:
+        from app.services.upload_gc import upload_gc_loop
+        background_tasks.append(asyncio.create_task(upload_gc_loop()))
+    
+    # Pick up folder deletions interrupted by a restart or a crashed worker
+    from app.services.folder_deletion import folder_deletions
+    background_tasks.append(asyncio.create_task(folder_deletions.reclaim_loop()))
+    
+    # Retry document previews interrupted by a restart or a crashed worker
+    if settings.PREVIEWS_ENABLED:
+        from app.services.previews import document_previews
+        background_tasks.append(asyncio.create_task(document_previews.reclaim_loop()))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down CRM Backend...")
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    await folder_deletions.stop()
+    
+    from app.services.previews import document_previews
+    from app.utils.images import shutdown_image_executor
+    await document_previews.stop()
+    shutdown_image_executor()
+    
+    from app.utils.storage import close_storage
+    await close_storage()
+    
+    from app.services.auth_cache import stop_auth_cache
+    await stop_auth_cache()
+    
+    try:
+        from app.services.telegram import close_telegram_service
+        await close_telegram_service()
+    except Exception as e:
+        logger.error(f"Failed to stop Telegram client: {e}")
+    
+    from app.utils.security import shutdown_password_executor
+    shutdown_password_executor()
 
 
+from app.utils.responses import ORJSONResponse
+
 # Create FastAPI application
 app = FastAPI(
     title="CRM API",
     description="Backend API for CRM system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS - production settings
@@ -117,6 +216,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for JSON and text responses above COMPRESSION_MIN_SIZE
+if settings.COMPRESSION_ENABLED:
+    from app.middleware import CompressionMiddleware
+    app.add_middleware(CompressionMiddleware)
+
+# Per-route latency, status and in-flight metrics plus the slow-request log
+if settings.METRICS_ENABLED:
+    from app.middleware import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+# Per-request SQL query count/time (Server-Timing header) and N+1 detection.
+# Added last so it wraps the metrics middleware, whose slow log includes the counts.
+if settings.QUERY_STATS_ENABLED:
+    from app.middleware import QueryStatsMiddleware
+    app.add_middleware(QueryStatsMiddleware)
+
 # Include API router with error handling
 try:
     from app.api.v1 import api_router
@@ -129,9 +244,17 @@ except Exception as e:
     raise
 
 # Mount static files for uploads
-upload_path = Path(settings.UPLOAD_DIR)
-if upload_path.exists():
-    app.mount("/uploads", StaticFiles(directory=str(upload_path)), name="uploads")
+from app.utils.files import UploadStaticFiles, redirect_upload
+
+if settings.STORAGE_BACKEND == "s3":
+    # Redirects to presigned URLs; the files are downloaded from the bucket
+    app.add_api_route(
+        "/uploads/{key:path}", redirect_upload, methods=["GET", "HEAD"], include_in_schema=False, name="uploads"
+    )
+else:
+    upload_path = Path(settings.UPLOAD_DIR)
+    if upload_path.exists():
+        app.mount("/uploads", UploadStaticFiles(directory=str(upload_path)), name="uploads")
 
 
 @app.exception_handler(Exception)
@@ -165,12 +288,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    
+    from app.middleware import metrics_response
+    return metrics_response()
+
+
 @app.get("/api/admin-code")
 async def get_admin_code():
     """Get current admin code (for development/testing only)."""
     if not settings.DEBUG:
         return {"error": "Not available in production"}
     
-    from app.utils.security import get_current_admin_code
+    from app.services.admin_code import get_current_admin_code
     code = get_current_admin_code()
     return {"admin_code": code}
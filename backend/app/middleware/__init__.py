@@ -0,0 +1,5 @@
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware, metrics_response
+from app.middleware.queries import QueryStatsMiddleware
+
+__all__ = ["CompressionMiddleware", "MetricsMiddleware", "metrics_response", "QueryStatsMiddleware"]
@@ -0,0 +1,128 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import get_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Label used for requests that matched no route, so unknown paths can't blow up cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status codes and in-flight
+    requests per route template (e.g. /api/v1/users/{user_id}).
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: Optional[int] = None):
+        self.app = app
+        self.slow_request_ms = (
+            settings.SLOW_REQUEST_THRESHOLD_MS if slow_request_ms is None else slow_request_ms
+        )
+        self._routes = RouteTemplateResolver()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+
+            route = self._routes.resolve(scope)
+            REQUEST_COUNT.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(duration)
+
+            if duration * 1000 >= self.slow_request_ms:
+                message = f"Slow request: {method} {route} -> {status_code} in {duration * 1000:.0f}ms"
+                stats = get_query_stats()
+                if stats is not None:
+                    message += f" ({stats.count} queries, {stats.duration * 1000:.0f}ms in DB)"
+                logger.warning(message)
+
+
+class RouteTemplateResolver:
+    """Maps a handled request's scope to its route template."""
+
+    def __init__(self):
+        # endpoint -> routes using it, built lazily from the app's routes
+        self._routes_by_endpoint: Optional[dict] = None
+
+    def resolve(self, scope: Scope) -> str:
+        # The router stores the matched endpoint in the (shared) scope
+        endpoint = scope.get("endpoint")
+        app = scope.get("app")
+        if endpoint is None or app is None:
+            return UNMATCHED_ROUTE
+
+        if self._routes_by_endpoint is None:
+            routes_by_endpoint: dict = {}
+            for route in app.routes:
+                target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                routes_by_endpoint.setdefault(target, []).append(route)
+            self._routes_by_endpoint = routes_by_endpoint
+
+        routes = self._routes_by_endpoint.get(endpoint, [])
+        if len(routes) == 1:
+            return routes[0].path_format
+        # Several routes share this endpoint: find the one matching the request
+        for route in routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path_format
+        return UNMATCHED_ROUTE
+
+
+def metrics_response() -> Response:
+    """Render all metrics in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several workers: aggregate the per-process files
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,90 @@
+import logging
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import start_query_stats, stop_query_stats
+from app.middleware.metrics import RouteTemplateResolver
+
+logger = logging.getLogger(__name__)
+
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries executed per request by route template",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL queries per request by route template",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+N_PLUS_ONE_DETECTED = Counter(
+    "http_request_n_plus_one_total",
+    "Requests that repeated an identical SQL statement (debug/test only)",
+    ["method", "route"],
+)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts and times the SQL queries run while handling each request.
+
+    Adds a Server-Timing header (db;dur=<ms>;desc="<n> queries"), records
+    per-route query histograms and, when enabled, logs statements repeated
+    N_PLUS_ONE_THRESHOLD or more times within one request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        detect_n_plus_one: Optional[bool] = None,
+        n_plus_one_threshold: Optional[int] = None
+    ):
+        self.app = app
+        if detect_n_plus_one is None:
+            detect_n_plus_one = settings.N_PLUS_ONE_DETECTION
+            if detect_n_plus_one is None:
+                detect_n_plus_one = settings.DEBUG
+        self.detect_n_plus_one = detect_n_plus_one
+        self.n_plus_one_threshold = n_plus_one_threshold or settings.N_PLUS_ONE_THRESHOLD
+        self._routes = RouteTemplateResolver()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats(track_statements=self.detect_n_plus_one)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_query_stats(token)
+
+            method = scope["method"]
+            route = self._routes.resolve(scope)
+            REQUEST_DB_QUERIES.labels(method, route).observe(stats.count)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.duration)
+
+            repeated = stats.repeated_statements(self.n_plus_one_threshold)
+            if repeated:
+                N_PLUS_ONE_DETECTED.labels(method, route).inc()
+                for statement, count in repeated:
+                    logger.warning(
+                        f"Possible N+1 in {method} {route}: statement executed {count} times: "
+                        f"{' '.join(statement.split())[:300]}"
+                    )
@@ -4,11 +4,22 @@ from app.models.company import Company
 from app.models.declaration import Declaration, Vehicle, DeclarationGroup, DeclarationMode, VehicleType
 from app.models.certificate import Certificate, CertificateAction, CertificateStatus
 from app.models.task import Task, TaskStatusChange, TaskPriority, TaskStatus
-from app.models.document import Document, Folder, AccessType
+from app.models.document import (
+    Document, Folder, AccessType, FolderDeletion, FolderDeletionStatus, DocumentPreview, PreviewStatus,
+    UploadSession, UploadSessionStatus
+)
 from app.models.client import Client
 from app.models.partnership import Partnership, PartnershipStatus
 from app.models.request import Request, RequestType, RequestStatus
 from app.models.notification import Notification, NotificationType
+from app.models.rate_limit import RateLimitCounter
+from app.models.admin_code import AdminCode
+from app.models.token import RevokedToken, UserTokenCutoff, RefreshToken
+from app.models.sync import DeletedRecord
+from app.models.company_stats import CompanyStat
+from app.models.storage_usage import StorageUsage, StorageQuota
+from app.models.scheduler import JobWatermark
+from app.models import events  # noqa: F401  (registers flush hooks)
 
 __all__ = [
     # User
@@ -22,7 +33,8 @@ __all__ = [
     # Task
     "Task", "TaskStatusChange", "TaskPriority", "TaskStatus",
     # Document
-    "Document", "Folder", "AccessType",
+    "Document", "Folder", "AccessType", "FolderDeletion", "FolderDeletionStatus", "DocumentPreview", "PreviewStatus",
+    "UploadSession", "UploadSessionStatus",
     # Client
     "Client",
     # Partnership
@@ -31,4 +43,18 @@ __all__ = [
     "Request", "RequestType", "RequestStatus",
     # Notification
     "Notification", "NotificationType",
+    # Rate limiting
+    "RateLimitCounter",
+    # Admin code
+    "AdminCode",
+    # Tokens
+    "RevokedToken", "UserTokenCutoff", "RefreshToken",
+    # Sync
+    "DeletedRecord",
+    # Dashboard counters
+    "CompanyStat",
+    # Storage usage
+    "StorageUsage", "StorageQuota",
+    # Background jobs
+    "JobWatermark",
 ]
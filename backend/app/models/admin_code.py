@@ -0,0 +1,18 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class AdminCode(Base):
+    """Issued admin login code. Only a keyed hash of the code is stored."""
+    __tablename__ = "admin_codes"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    code_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<AdminCode expires {self.expires_at}>"
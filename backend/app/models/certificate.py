@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Boolean, Table
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Boolean, Table, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -47,6 +47,16 @@ certificate_payment_files = Table(
 
 class Certificate(Base):
     __tablename__ = "certificates"
+    __table_args__ = (
+        # Changes-since lookups for /sync (owner and certifier side)
+        Index("ix_certificates_company_id_updated_at", "company_id", "updated_at"),
+        Index("ix_certificates_certifier_company_id_updated_at", "certifier_company_id", "updated_at"),
+        # Deadline sweeps and overdue counts only look at open certificates
+        Index(
+            "ix_certificates_deadline_open", "deadline",
+            postgresql_where=text("status NOT IN ('COMPLETED', 'REJECTED')")
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     certifier_company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=True)  # null means "for self"
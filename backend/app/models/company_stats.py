@@ -0,0 +1,30 @@
+import uuid
+from sqlalchemy import Column, String, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+# employee_id of the company-wide rows
+COMPANY_TOTAL = uuid.UUID(int=0)
+# status of entities that have none (declarations)
+NO_STATUS = ""
+
+
+class CompanyStat(Base):
+    """
+    Row counts per (company, employee, entity, status), kept in step with
+    tasks, certificates and declarations by a flush hook (app.models.events)
+    so dashboards read counters instead of counting rows.
+    """
+    __tablename__ = "company_stats"
+    __table_args__ = (
+        Index("ix_company_stats_employee_id", "employee_id", "entity"),
+    )
+    
+    company_id = Column(UUID(as_uuid=True), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), primary_key=True)  # COMPANY_TOTAL for company-wide counts
+    entity = Column(String(32), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<CompanyStat {self.company_id}/{self.employee_id} {self.entity}:{self.status}={self.count}>"
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, date
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Table
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Table, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -68,6 +68,10 @@ declaration_folders = Table(
 
 class Declaration(Base):
     __tablename__ = "declarations"
+    __table_args__ = (
+        # Changes-since lookups for /sync
+        Index("ix_declarations_company_id_updated_at", "company_id", "updated_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     post_number = Column(String(5), nullable=False)  # 5 digits
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum, Table
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, ForeignKey, Enum, Table, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -13,6 +13,25 @@ class AccessType(str, PyEnum):
     SELECTED = "selected"
 
 
+class FolderDeletionStatus(str, PyEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class UploadSessionStatus(str, PyEnum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+
+
+class PreviewStatus(str, PyEnum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    UNSUPPORTED = "unsupported"
+
+
 # Association table for folder access
 folder_access = Table(
     "folder_access",
@@ -27,7 +46,7 @@ class Folder(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
-    parent_id = Column(UUID(as_uuid=True), ForeignKey("folders.id"), nullable=True)
+    parent_id = Column(UUID(as_uuid=True), ForeignKey("folders.id"), nullable=True, index=True)
     access_type = Column(Enum(AccessType), default=AccessType.PUBLIC, nullable=False)
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.id"), nullable=True)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -49,13 +68,19 @@ class Folder(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Document list pages by folder or client, newest first
+        Index("ix_documents_company_id_folder_id_created_at", "company_id", "folder_id", "created_at"),
+        Index("ix_documents_company_id_client_id_created_at", "company_id", "client_id", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
-    file_url = Column(String(500), nullable=False)
+    # Indexed for the orphaned upload collection (app.services.upload_gc)
+    file_url = Column(String(500), nullable=False, index=True)
     file_type = Column(String(100), nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
-    folder_id = Column(UUID(as_uuid=True), ForeignKey("folders.id"), nullable=True)
+    folder_id = Column(UUID(as_uuid=True), ForeignKey("folders.id"), nullable=True, index=True)
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.id"), nullable=True)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -70,3 +95,83 @@ class Document(Base):
     
     def __repr__(self):
         return f"<Document {self.name}>"
+
+
+class FolderDeletion(Base):
+    """Background deletion of a folder with its subfolders, documents and files; doubles as its progress report."""
+    __tablename__ = "folder_deletions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Not a foreign key: the folder is gone once the job completes
+    folder_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    folder_name = Column(String(255), nullable=False)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    requested_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(FolderDeletionStatus), default=FolderDeletionStatus.PENDING, nullable=False)
+    documents_deleted = Column(Integer, default=0, nullable=False)
+    files_deleted = Column(Integer, default=0, nullable=False)
+    files_failed = Column(Integer, default=0, nullable=False)
+    folders_deleted = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped after every batch; a job not updated for a while was interrupted
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<FolderDeletion {self.folder_name} {self.status}>"
+
+
+class DocumentPreview(Base):
+    """Thumbnail and preview images of a document, rendered in the background after upload."""
+    __tablename__ = "document_previews"
+    
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    # sha256 of the file; preview images are stored under it, so identical files share them
+    content_hash = Column(String(64), nullable=True, index=True)
+    status = Column(Enum(PreviewStatus), default=PreviewStatus.PENDING, nullable=False)
+    thumbnail_url = Column(String(500), nullable=True)
+    preview_url = Column(String(500), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # A pending preview not updated for a while was interrupted
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<DocumentPreview {self.document_id} {self.status}>"
+
+
+class UploadSession(Base):
+    """A resumable upload: chunks are stored as they arrive and assembled into a Document on completion."""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Not foreign keys: they are checked again on completion, as the folder or client may be deleted meanwhile
+    folder_id = Column(UUID(as_uuid=True), nullable=True)
+    client_id = Column(UUID(as_uuid=True), nullable=True)
+    name = Column(String(255), nullable=False)
+    file_type = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)  # expected hash of the whole file
+    status = Column(Enum(UploadSessionStatus), default=UploadSessionStatus.ACTIVE, nullable=False)
+    # Not a foreign key: the document may be deleted while the session is kept
+    document_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every chunk; sessions idle for UPLOAD_SESSION_TTL_HOURS are swept
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+    
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+    
+    def chunk_length(self, index: int) -> int:
+        """Expected length of chunk index; the last one holds the rest."""
+        if index < self.chunk_count - 1:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.chunk_count - 1)
+    
+    def __repr__(self):
+        return f"<UploadSession {self.name} {self.status}>"
@@ -0,0 +1,263 @@
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import delete, event, inspect, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.models.certificate import Certificate, CertificateAction
+from app.models.company_stats import CompanyStat, COMPANY_TOTAL, NO_STATUS
+from app.models.declaration import Declaration, Vehicle
+from app.models.document import Document
+from app.models.notification import Notification
+from app.models.storage_usage import AVATAR, CLIENT, FOLDER, NO_SCOPE_ID, TOTAL, StorageUsage
+from app.models.sync import DeletedRecord
+from app.models.task import Task, TaskStatusChange
+from app.models.user import User
+
+# Child rows rendered inside their parent's response: child -> (parent, relationship, foreign key)
+_CHILDREN = {
+    CertificateAction: (Certificate, "certificate", "certificate_id"),
+    Vehicle: (Declaration, "declaration", "declaration_id"),
+    TaskStatusChange: (Task, "task", "task_id"),
+}
+_VERSIONED = (Certificate, Declaration, Task)
+
+
+def _tombstones(obj) -> list[DeletedRecord]:
+    """Tombstones for a deleted row synced by /sync, one per company (or user) that could see it."""
+    if isinstance(obj, Certificate):
+        entity_type, company_ids = "certificates", {obj.company_id, obj.certifier_company_id}
+    elif isinstance(obj, Declaration):
+        entity_type, company_ids = "declarations", {obj.company_id}
+    elif isinstance(obj, Task):
+        entity_type, company_ids = "tasks", {obj.target_company_id, obj.created_by_company_id}
+    elif isinstance(obj, Notification):
+        return [DeletedRecord(entity_type="notifications", entity_id=obj.id, user_id=obj.user_id)]
+    else:
+        return []
+    return [
+        DeletedRecord(entity_type=entity_type, entity_id=obj.id, company_id=company_id)
+        for company_id in company_ids if company_id is not None
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletions(session: Session, flush_context, instances):
+    """Keep tombstones for hard-deleted rows clients may have cached."""
+    for obj in list(session.deleted):
+        for tombstone in _tombstones(obj):
+            session.add(tombstone)
+
+
+@event.listens_for(Session, "before_flush")
+def _touch_updated_at(session: Session, flush_context, instances):
+    """
+    Bump updated_at when only a child row or an attachment list changed, so
+    ETags derived from it change with everything the response includes.
+    """
+    now = datetime.utcnow()
+    unloaded: dict = {}
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _VERSIONED):
+            # Column changes are covered by onupdate; this catches collection-only changes
+            if obj in session.dirty and session.is_modified(obj):
+                obj.updated_at = now
+            continue
+
+        link = _CHILDREN.get(type(obj))
+        if link is None:
+            continue
+        parent_cls, relationship, foreign_key = link
+        state = inspect(obj)
+        parent = state.attrs[relationship].loaded_value
+        if parent is NO_VALUE or parent is None:
+            parent_id = state.attrs[foreign_key].loaded_value
+            if parent_id is NO_VALUE or parent_id is None:
+                continue
+            parent = session.identity_map.get(session.identity_key(parent_cls, parent_id))
+            if parent is None:
+                if any(isinstance(o, parent_cls) and o.id == parent_id for o in session.new):
+                    continue
+                unloaded.setdefault(parent_cls, set()).add(parent_id)
+                continue
+        if parent not in session.deleted and parent not in session.new:
+            parent.updated_at = now
+
+    # Parents that aren't loaded in this session are updated directly
+    for parent_cls, ids in unloaded.items():
+        session.connection().execute(
+            update(parent_cls.__table__).where(parent_cls.__table__.c.id.in_(ids)).values(updated_at=now)
+        )
+
+
+# Columns that decide which company_stats counters a row is counted in
+_COUNTED = {
+    Task: ("target_company_id", "created_by_company_id", "target_employee_id", "status"),
+    Certificate: ("company_id", "certifier_company_id", "owner_id", "status"),
+    Declaration: ("company_id", "owner_id"),
+}
+
+
+def stat_keys(entity: type, values: dict) -> list[tuple]:
+    """
+    company_stats keys (company, employee, entity, status) a row counts towards.
+    Company-wide counters cover every company the row is visible to; the
+    per-employee counter is kept under the row's own company.
+    Mirrored in SQL by app.services.company_stats for rebuilds.
+    """
+    if entity is Task:
+        status = values["status"].name
+        companies = {values["target_company_id"], values["created_by_company_id"]}
+        keys = [(company, COMPANY_TOTAL, "task", status) for company in companies]
+        keys.append((values["target_company_id"], values["target_employee_id"], "task", status))
+    elif entity is Certificate:
+        status = values["status"].name
+        companies = {values["company_id"], values["certifier_company_id"]} - {None}
+        keys = [(company, COMPANY_TOTAL, "certificate", status) for company in companies]
+        keys.append((values["company_id"], values["owner_id"], "certificate", status))
+    else:
+        keys = [
+            (values["company_id"], COMPANY_TOTAL, "declaration", NO_STATUS),
+            (values["company_id"], values["owner_id"], "declaration", NO_STATUS),
+        ]
+    return keys
+
+
+def _counted_values(obj, columns: tuple, previous: bool) -> dict:
+    """Current values of the counted columns, or the values before this flush."""
+    if not previous:
+        return {column: getattr(obj, column) for column in columns}
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if history.deleted else getattr(obj, column)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _update_company_stats(session: Session, flush_context):
+    """Apply this flush's inserts, deletes and status/owner changes to company_stats in the same transaction."""
+    deltas: Counter = Counter()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        columns = _COUNTED.get(type(obj))
+        if columns is None:
+            continue
+        entity = type(obj)
+        if obj in session.new:
+            deltas.update(stat_keys(entity, _counted_values(obj, columns, previous=False)))
+        elif obj in session.deleted:
+            deltas.subtract(stat_keys(entity, _counted_values(obj, columns, previous=True)))
+        elif session.is_modified(obj, include_collections=False):
+            deltas.subtract(stat_keys(entity, _counted_values(obj, columns, previous=True)))
+            deltas.update(stat_keys(entity, _counted_values(obj, columns, previous=False)))
+
+    rows = [
+        {"company_id": key[0], "employee_id": key[1], "entity": key[2], "status": key[3], "count": delta}
+        for key, delta in sorted(deltas.items(), key=lambda item: tuple(str(part) for part in item[0]))
+        if delta
+    ]
+    if not rows:
+        return
+    # Sorted keys keep concurrent transactions locking counters in the same order
+    stmt = insert(CompanyStat).values(rows)
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=["company_id", "employee_id", "entity", "status"],
+        set_={"count": CompanyStat.count + stmt.excluded["count"]},
+    ))
+
+
+# Columns that decide which storage_usage counters a document is counted in, and by how much
+_STORED = ("company_id", "folder_id", "client_id", "file_size")
+
+
+def storage_keys(values: dict) -> list[tuple]:
+    """
+    storage_usage keys (company, scope, scope id) a document counts towards.
+    Mirrored in SQL by app.services.storage_usage for rebuilds.
+    """
+    company = values["company_id"]
+    return [
+        (company, TOTAL, NO_SCOPE_ID),
+        (company, FOLDER, values["folder_id"] or NO_SCOPE_ID),
+        (company, CLIENT, values["client_id"] or NO_SCOPE_ID),
+    ]
+
+
+def storage_usage_upsert(deltas: dict):
+    """Statement adding {(company, scope, scope id): (bytes, files)} to storage_usage, or None if there is nothing to add."""
+    rows = [
+        {"company_id": key[0], "scope": key[1], "scope_id": key[2], "bytes": size, "files": files}
+        for key, (size, files) in sorted(deltas.items(), key=lambda item: tuple(str(part) for part in item[0]))
+        if size or files
+    ]
+    if not rows:
+        return None
+    # Sorted keys keep concurrent transactions locking counters in the same order
+    stmt = insert(StorageUsage).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["company_id", "scope", "scope_id"],
+        set_={
+            "bytes": StorageUsage.bytes + stmt.excluded["bytes"],
+            "files": StorageUsage.files + stmt.excluded["files"],
+        },
+    )
+
+
+def add_usage(deltas: dict, keys: list[tuple], size: int, files: int):
+    """Add size and files to the (bytes, files) deltas of each key."""
+    for key in keys:
+        current = deltas.get(key, (0, 0))
+        deltas[key] = (current[0] + size, current[1] + files)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_storage_usage(session: Session, flush_context):
+    """
+    Apply this flush's document inserts, deletes and moves to storage_usage
+    in the same transaction; a user's avatar usage follows them when they
+    leave their company or are deleted.
+    """
+    deltas: dict = {}
+    avatar_moves = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            if obj not in session.new:
+                previous = _counted_values(obj, ("company_id",), previous=True)["company_id"]
+                current = None if obj in session.deleted else obj.company_id
+                if previous is not None and previous != current:
+                    avatar_moves.append((obj.id, previous, current))
+            continue
+        if not isinstance(obj, Document):
+            continue
+        if obj in session.new:
+            values = _counted_values(obj, _STORED, previous=False)
+            add_usage(deltas, storage_keys(values), values["file_size"], 1)
+        elif obj in session.deleted:
+            values = _counted_values(obj, _STORED, previous=True)
+            add_usage(deltas, storage_keys(values), -values["file_size"], -1)
+        elif session.is_modified(obj, include_collections=False):
+            values = _counted_values(obj, _STORED, previous=True)
+            add_usage(deltas, storage_keys(values), -values["file_size"], -1)
+            values = _counted_values(obj, _STORED, previous=False)
+            add_usage(deltas, storage_keys(values), values["file_size"], 1)
+
+    for user_id, previous, current in avatar_moves:
+        moved = session.connection().execute(
+            delete(StorageUsage)
+            .where(StorageUsage.company_id == previous, StorageUsage.scope == AVATAR, StorageUsage.scope_id == user_id)
+            .returning(StorageUsage.bytes, StorageUsage.files)
+        ).first()
+        if moved is None:
+            continue
+        add_usage(deltas, [(previous, TOTAL, NO_SCOPE_ID)], -moved.bytes, -moved.files)
+        if current is not None:
+            add_usage(deltas, [(current, TOTAL, NO_SCOPE_ID), (current, AVATAR, user_id)], moved.bytes, moved.files)
+
+    stmt = storage_usage_upsert(deltas)
+    if stmt is not None:
+        session.connection().execute(stmt)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+from app.database import Base
+
+
+class RateLimitCounter(Base):
+    """Shared sliding-window counter bucket (used by the database rate limit backend)."""
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String(255), primary_key=True)
+    window_start = Column(BigInteger, primary_key=True)  # unix time of the bucket start
+    count = Column(Integer, default=0, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<RateLimitCounter {self.key}@{self.window_start}: {self.count}>"
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Date, DateTime
+from app.database import Base
+
+
+class JobWatermark(Base):
+    """How far a periodic background job has got, so each run only handles what is new."""
+    __tablename__ = "job_watermarks"
+    
+    name = Column(String(100), primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
+    # Last day the job covered, for jobs that sweep by date
+    last_run_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<JobWatermark {self.name} {self.last_run_at}>"
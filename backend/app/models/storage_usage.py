@@ -0,0 +1,42 @@
+import uuid
+from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+# Scopes of storage_usage rows
+TOTAL = "total"  # everything the company stores; scope_id is NO_SCOPE_ID
+FOLDER = "folder"  # documents by folder; NO_SCOPE_ID for the root
+CLIENT = "client"  # documents by client; NO_SCOPE_ID for documents without one
+AVATAR = "avatar"  # avatar files by user
+NO_SCOPE_ID = uuid.UUID(int=0)
+
+
+class StorageUsage(Base):
+    """
+    Bytes and files stored per company, in total and by folder, client and
+    user avatar. Document rows are kept in step by a flush hook
+    (app.models.events) and avatars by app.services.storage_usage, in the
+    transaction that changes them, so quotas read counters instead of
+    summing file sizes.
+    """
+    __tablename__ = "storage_usage"
+    
+    company_id = Column(UUID(as_uuid=True), primary_key=True)
+    scope = Column(String(16), primary_key=True)
+    scope_id = Column(UUID(as_uuid=True), primary_key=True)
+    bytes = Column(BigInteger, default=0, nullable=False)
+    files = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<StorageUsage {self.company_id} {self.scope}:{self.scope_id} {self.bytes}B/{self.files}>"
+
+
+class StorageQuota(Base):
+    """A company's storage quota, overriding STORAGE_QUOTA_MB."""
+    __tablename__ = "storage_quotas"
+    
+    company_id = Column(UUID(as_uuid=True), primary_key=True)
+    quota_bytes = Column(BigInteger, nullable=False)  # 0 for unlimited
+    
+    def __repr__(self):
+        return f"<StorageQuota {self.company_id} {self.quota_bytes}>"
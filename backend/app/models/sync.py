@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class DeletedRecord(Base):
+    """
+    Tombstone for a deleted row, so /sync can tell clients to drop it.
+    Scoped to the companies (or the user, for notifications) that could see it.
+    """
+    __tablename__ = "deleted_records"
+    __table_args__ = (
+        Index("ix_deleted_records_company_id_deleted_at", "company_id", "deleted_at"),
+        Index("ix_deleted_records_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    entity_type = Column(String(32), nullable=False)
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    company_id = Column(UUID(as_uuid=True), nullable=True)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<DeletedRecord {self.entity_type} {self.entity_id}>"
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Table
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Text, Table, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -48,6 +48,18 @@ task_certificates = Table(
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Changes-since lookups for /sync (directors by company, employees by user)
+        Index("ix_tasks_target_company_id_updated_at", "target_company_id", "updated_at"),
+        Index("ix_tasks_created_by_company_id_updated_at", "created_by_company_id", "updated_at"),
+        Index("ix_tasks_target_employee_id_updated_at", "target_employee_id", "updated_at"),
+        Index("ix_tasks_created_by_user_id_updated_at", "created_by_user_id", "updated_at"),
+        # Deadline sweeps and overdue counts only look at open tasks
+        Index(
+            "ix_tasks_deadline_open", "deadline",
+            postgresql_where=text("status NOT IN ('COMPLETED', 'CANCELLED')")
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     target_company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
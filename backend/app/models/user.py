@@ -28,7 +28,7 @@ class User(Base):
     full_name = Column(String(255), nullable=False)
     phone = Column(String(50), nullable=False)
     activity_type = Column(Enum(ActivityType), nullable=False)
-    avatar_url = Column(String(500), nullable=True)
+    avatar_url = Column(String(500), nullable=True, index=True)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=True)
     role = Column(Enum(UserRole), default=UserRole.EMPLOYEE, nullable=False)
     is_blocked = Column(Boolean, default=False, nullable=False)
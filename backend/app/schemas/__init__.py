@@ -1,14 +1,15 @@
 # Schemas package
-from app.schemas.common import ApiResponse, PaginatedResponse, ErrorResponse
+from app.schemas.common import ApiResponse, PaginatedResponse, CursorResponse, ErrorResponse
 from app.schemas.user import (
     UserBase, UserCreate, UserUpdate, UserResponse, UserWithRoleResponse,
     UserLoginRequest, UserRegisterRequest, AdminLoginRequest,
-    TokenResponse, AdminTokenResponse,
+    TokenResponse, AdminTokenResponse, RefreshTokenRequest,
     ForgotPasswordRequest, ResetPasswordRequest, ChangePasswordRequest,
     AssignRoleRequest, RemoveUserRequest, SendMessageRequest
 )
 from app.schemas.company import (
-    CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse, CompanyJoinRequest
+    CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse, CompanyJoinRequest,
+    StorageUsageItem, StorageUsageResponse, StorageQuotaUpdate
 )
 from app.schemas.declaration import (
     VehicleBase, VehicleCreate, VehicleResponse,
@@ -26,26 +27,28 @@ from app.schemas.task import (
     TaskStatusUpdateRequest, TaskFilters
 )
 from app.schemas.document import (
-    FolderBase, FolderCreate, FolderUpdate, FolderResponse,
-    DocumentBase, DocumentResponse
+    FolderBase, FolderCreate, FolderUpdate, FolderResponse, FolderTreeNode, FolderDeletionResponse,
+    DocumentBase, DocumentResponse, UploadSessionCreate, UploadSessionResponse
 )
 from app.schemas.client import ClientBase, ClientCreate, ClientUpdate, ClientResponse
 from app.schemas.partnership import PartnershipRequestCreate, PartnershipResponse
 from app.schemas.request import RequestResponse
 from app.schemas.notification import NotificationResponse
 from app.schemas.dashboard import DashboardStats, AdminStats, DashboardFilters, GrowthDataPoint
+from app.schemas.sync import SyncDeleted, SyncResponse
 
 __all__ = [
     # Common
-    "ApiResponse", "PaginatedResponse", "ErrorResponse",
+    "ApiResponse", "PaginatedResponse", "CursorResponse", "ErrorResponse",
     # User
     "UserBase", "UserCreate", "UserUpdate", "UserResponse", "UserWithRoleResponse",
     "UserLoginRequest", "UserRegisterRequest", "AdminLoginRequest",
-    "TokenResponse", "AdminTokenResponse",
+    "TokenResponse", "AdminTokenResponse", "RefreshTokenRequest",
     "ForgotPasswordRequest", "ResetPasswordRequest", "ChangePasswordRequest",
     "AssignRoleRequest", "RemoveUserRequest", "SendMessageRequest",
     # Company
     "CompanyBase", "CompanyCreate", "CompanyUpdate", "CompanyResponse", "CompanyJoinRequest",
+    "StorageUsageItem", "StorageUsageResponse", "StorageQuotaUpdate",
     # Declaration
     "VehicleBase", "VehicleCreate", "VehicleResponse",
     "DeclarationBase", "DeclarationCreate", "DeclarationUpdate", "DeclarationResponse",
@@ -59,8 +62,8 @@ __all__ = [
     "TaskStatusChangeResponse", "TaskBase", "TaskCreate", "TaskUpdate", "TaskResponse",
     "TaskStatusUpdateRequest", "TaskFilters",
     # Document
-    "FolderBase", "FolderCreate", "FolderUpdate", "FolderResponse",
-    "DocumentBase", "DocumentResponse",
+    "FolderBase", "FolderCreate", "FolderUpdate", "FolderResponse", "FolderTreeNode", "FolderDeletionResponse",
+    "DocumentBase", "DocumentResponse", "UploadSessionCreate", "UploadSessionResponse",
     # Client
     "ClientBase", "ClientCreate", "ClientUpdate", "ClientResponse",
     # Partnership
@@ -71,4 +74,6 @@ __all__ = [
     "NotificationResponse",
     # Dashboard
     "DashboardStats", "AdminStats", "DashboardFilters", "GrowthDataPoint",
+    # Sync
+    "SyncDeleted", "SyncResponse",
 ]
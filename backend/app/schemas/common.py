@@ -32,6 +32,14 @@ class PaginatedResponse(BaseModel, Generic[T]):
         )
 
 
+class CursorResponse(BaseModel, Generic[T]):
+    """Keyset-paginated response; pass next_cursor back as cursor for the next page"""
+    data: List[T]
+    next_cursor: Optional[str] = None
+    success: bool = True
+    message: Optional[str] = None
+
+
 class ErrorResponse(BaseModel):
     """Error response"""
     success: bool = False
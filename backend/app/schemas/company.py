@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from uuid import UUID
@@ -50,3 +50,24 @@ class CompanyJoinRequest(BaseModel):
         if len(v) != 9:
             raise ValueError('ИНН должен состоять из 9 цифр')
         return v
+
+
+class StorageUsageItem(BaseModel):
+    id: Optional[UUID] = None  # None: documents in the root / without a client
+    name: Optional[str] = None
+    bytes: int
+    files: int
+
+
+class StorageUsageResponse(BaseModel):
+    bytes: int
+    files: int
+    quota_bytes: Optional[int] = None  # None: unlimited
+    avatar_bytes: int
+    avatar_files: int
+    folders: List[StorageUsageItem]
+    clients: List[StorageUsageItem]
+
+
+class StorageQuotaUpdate(BaseModel):
+    quota_mb: Optional[int] = Field(None, ge=0)  # None: STORAGE_QUOTA_MB; 0: unlimited
@@ -1,8 +1,8 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from app.models.document import AccessType
+from app.models.document import AccessType, FolderDeletionStatus, PreviewStatus, UploadSessionStatus
 
 
 class FolderBase(BaseModel):
@@ -36,6 +36,21 @@ class FolderResponse(FolderBase):
         from_attributes = True
 
 
+class FolderTreeNode(BaseModel):
+    id: UUID
+    name: str
+    parent_id: Optional[UUID] = None
+    access_type: AccessType
+    owner_id: UUID
+    client_id: Optional[UUID] = None
+    depth: int
+    document_count: int  # directly in the folder
+    total_document_count: int  # including subfolders
+    total_bytes: int
+    has_children: bool  # true even when the children are below the requested depth
+    children: List["FolderTreeNode"] = []
+
+
 class DocumentBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     folder_id: Optional[UUID] = None
@@ -51,6 +66,50 @@ class DocumentResponse(DocumentBase):
     company_id: UUID
     created_at: datetime
     updated_at: datetime
+    # None for documents uploaded before previews were introduced
+    preview_status: Optional[PreviewStatus] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     
     class Config:
         from_attributes = True
+
+
+class FolderDeletionResponse(BaseModel):
+    id: UUID
+    folder_id: UUID
+    folder_name: str
+    status: FolderDeletionStatus
+    documents_deleted: int
+    files_deleted: int
+    files_failed: int
+    folders_deleted: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class UploadSessionCreate(DocumentBase):
+    file_type: str = Field("application/octet-stream", max_length=100)
+    size: int = Field(..., gt=0)
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadSessionResponse(BaseModel):
+    id: UUID
+    name: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: List[int]  # indexes of the chunks stored so far
+    offset: int  # bytes received without a gap from the start
+    status: UploadSessionStatus
+    document_id: Optional[UUID] = None
+    expires_at: datetime  # swept if no chunk arrives before then
+    # Object storage only: PUT the whole file here, with these headers, instead of chunks
+    upload_url: Optional[str] = None
+    upload_headers: Optional[Dict[str, str]] = None
@@ -0,0 +1,24 @@
+from typing import List
+from pydantic import BaseModel, Field
+from uuid import UUID
+from app.schemas.certificate import CertificateResponse
+from app.schemas.declaration import DeclarationResponse
+from app.schemas.task import TaskResponse
+from app.schemas.notification import NotificationResponse
+
+
+class SyncDeleted(BaseModel):
+    certificates: List[UUID] = Field(default_factory=list)
+    declarations: List[UUID] = Field(default_factory=list)
+    tasks: List[UUID] = Field(default_factory=list)
+    notifications: List[UUID] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    token: str  # pass as ?since= on the next sync
+    has_more: bool = False  # more changes are pending; sync again right away
+    certificates: List[CertificateResponse] = Field(default_factory=list)
+    declarations: List[DeclarationResponse] = Field(default_factory=list)
+    tasks: List[TaskResponse] = Field(default_factory=list)
+    notifications: List[NotificationResponse] = Field(default_factory=list)
+    deleted: SyncDeleted = Field(default_factory=SyncDeleted)
@@ -59,10 +59,18 @@ class AdminLoginRequest(BaseModel):
 class TokenResponse(BaseModel):
     user: UserWithRoleResponse
     token: str
+    refresh_token: str
+    expires_in: int  # access token lifetime, seconds
 
 
 class AdminTokenResponse(BaseModel):
     token: str
+    refresh_token: str
+    expires_in: int
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class ForgotPasswordRequest(BaseModel):
@@ -0,0 +1,37 @@
+"""
+Access rules for folders and clients (and the documents in them).
+Directors, seniors and admins see everything in their company; others see
+public items, their own, and "selected" items they were given access to.
+"""
+from uuid import UUID
+
+from sqlalchemy import exists, or_
+from sqlalchemy.sql import ColumnElement
+
+from app.models import AccessType, User, UserRole
+
+FULL_ACCESS_ROLES = [UserRole.DIRECTOR, UserRole.SENIOR, UserRole.ADMIN]
+
+
+def can_access(user: User, access_type: AccessType, owner_id: UUID, has_access: bool) -> bool:
+    """Whether user may see an item; has_access tells if they are in its access list."""
+    if user.role in FULL_ACCESS_ROLES:
+        return True
+    if access_type == AccessType.PUBLIC:
+        return True
+    if access_type == AccessType.PRIVATE:
+        return owner_id == user.id
+    return owner_id == user.id or has_access
+
+
+def access_filter(user: User, model, access_table, key_column: str) -> ColumnElement:
+    """SQL version of can_access for model rows; access_table links key_column to user_id."""
+    if user.role in FULL_ACCESS_ROLES:
+        return model.id.is_not(None)
+    return or_(
+        model.access_type == AccessType.PUBLIC,
+        model.owner_id == user.id,
+        (model.access_type == AccessType.SELECTED) & exists().where(
+            access_table.c[key_column] == model.id, access_table.c.user_id == user.id
+        ),
+    )
@@ -0,0 +1,168 @@
+import asyncio
+import hmac
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, text
+
+from app.config import settings
+from app.utils.security import generate_admin_code, hash_admin_code
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+ADMIN_CODE_LOCK_KEY = 0x41444D31
+
+
+class AdminCodeStore(ABC):
+    """Storage for the current admin code, shared by every worker using it."""
+
+    @abstractmethod
+    async def rotate(self, ttl: timedelta) -> Optional[str]:
+        """
+        Issue a new code unless a valid one already exists.
+        Returns: the new plaintext code, or None if no code was issued.
+        """
+
+    @abstractmethod
+    async def verify(self, code: str) -> bool:
+        """Whether code matches the current, unexpired code."""
+
+
+class MemoryAdminCodeStore(AdminCodeStore):
+    """Per-process store. Only correct with a single worker."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._code_hash: Optional[str] = None
+        self._expires_at: Optional[datetime] = None
+
+    async def rotate(self, ttl: timedelta) -> Optional[str]:
+        async with self._lock:
+            if self._expires_at and self._expires_at > datetime.utcnow():
+                return None
+            code = generate_admin_code()
+            self._code_hash = hash_admin_code(code)
+            self._expires_at = datetime.utcnow() + ttl
+            return code
+
+    async def verify(self, code: str) -> bool:
+        if not self._code_hash or not self._expires_at:
+            return False
+        if datetime.utcnow() > self._expires_at:
+            return False
+        return hmac.compare_digest(self._code_hash, hash_admin_code(code))
+
+
+class DatabaseAdminCodeStore(AdminCodeStore):
+    """Store backed by the admin_codes table, safe with several workers."""
+
+    def __init__(self, session_maker=None):
+        if session_maker is None:
+            from app.database import async_session_maker
+            session_maker = async_session_maker
+        self._session_maker = session_maker
+
+    async def rotate(self, ttl: timedelta) -> Optional[str]:
+        from app.models import AdminCode
+
+        async with self._session_maker() as session:
+            # Serialise rotation across workers; released on commit/rollback
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADMIN_CODE_LOCK_KEY}
+            )
+
+            now = datetime.utcnow()
+            result = await session.execute(
+                select(AdminCode.id).where(AdminCode.expires_at > now).limit(1)
+            )
+            if result.scalar_one_or_none() is not None:
+                await session.rollback()
+                return None
+
+            await session.execute(delete(AdminCode).where(AdminCode.expires_at <= now))
+            code = generate_admin_code()
+            session.add(AdminCode(code_hash=hash_admin_code(code), expires_at=now + ttl))
+            await session.commit()
+            return code
+
+    async def verify(self, code: str) -> bool:
+        from app.models import AdminCode
+
+        async with self._session_maker() as session:
+            result = await session.execute(
+                select(AdminCode.code_hash).where(AdminCode.expires_at > datetime.utcnow())
+            )
+            code_hash = hash_admin_code(code)
+            return any(hmac.compare_digest(h, code_hash) for h in result.scalars().all())
+
+
+_store: Optional[AdminCodeStore] = None
+
+# Plaintext of the code this process issued, kept only for the DEBUG endpoint
+_issued_code: Optional[str] = None
+_issued_code_expires: Optional[datetime] = None
+
+
+def get_admin_code_store() -> AdminCodeStore:
+    """Get the admin code store for the configured backend."""
+    global _store
+    if _store is None:
+        if settings.ADMIN_CODE_BACKEND == "memory":
+            _store = MemoryAdminCodeStore()
+        else:
+            _store = DatabaseAdminCodeStore()
+    return _store
+
+
+async def rotate_admin_code() -> Optional[str]:
+    """Issue a new admin code if none is valid. Only one worker gets a code per rotation."""
+    global _issued_code, _issued_code_expires
+    ttl = timedelta(hours=settings.ADMIN_CODE_TTL_HOURS)
+    code = await get_admin_code_store().rotate(ttl)
+    if code:
+        _issued_code = code
+        _issued_code_expires = datetime.utcnow() + ttl
+    return code
+
+
+async def verify_admin_code(code: str) -> bool:
+    """Verify the admin code."""
+    return await get_admin_code_store().verify(code)
+
+
+def get_current_admin_code() -> Optional[str]:
+    """Get the admin code issued by this process if still valid (for development only)."""
+    if not _issued_code or not _issued_code_expires:
+        return None
+    if datetime.utcnow() > _issued_code_expires:
+        return None
+    return _issued_code
+
+
+async def send_admin_code(code: str):
+    """Deliver a newly issued admin code via Telegram if configured."""
+    from app.services.telegram import get_telegram_service
+
+    service = get_telegram_service()
+    if service is None or not settings.ADMIN_TELEGRAM_CHAT_ID:
+        return
+    await service.send_admin_code(code)
+    logger.info("Admin code sent to Telegram successfully")
+
+
+async def admin_code_rotation_loop():
+    """Periodically issue (and send) a new admin code once the current one expires."""
+    while True:
+        await asyncio.sleep(settings.ADMIN_CODE_CHECK_INTERVAL_SECONDS)
+        try:
+            code = await rotate_admin_code()
+            if code:
+                logger.info("Admin code rotated")
+                await send_admin_code(code)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Admin code rotation failed: {e}")
@@ -0,0 +1,99 @@
+"""
+ZIP downloads of folders and of the documents attached to certificates,
+declarations and tasks. Only the list of entries is built here; the
+archive itself is streamed by app.utils.zipstream.
+"""
+from pathlib import PurePosixPath
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Client, Document, Folder, User
+from app.models.client import client_access
+from app.services.access import FULL_ACCESS_ROLES, access_filter
+from app.services.folders import FolderNode, load_folder_tree, subtree_cte
+from app.utils.files import upload_key
+from app.utils.zipstream import ZipEntry, safe_name, unique_name
+
+
+def _document_name(name: str, file_url: str) -> str:
+    """The document's name, with the file's extension if the name has none."""
+    name = safe_name(name)
+    if not PurePosixPath(name).suffix:
+        name += PurePosixPath(file_url).suffix
+    return name
+
+
+def _entries(rows: Iterable, paths: dict[Optional[UUID], str], used: set[str]) -> list[ZipEntry]:
+    """rows of (name, file_url, file_size, created_at, folder_id), placed in the directory paths[folder_id]."""
+    entries = []
+    for name, file_url, file_size, created_at, folder_id in rows:
+        key = upload_key(file_url)
+        if key is None:
+            continue
+        directory = paths[folder_id]
+        name = _document_name(name, file_url)
+        entries.append(
+            ZipEntry(unique_name(f"{directory}/{name}" if directory else name, used), key, created_at, file_size)
+        )
+    return entries
+
+
+async def _folder_documents(db: AsyncSession, paths: dict[Optional[UUID], str], user: Optional[User] = None):
+    """Documents in the folders of paths; with user, only those of clients the user can access."""
+    query = (
+        select(Document.name, Document.file_url, Document.file_size, Document.created_at, Document.folder_id)
+        .where(Document.folder_id.in_([folder_id for folder_id in paths if folder_id]))
+        .order_by(Document.folder_id, Document.name, Document.id)
+    )
+    if user is not None and user.role not in FULL_ACCESS_ROLES:
+        query = query.where(
+            Document.client_id.is_(None) |
+            Document.client_id.in_(select(Client.id).where(access_filter(user, Client, client_access, "client_id")))
+        )
+    return (await db.execute(query)).all()
+
+
+async def folder_archive(db: AsyncSession, user: User, folder: Folder) -> list[ZipEntry]:
+    """The folder's documents and those of every subfolder the user can see, laid out as the folder tree."""
+    used: set[str] = set()
+    paths: dict[Optional[UUID], str] = {folder.id: unique_name(safe_name(folder.name), used)}
+
+    def add(nodes: list[FolderNode], parent_path: str):
+        for node in nodes:
+            paths[node.id] = unique_name(f"{parent_path}/{safe_name(node.name)}", used)
+            add(node.children, paths[node.id])
+
+    add(await load_folder_tree(db, user, folder.id), paths[folder.id])
+    return _entries(await _folder_documents(db, paths, user), paths, used)
+
+
+async def attachment_archive(db: AsyncSession, documents: list[Document], folders: list[Folder]) -> list[ZipEntry]:
+    """
+    Attached documents at the top level and attached folders as directories
+    with their whole subtree. Attachments are visible to everyone who can
+    see the record, so folder and client access rules don't apply.
+    """
+    used: set[str] = set()
+    paths: dict[Optional[UUID], str] = {None: ""}
+    entries = _entries(
+        ((d.name, d.file_url, d.file_size, d.created_at, None) for d in sorted(documents, key=lambda d: d.name)), paths, used
+    )
+
+    for folder in sorted(folders, key=lambda f: f.name):
+        paths[folder.id] = unique_name(safe_name(folder.name), used)
+        tree = subtree_cte(folder.company_id, folder.id)
+        result = await db.execute(
+            select(tree.c.id, tree.c.parent_id, Folder.name)
+            .join(Folder, Folder.id == tree.c.id)
+            .order_by(tree.c.depth, Folder.name)
+        )
+        for folder_id, parent_id, name in result.all():
+            if folder_id not in paths and parent_id in paths:
+                paths[folder_id] = unique_name(f"{paths[parent_id]}/{safe_name(name)}", used)
+
+    if len(paths) > 1:
+        entries += _entries(await _folder_documents(db, paths), paths, used)
+    return entries
@@ -0,0 +1,334 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, event, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models import User, RevokedToken, UserTokenCutoff, RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel used to propagate revocations and user changes to every worker
+INVALIDATION_CHANNEL = "auth_invalidation"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocationCache:
+    """
+    In-memory view of the revocation store.
+
+    Revoked jtis are kept only in a Bloom filter; a hit is confirmed against
+    the database (and the answer remembered), so the common case of a
+    non-revoked token never touches the database. Per-user cutoffs are few
+    (one per blocked user) and are kept exactly.
+    """
+
+    def __init__(self, capacity: int = 100_000, confirmed_size: int = 10_000):
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._cutoffs: dict[str, int] = {}
+        self._confirmed: "OrderedDict[str, bool]" = OrderedDict()
+        self._confirmed_size = confirmed_size
+
+    def add_revoked(self, jti: str):
+        self._bloom.add(jti)
+        self.remember(jti, True)
+
+    def set_cutoff(self, user_id: str, timestamp: int):
+        self._cutoffs[user_id] = max(timestamp, self._cutoffs.get(user_id, 0))
+
+    def get_cutoff(self, user_id: str) -> Optional[int]:
+        return self._cutoffs.get(user_id)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self._bloom
+
+    def confirmed(self, jti: str) -> Optional[bool]:
+        return self._confirmed.get(jti)
+
+    def remember(self, jti: str, revoked: bool):
+        self._confirmed[jti] = revoked
+        self._confirmed.move_to_end(jti)
+        while len(self._confirmed) > self._confirmed_size:
+            self._confirmed.popitem(last=False)
+
+    def replace(self, jtis: list[str], cutoffs: dict[str, int]):
+        """Rebuild from a full snapshot of the store (drops expired entries)."""
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._cutoffs = dict(cutoffs)
+        self._confirmed.clear()
+
+
+class UserCache:
+    """Short-lived per-process cache of user rows used by get_current_user."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, values = entry
+        if expires < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return values
+
+    def set(self, user: User):
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        self._entries[str(user.id)] = (time.monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(str(user.id))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+revocation_cache = TokenRevocationCache(capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY)
+user_cache = UserCache(ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
+
+def _handle_invalidation(payload: str):
+    kind, _, rest = payload.partition(":")
+    if kind == "jti":
+        revocation_cache.add_revoked(rest)
+    elif kind == "cutoff":
+        user_id, _, timestamp = rest.partition(":")
+        revocation_cache.set_cutoff(user_id, int(timestamp))
+        user_cache.invalidate(user_id)
+    elif kind == "user":
+        user_cache.invalidate(rest)
+
+
+async def _notify(db: AsyncSession, payload: str):
+    """Queue a notification; Postgres delivers it to all workers on commit."""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": INVALIDATION_CHANNEL, "payload": payload}
+    )
+
+
+async def revoke_token(db: AsyncSession, payload: dict):
+    """Revoke a single access token by its jti (caller commits)."""
+    jti = payload.get("jti")
+    if not jti:
+        return
+    user_id = payload.get("sub")
+    stmt = insert(RevokedToken).values(
+        jti=jti,
+        user_id=UUID(user_id) if user_id else None,
+        expires_at=datetime.utcfromtimestamp(payload.get("exp", time.time()))
+    ).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+    await db.execute(stmt)
+    await _notify(db, f"jti:{jti}")
+    revocation_cache.add_revoked(jti)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: UUID):
+    """Reject every token issued to a user up to now (caller commits)."""
+    now = datetime.utcnow().replace(microsecond=0)
+    stmt = insert(UserTokenCutoff).values(user_id=user_id, tokens_valid_after=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserTokenCutoff.user_id],
+        set_={"tokens_valid_after": now, "updated_at": datetime.utcnow()}
+    )
+    await db.execute(stmt)
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    timestamp = int((now - datetime(1970, 1, 1)).total_seconds())
+    await _notify(db, f"cutoff:{user_id}:{timestamp}")
+    revocation_cache.set_cutoff(str(user_id), timestamp)
+    user_cache.invalidate(str(user_id))
+
+
+def is_cut_off(payload: dict) -> bool:
+    """Whether the token predates its user's latest tokens_valid_after."""
+    cutoff = revocation_cache.get_cutoff(payload.get("sub", ""))
+    if cutoff is None:
+        return False
+    # Tokens carry the cutoff in force when they were issued ("bep")
+    epoch = payload.get("bep")
+    if epoch is not None:
+        return epoch < cutoff
+    iat = payload.get("iat")
+    return iat is None or iat <= cutoff
+
+
+async def is_jti_revoked(db: AsyncSession, payload: dict) -> bool:
+    """Whether the token was revoked individually. Touches the DB only on a Bloom hit."""
+    jti = payload.get("jti")
+    if not jti or not revocation_cache.might_be_revoked(jti):
+        return False
+    known = revocation_cache.confirmed(jti)
+    if known is not None:
+        return known
+    result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+    revoked = result.scalar_one_or_none() is not None
+    revocation_cache.remember(jti, revoked)
+    return revoked
+
+
+async def get_cached_user(db: AsyncSession, user_id: UUID) -> Optional[User]:
+    """Get a user attached to db, from the cache when possible."""
+    values = user_cache.get(str(user_id))
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is not None:
+        user_cache.set(user)
+    return user
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_users(session: Session, flush_context):
+    """Drop cached copies of users changed in this flush, in every worker."""
+    for obj in chain(session.dirty, session.deleted):
+        if not isinstance(obj, User) or obj.id is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        user_cache.invalidate(str(obj.id))
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": INVALIDATION_CHANNEL, "payload": f"user:{obj.id}"}
+            )
+
+
+async def sync_revocations(session_maker=None):
+    """Reload the revocation cache from the database and purge expired revocations and refresh tokens."""
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    async with session_maker() as session:
+        now = datetime.utcnow()
+        await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await session.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+        await session.commit()
+
+        jtis = (await session.execute(select(RevokedToken.jti))).scalars().all()
+        rows = (await session.execute(
+            select(UserTokenCutoff.user_id, UserTokenCutoff.tokens_valid_after)
+        )).all()
+
+    epoch = datetime(1970, 1, 1)
+    revocation_cache.replace(
+        list(jtis),
+        {str(user_id): int((valid_after - epoch).total_seconds()) for user_id, valid_after in rows}
+    )
+
+
+class AuthInvalidationListener:
+    """LISTENs on a dedicated connection and applies invalidations from other workers."""
+
+    def __init__(self):
+        self._conn = None
+
+    async def start(self):
+        import asyncpg
+
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        self._conn = await asyncpg.connect(dsn.render_as_string(hide_password=False))
+        await self._conn.add_listener(INVALIDATION_CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            _handle_invalidation(payload)
+        except Exception as e:
+            logger.error(f"Bad auth invalidation payload {payload!r}: {e}")
+
+    async def stop(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+_listener: Optional[AuthInvalidationListener] = None
+_sync_task: Optional[asyncio.Task] = None
+
+
+async def _sync_loop():
+    while True:
+        await asyncio.sleep(settings.AUTH_CACHE_SYNC_SECONDS)
+        try:
+            await sync_revocations()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Token revocation sync failed: {e}")
+
+
+async def start_auth_cache():
+    """Load revocations and subscribe to invalidations (called from the app lifespan)."""
+    global _listener, _sync_task
+    await sync_revocations()
+    try:
+        _listener = AuthInvalidationListener()
+        await _listener.start()
+    except Exception as e:
+        # Periodic sync and the user cache TTL still bound staleness
+        logger.error(f"Auth invalidation listener failed to start: {e}")
+        _listener = None
+    _sync_task = asyncio.create_task(_sync_loop())
+
+
+async def stop_auth_cache():
+    global _listener, _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import User, Company, RefreshToken, UserTokenCutoff
+from app.utils.security import create_access_token, generate_refresh_token, hash_refresh_token
+
+# A rotated token presented again within this window is treated as a
+# concurrent refresh (e.g. two tabs), not as theft.
+REFRESH_REUSE_GRACE_SECONDS = 10
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+async def _get_block_epoch(db: AsyncSession, user_id: UUID) -> int:
+    """The user's current token cutoff as a unix timestamp (0 if never blocked)."""
+    result = await db.execute(
+        select(UserTokenCutoff.tokens_valid_after).where(UserTokenCutoff.user_id == user_id)
+    )
+    valid_after = result.scalar_one_or_none()
+    if valid_after is None:
+        return 0
+    return int((valid_after - _EPOCH).total_seconds())
+
+
+async def issue_tokens(
+    db: AsyncSession,
+    user: User,
+    family_id: Optional[UUID] = None
+) -> tuple[str, str]:
+    """
+    Issue an access token and a new refresh token for user (caller commits).
+    Returns: (access_token, refresh_token)
+    """
+    family_id = family_id or uuid.uuid4()
+
+    # Role, company and blocked-epoch claims let get_current_user reject
+    # blocked users and revoked sessions without loading the user row.
+    claims = {
+        "sub": str(user.id),
+        "role": user.role.value,
+        "company_id": str(user.company_id) if user.company_id else None,
+        "bep": await _get_block_epoch(db, user.id),
+        "fam": str(family_id),
+    }
+    access_token = create_access_token(claims)
+
+    refresh_token = generate_refresh_token()
+    db.add(RefreshToken(
+        user_id=user.id,
+        family_id=family_id,
+        token_hash=hash_refresh_token(refresh_token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    await db.flush()
+
+    return access_token, refresh_token
+
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str) -> tuple[User, str, str]:
+    """
+    Exchange a refresh token for a new token pair (caller commits).
+    Returns: (user, access_token, refresh_token)
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Неверный или истекший токен обновления",
+    )
+    now = datetime.utcnow()
+
+    # Row lock serialises concurrent refreshes with the same token
+    result = await db.execute(
+        select(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        .with_for_update()
+    )
+    stored = result.scalar_one_or_none()
+    if stored is None or stored.expires_at <= now:
+        raise invalid
+
+    if stored.rotated_at is not None:
+        if now - stored.rotated_at > timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS):
+            # An already rotated token was replayed: assume it was stolen and
+            # end the whole session it belongs to.
+            await revoke_refresh_family(db, stored.family_id)
+            await db.commit()
+        raise invalid
+
+    stored.rotated_at = now
+
+    result = await db.execute(select(User).where(User.id == stored.user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise invalid
+    if user.is_blocked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Вы были заблокированы. Свяжитесь с директором фирмы."
+        )
+    if user.company_id:
+        result = await db.execute(select(Company.is_blocked).where(Company.id == user.company_id))
+        if result.scalar_one_or_none():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Ваша компания заблокирована."
+            )
+
+    access_token, new_refresh_token = await issue_tokens(db, user, family_id=stored.family_id)
+    return user, access_token, new_refresh_token
+
+
+async def revoke_refresh_family(db: AsyncSession, family_id: UUID):
+    """Delete every refresh token of a session (caller commits)."""
+    await db.execute(delete(RefreshToken).where(RefreshToken.family_id == family_id))
+
@@ -0,0 +1,75 @@
+"""
+User avatars. An upload is center-cropped to squares of AVATAR_SIZES and
+re-encoded as WebP (dropping EXIF and other metadata) in the image worker
+pool. Files are named <sha256 of the upload>-<size>.webp, so they never
+change and are served with a long immutable Cache-Control; identical
+uploads share them. A replaced avatar's files are removed once no user
+refers to them any more.
+"""
+import asyncio
+import hashlib
+import re
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import User
+from app.utils.files import delete_files, upload_key
+from app.utils.images import render_avatar, run_in_image_pool
+from app.utils.storage import get_storage, scratch_dir
+
+AVATAR_DIR = "avatars"
+_AVATAR_URL = re.compile(r"^/uploads/avatars/(?P<hash>[0-9a-f]{64})-\d+\.webp$")
+
+
+def avatar_url(content_hash: str, size: int) -> str:
+    return f"/uploads/{AVATAR_DIR}/{content_hash}-{size}.webp"
+
+
+def avatar_urls(url: Optional[str]) -> dict[int, str]:
+    """Every size of a processed avatar by its avatar_url; empty for avatars uploaded before processing."""
+    match = _AVATAR_URL.match(url or "")
+    if not match:
+        return {}
+    return {size: avatar_url(match["hash"], size) for size in settings.AVATAR_SIZES}
+
+
+async def save_avatar(data: bytes) -> str:
+    """Process an uploaded image into avatar files; returns the avatar_url (largest size)."""
+    sizes = settings.AVATAR_SIZES
+    storage = get_storage()
+    content_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+    keys = {size: upload_key(avatar_url(content_hash, size)) for size in sizes}
+    # Someone uploaded the same image before
+    if all([await storage.exists(key) for key in keys.values()]):
+        return avatar_url(content_hash, sizes[-1])
+
+    with scratch_dir() as directory:
+        await run_in_image_pool(render_avatar, data, directory, sizes)
+        for size, key in keys.items():
+            await storage.save_file(key, Path(directory) / f"{content_hash}-{size}.webp", "image/webp")
+    return avatar_url(content_hash, sizes[-1])
+
+
+async def avatar_usage(url: Optional[str]) -> tuple[int, int]:
+    """
+    Storage an avatar takes, every size included.
+    Returns: (bytes, files)
+    """
+    storage = get_storage()
+    keys = [key for key in map(upload_key, list(avatar_urls(url).values()) or [url or ""]) if key]
+    sizes = [size for size in [await storage.size(key) for key in keys] if size is not None]
+    return sum(sizes), len(sizes)
+
+
+async def remove_unused_avatar(db: AsyncSession, url: Optional[str]) -> int:
+    """Delete an avatar's files unless some user still has it; returns the number of files removed."""
+    if not url:
+        return 0
+    if await db.scalar(select(exists().where(User.avatar_url == url))):
+        return 0
+    deleted, _ = await delete_files(list(avatar_urls(url).values()) or [url])
+    return deleted
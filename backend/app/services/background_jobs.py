@@ -0,0 +1,123 @@
+"""
+Jobs recorded in a table and run in the background of a worker process.
+
+A job's row doubles as its claim. While a worker runs the job, the worker
+bumps the row's updated_at every third of the stale period. An unfinished
+row left idle for longer than that was interrupted (the worker crashed or
+was restarted), and the next worker whose reclaim loop sees it runs it
+again. Claiming bumps updated_at in the same UPDATE, so with several
+workers each job is claimed once. On shutdown a worker backdates the rows
+of the jobs it was running, so they are picked up as soon as a worker starts.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import update
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobs:
+    """
+    Background runner of one kind of job.
+
+    model has an updated_at column; key is its column identifying a job and
+    is passed to run; unfinished selects the rows of jobs not done yet;
+    stale_seconds returns the idle time after which a job is taken over;
+    interrupted_values are set on the rows of jobs cancelled by shutdown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        key,
+        unfinished,
+        run: Callable[..., Awaitable[None]],
+        stale_seconds: Callable[[], int],
+        interrupted_values: Optional[dict] = None,
+    ):
+        self.name = name
+        self.model = model
+        self.key = key
+        self.unfinished = unfinished
+        self.run = run
+        self.stale_seconds = stale_seconds
+        self.interrupted_values = interrupted_values or {}
+        # Jobs running in this process, kept so they aren't garbage collected mid-run
+        self._running: dict[Any, asyncio.Task] = {}
+
+    def start(self, job_key, session_maker=None) -> asyncio.Task:
+        """Run a job in the background of this process, unless it already runs here."""
+        task = self._running.get(job_key)
+        if task is not None:
+            return task
+        task = asyncio.create_task(self.run(job_key, session_maker))
+        self._running[job_key] = task
+        task.add_done_callback(lambda _: self._running.pop(job_key, None))
+        return task
+
+    async def reclaim(self, session_maker=None) -> int:
+        """Keep this process's jobs claimed and start the stale ones. Returns the number started."""
+        if session_maker is None:
+            from app.database import async_session_maker
+            session_maker = async_session_maker
+
+        now = datetime.utcnow()
+        async with session_maker() as db:
+            if self._running:
+                await db.execute(
+                    update(self.model)
+                    .where(self.key.in_(list(self._running)), self.unfinished)
+                    .values(updated_at=now)
+                )
+            result = await db.execute(
+                update(self.model)
+                .where(self.unfinished, self.model.updated_at < now - timedelta(seconds=self.stale_seconds()))
+                .values(updated_at=now)
+                .returning(self.key)
+            )
+            job_keys = list(result.scalars().all())
+            await db.commit()
+        for job_key in job_keys:
+            self.start(job_key, session_maker)
+        return len(job_keys)
+
+    async def reclaim_loop(self):
+        """Reclaim on startup and then every third of the stale period."""
+        while True:
+            try:
+                started = await self.reclaim()
+                if started:
+                    logger.info(f"Resumed {started} {self.name}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to resume {self.name}: {e}")
+            await asyncio.sleep(max(1, self.stale_seconds() // 3))
+
+    async def stop(self, session_maker=None):
+        """Cancel the jobs running in this process and leave them to be resumed at once (called on shutdown)."""
+        tasks = dict(self._running)
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        if not tasks:
+            return
+
+        if session_maker is None:
+            from app.database import async_session_maker
+            session_maker = async_session_maker
+        idle_since = datetime.utcnow() - timedelta(seconds=self.stale_seconds() + 1)
+        try:
+            async with session_maker() as db:
+                await db.execute(
+                    update(self.model)
+                    .where(self.key.in_(list(tasks)), self.unfinished)
+                    .values(updated_at=idle_since, **self.interrupted_values)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release interrupted {self.name}: {e}")
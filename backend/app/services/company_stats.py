@@ -0,0 +1,151 @@
+"""
+Dashboard counters (company_stats): reads, and recomputing them from scratch.
+
+The table is kept up to date by a flush hook (app.models.events), so
+rows written outside the ORM (bulk loads, manual SQL) need a rebuild.
+
+Usage (from backend/):
+    python -m app.services.company_stats verify
+    python -m app.services.company_stats rebuild
+"""
+import argparse
+import asyncio
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import String, cast, delete, func, insert, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models import Task, Certificate, Declaration, CompanyStat
+from app.models.company_stats import COMPANY_TOTAL, NO_STATUS
+
+
+def _expected_counts():
+    """Counters computed from the source tables; mirrors app.models.events.stat_keys."""
+    total = literal(COMPANY_TOTAL, PG_UUID(as_uuid=True))
+    task_status = cast(Task.status, String)
+    certificate_status = cast(Certificate.status, String)
+    no_status = literal(NO_STATUS)
+
+    rows = union_all(
+        select(Task.target_company_id, total, literal("task"), task_status),
+        select(Task.created_by_company_id, total, literal("task"), task_status)
+        .where(Task.created_by_company_id != Task.target_company_id),
+        select(Task.target_company_id, Task.target_employee_id, literal("task"), task_status),
+        select(Certificate.company_id, total, literal("certificate"), certificate_status),
+        select(Certificate.certifier_company_id, total, literal("certificate"), certificate_status)
+        .where(Certificate.certifier_company_id.is_not(None))
+        .where(Certificate.certifier_company_id != Certificate.company_id),
+        select(Certificate.company_id, Certificate.owner_id, literal("certificate"), certificate_status),
+        select(Declaration.company_id, total, literal("declaration"), no_status),
+        select(Declaration.company_id, Declaration.owner_id, literal("declaration"), no_status),
+    ).subquery()
+    company_id, employee_id, entity, status = rows.c
+    return (
+        select(company_id, employee_id, entity, status, func.count())
+        .group_by(company_id, employee_id, entity, status)
+    )
+
+
+async def rebuild_company_stats(conn: AsyncConnection) -> int:
+    """Recompute every counter in the caller's transaction. Returns the number of counters."""
+    # Blocks concurrent increments until the rebuild commits; the recount
+    # below then sees every transaction that incremented before it
+    await conn.execute(text("LOCK TABLE company_stats IN EXCLUSIVE MODE"))
+    await conn.execute(delete(CompanyStat))
+    result = await conn.execute(
+        insert(CompanyStat).from_select(
+            ["company_id", "employee_id", "entity", "status", "count"], _expected_counts()
+        )
+    )
+    return result.rowcount
+
+
+async def verify_company_stats(conn: AsyncConnection) -> list[tuple]:
+    """Counters that differ from a recount: (company, employee, entity, status, stored, expected)."""
+    expected = {tuple(row[:4]): row[4] for row in (await conn.execute(_expected_counts())).all()}
+    stored = {
+        tuple(row[:4]): row[4]
+        for row in (await conn.execute(
+            select(
+                CompanyStat.company_id, CompanyStat.employee_id, CompanyStat.entity,
+                CompanyStat.status, CompanyStat.count
+            ).where(CompanyStat.count != 0)
+        )).all()
+    }
+    return sorted(
+        (*key, stored.get(key, 0), expected.get(key, 0))
+        for key in expected.keys() | stored.keys()
+        if stored.get(key, 0) != expected.get(key, 0)
+    )
+
+
+async def ensure_company_stats(conn: AsyncConnection) -> bool:
+    """Build the counters if the table is empty but there is data (first start). Returns True if built."""
+    if await conn.scalar(select(CompanyStat.company_id).limit(1)) is not None:
+        return False
+    has_data = await conn.scalar(select(
+        select(Task.id).exists() | select(Certificate.id).exists() | select(Declaration.id).exists()
+    ))
+    if not has_data:
+        return False
+    await rebuild_company_stats(conn)
+    return True
+
+
+async def get_counts(
+    db: AsyncSession,
+    company_id: UUID,
+    employee_ids: Iterable[UUID] = ()
+) -> tuple[dict, dict]:
+    """
+    Company-wide counters and those of the given employees, in one query.
+    Returns ({(entity, status): count}, {employee_id: {(entity, status): count}}).
+    """
+    employee_ids = list(employee_ids)
+    scope = (CompanyStat.company_id == company_id) & (CompanyStat.employee_id == COMPANY_TOTAL)
+    if employee_ids:
+        scope = scope | CompanyStat.employee_id.in_(employee_ids)
+    result = await db.execute(
+        select(
+            CompanyStat.employee_id, CompanyStat.entity, CompanyStat.status, func.sum(CompanyStat.count)
+        )
+        .where(scope)
+        .group_by(CompanyStat.employee_id, CompanyStat.entity, CompanyStat.status)
+    )
+    company_counts: dict = {}
+    employee_counts: dict = {}
+    for employee_id, entity, status, count in result.all():
+        if employee_id == COMPANY_TOTAL:
+            company_counts[(entity, status)] = int(count)
+        else:
+            employee_counts.setdefault(employee_id, {})[(entity, status)] = int(count)
+    return company_counts, employee_counts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    from app.database import engine
+
+    try:
+        async with engine.begin() as conn:
+            if args.command == "rebuild":
+                counters = await rebuild_company_stats(conn)
+                print(f"Rebuilt {counters} counters")
+                return
+            mismatches = await verify_company_stats(conn)
+    finally:
+        await engine.dispose()
+
+    for company_id, employee_id, entity, status, stored, expected in mismatches:
+        print(f"{company_id} {employee_id} {entity}:{status or '-'} stored={stored} expected={expected}")
+    print(f"{len(mismatches)} mismatched counters")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""
+Deadline reminders for tasks and certificates.
+
+A periodic sweep notifies assignees of open items whose deadline is near
+("due soon") and assignees and creators of items that just became
+overdue. Each recipient gets one notification (and Telegram message) per
+kind listing the items. Runs in one worker at a time under an advisory
+lock; the job_watermarks row records how far the last sweep got, so each
+sweep only looks at deadlines (and new items) it hasn't seen.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Certificate, JobWatermark, Task, User
+from app.services.notification import create_notification
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+DEADLINE_LOCK_KEY = 0x444C4E31
+JOB_NAME = "deadline_reminders"
+
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+
+# Same predicates as the partial deadline indexes, written out so the planner can match them
+_OPEN_TASK = text("status NOT IN ('COMPLETED', 'CANCELLED')")
+_OPEN_CERTIFICATE = text("status NOT IN ('COMPLETED', 'REJECTED')")
+
+_TITLES = {DUE_SOON: "Приближается срок", OVERDUE: "Срок истёк"}
+_NOTIFICATION_TYPES = {DUE_SOON: "warning", OVERDUE: "error"}
+_LINKS = {"task": "/tasks", "certificate": "/certificates"}
+
+
+@dataclass(frozen=True)
+class SweepWindows:
+    """Deadline ranges a sweep on `today` covers."""
+    overdue_from: date  # deadline in [overdue_from, today) became overdue since the last sweep
+    due_soon_after: date  # deadline in (due_soon_after, horizon] came within reach since the last sweep
+    horizon: date
+    created_since: Optional[datetime]  # items created since then are due-soon candidates up to horizon
+
+
+@dataclass(frozen=True)
+class Reminder:
+    user_id: UUID
+    kind: str
+    entity: str
+    label: str
+    deadline: date
+
+
+def sweep_windows(today: date, reminder_days: int, watermark: Optional[JobWatermark]) -> SweepWindows:
+    """Windows for this sweep; the first sweep covers yesterday's overdue items and everything due soon."""
+    horizon = today + timedelta(days=reminder_days)
+    if watermark is None:
+        yesterday = today - timedelta(days=1)
+        return SweepWindows(overdue_from=yesterday, due_soon_after=yesterday, horizon=horizon, created_since=None)
+    return SweepWindows(
+        overdue_from=watermark.last_run_date,
+        due_soon_after=watermark.last_run_date + timedelta(days=reminder_days),
+        horizon=horizon,
+        created_since=watermark.last_run_at,
+    )
+
+
+def format_reminder(kind: str, reminders: list[Reminder], max_items: int) -> tuple[str, str, str]:
+    """Title, message and link of one batched reminder."""
+    lines = [f"{r.label} — срок {r.deadline.strftime('%d.%m.%Y')}" for r in reminders[:max_items]]
+    if len(reminders) > max_items:
+        lines.append(f"и ещё {len(reminders) - max_items}")
+    entities = {r.entity for r in reminders}
+    link = _LINKS[entities.pop()] if len(entities) == 1 else "/dashboard"
+    return _TITLES[kind], "\n".join(lines), link
+
+
+async def _find_reminders(db: AsyncSession, today: date, windows: SweepWindows) -> list[Reminder]:
+    reminders: list[Reminder] = []
+
+    def due_soon(deadline_column, created_column):
+        new_in_window = deadline_column > windows.due_soon_after
+        if windows.created_since is not None:
+            new_in_window = or_(new_in_window, created_column >= windows.created_since)
+        return (deadline_column >= today) & (deadline_column <= windows.horizon) & new_in_window
+
+    def overdue(deadline_column):
+        return (deadline_column >= windows.overdue_from) & (deadline_column < today)
+
+    task_columns = (Task.name, Task.deadline, Task.target_employee_id, Task.created_by_user_id)
+    for kind, condition in (
+        (DUE_SOON, due_soon(Task.deadline, Task.created_at)),
+        (OVERDUE, overdue(Task.deadline)),
+    ):
+        result = await db.execute(select(*task_columns).where(_OPEN_TASK, condition))
+        for name, deadline, assignee_id, creator_id in result.all():
+            recipients = {assignee_id, creator_id} if kind == OVERDUE else {assignee_id}
+            reminders.extend(
+                Reminder(user_id, kind, "task", f"Задача «{name}»", deadline) for user_id in recipients
+            )
+
+    certificate_columns = (
+        Certificate.type, Certificate.number, Certificate.deadline, Certificate.assigned_to_id, Certificate.owner_id
+    )
+    for kind, condition in (
+        (DUE_SOON, due_soon(Certificate.deadline, Certificate.created_at)),
+        (OVERDUE, overdue(Certificate.deadline)),
+    ):
+        result = await db.execute(select(*certificate_columns).where(_OPEN_CERTIFICATE, condition))
+        for cert_type, number, deadline, assignee_id, owner_id in result.all():
+            assignee_id = assignee_id or owner_id
+            recipients = {assignee_id, owner_id} if kind == OVERDUE else {assignee_id}
+            label = f"Сертификат «{cert_type}»" + (f" № {number}" if number else "")
+            reminders.extend(
+                Reminder(user_id, kind, "certificate", label, deadline) for user_id in recipients
+            )
+
+    return reminders
+
+
+async def run_deadline_sweep(session_maker=None, today: Optional[date] = None) -> Optional[int]:
+    """
+    Notify about new due-soon and overdue items.
+    Returns the number of notifications created, or None if another worker holds the lock.
+    """
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+    today = today or date.today()
+    now = datetime.utcnow()
+
+    async with session_maker() as db:
+        # Released on commit/rollback; a worker that doesn't get it skips this round
+        locked = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": DEADLINE_LOCK_KEY})
+        if not locked:
+            await db.rollback()
+            return None
+
+        watermark = await db.get(JobWatermark, JOB_NAME)
+        windows = sweep_windows(today, settings.DEADLINE_REMINDER_DAYS, watermark)
+        reminders = await _find_reminders(db, today, windows)
+
+        batches: dict[tuple[UUID, str], list[Reminder]] = {}
+        for reminder in sorted(reminders, key=lambda r: (r.deadline, r.label)):
+            batches.setdefault((reminder.user_id, reminder.kind), []).append(reminder)
+
+        messages = []
+        for (user_id, kind), items in batches.items():
+            title, message, link = format_reminder(kind, items, settings.DEADLINE_REMINDER_MAX_ITEMS)
+            await create_notification(
+                db, user_id, title, message, notification_type=_NOTIFICATION_TYPES[kind], link=link
+            )
+            messages.append((user_id, title, message))
+
+        if watermark is None:
+            watermark = JobWatermark(name=JOB_NAME, last_run_at=now, last_run_date=today)
+            db.add(watermark)
+        else:
+            watermark.last_run_at = now
+            watermark.last_run_date = today
+
+        chat_ids = {}
+        if messages:
+            result = await db.execute(
+                select(User.id, User.telegram_chat_id).where(
+                    User.id.in_({user_id for user_id, _, _ in messages}),
+                    User.telegram_chat_id.is_not(None),
+                    User.is_blocked == False
+                )
+            )
+            chat_ids = dict(result.all())
+        await db.commit()
+
+    # Sent only once the notifications are committed
+    await _send_telegram([(chat_ids[u], t, m) for u, t, m in messages if u in chat_ids])
+    return len(messages)
+
+
+async def _send_telegram(messages: list[tuple[str, str, str]]):
+    from app.services.telegram import get_telegram_service
+
+    service = get_telegram_service()
+    if service is None or not messages:
+        return
+    results = await asyncio.gather(
+        *(service.send_message(chat_id, f"{title}\n\n{message}", parse_mode=None) for chat_id, title, message in messages),
+        return_exceptions=True
+    )
+    failed = sum(isinstance(r, Exception) for r in results)
+    if failed:
+        logger.warning(f"Deadline reminders: {failed} of {len(messages)} Telegram messages failed")
+
+
+async def deadline_reminder_loop():
+    """Periodically send deadline reminders."""
+    while True:
+        await asyncio.sleep(settings.DEADLINE_CHECK_INTERVAL_SECONDS)
+        try:
+            sent = await run_deadline_sweep()
+            if sent:
+                logger.info(f"Deadline reminders: {sent} notifications")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Deadline reminder sweep failed: {e}")
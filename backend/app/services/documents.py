@@ -0,0 +1,49 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Document, DocumentPreview, PreviewStatus, User
+from app.services.previews import document_previews, new_preview
+from app.services.storage_usage import check_storage_quota
+
+
+async def create_document(
+    db: AsyncSession,
+    user: User,
+    name: str,
+    file_url: str,
+    file_type: str,
+    file_size: int,
+    folder_id: Optional[UUID] = None,
+    client_id: Optional[UUID] = None
+) -> tuple[Document, Optional[DocumentPreview]]:
+    """
+    Add the row of a stored file, with its preview row. The caller commits,
+    then calls start_document_jobs. Raises 413 if the file takes the
+    company over its storage quota; the caller removes the file then.
+    """
+    document = Document(
+        name=name,
+        file_url=file_url,
+        file_type=file_type,
+        file_size=file_size,
+        folder_id=folder_id,
+        client_id=client_id,
+        owner_id=user.id,
+        company_id=user.company_id
+    )
+    db.add(document)
+    await db.flush()
+    # The flush counted the file, locking the company's counter until commit
+    await check_storage_quota(db, user.company_id)
+    preview = new_preview(document)
+    if preview is not None:
+        db.add(preview)
+    return document, preview
+
+
+def start_document_jobs(document: Document, preview: Optional[DocumentPreview]):
+    """Background work for a committed new document."""
+    if preview is not None and preview.status == PreviewStatus.PENDING:
+        document_previews.start(document.id)
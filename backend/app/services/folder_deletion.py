@@ -0,0 +1,189 @@
+"""
+Background deletion of a folder subtree.
+
+The DELETE request only records a FolderDeletion job and starts it in the
+background. The job walks the subtree with a recursive CTE and deletes
+documents (and the rows attaching them to certificates, declarations and
+tasks) in batches of FOLDER_DELETE_BATCH_SIZE, one transaction each.
+After each commit it removes that batch's files in worker threads. The
+folders go last, in one locked transaction. Progress counters are stored
+on the job row. Jobs are idempotent: an interrupted job (worker restart)
+is picked up again by app.services.background_jobs.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import (
+    Certificate, CertificateAction, Declaration, Document, Folder, FolderDeletion,
+    FolderDeletionStatus, Task
+)
+from app.models.certificate import (
+    certificate_action_files, certificate_documents, certificate_folders, certificate_payment_files
+)
+from app.models.declaration import declaration_documents, declaration_folders
+from app.models.events import add_usage, storage_keys, storage_usage_upsert
+from app.models.document import folder_access
+from app.models.task import task_documents
+from app.services.background_jobs import BackgroundJobs
+from app.services.folders import subtree_cte
+from app.utils.files import delete_files
+
+logger = logging.getLogger(__name__)
+
+# Rows attaching documents or folders to other records: (table, key column, owner table, owner column).
+# Owners get updated_at bumped so their ETags and /sync pick up the removed attachment.
+_DOCUMENT_LINKS = [
+    (certificate_documents, certificate_documents.c.document_id, Certificate, certificate_documents.c.certificate_id),
+    (certificate_payment_files, certificate_payment_files.c.document_id, Certificate,
+     certificate_payment_files.c.certificate_id),
+    (declaration_documents, declaration_documents.c.document_id, Declaration, declaration_documents.c.declaration_id),
+    (task_documents, task_documents.c.document_id, Task, task_documents.c.task_id),
+]
+_FOLDER_LINKS = [
+    (certificate_folders, certificate_folders.c.folder_id, Certificate, certificate_folders.c.certificate_id),
+    (declaration_folders, declaration_folders.c.folder_id, Declaration, declaration_folders.c.declaration_id),
+    (folder_access, folder_access.c.folder_id, None, None),
+]
+
+
+def _subtree_ids(company_id: UUID, folder_id: UUID):
+    """The folder and every folder below it."""
+    tree = subtree_cte(company_id, folder_id, include_deleting=True)
+    return union_all(select(literal(folder_id, Folder.id.type)), select(tree.c.id))
+
+
+async def _unlink(db: AsyncSession, links: list, ids: list[UUID], now: datetime):
+    for table, key, owner, owner_column in links:
+        result = await db.execute(delete(table).where(key.in_(ids)).returning(owner_column if owner is not None else key))
+        owner_ids = set(result.scalars().all())
+        if owner is not None and owner_ids:
+            await db.execute(update(owner).where(owner.id.in_(owner_ids)).values(updated_at=now))
+
+
+async def _delete_documents(db: AsyncSession, folder_ids, limit: Optional[int]) -> list[str]:
+    """Delete (up to limit) documents in the given folders with their attachment rows; returns their file URLs."""
+    query = select(
+        Document.id, Document.file_url, Document.company_id, Document.folder_id, Document.client_id, Document.file_size
+    ).where(Document.folder_id.in_(folder_ids))
+    if limit is not None:
+        query = query.limit(limit)
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return []
+    ids = [row.id for row in rows]
+    now = datetime.utcnow()
+
+    await _unlink(db, _DOCUMENT_LINKS, ids, now)
+    result = await db.execute(
+        delete(certificate_action_files)
+        .where(certificate_action_files.c.document_id.in_(ids))
+        .returning(certificate_action_files.c.action_id)
+    )
+    action_ids = set(result.scalars().all())
+    if action_ids:
+        await db.execute(
+            update(Certificate)
+            .where(Certificate.id.in_(select(CertificateAction.certificate_id).where(CertificateAction.id.in_(action_ids))))
+            .values(updated_at=now)
+        )
+
+    await db.execute(delete(Document).where(Document.id.in_(ids)))
+    # Bulk deletes bypass the flush hook that keeps storage_usage
+    deltas: dict = {}
+    for row in rows:
+        add_usage(deltas, storage_keys(row._asdict()), -row.file_size, -1)
+    await db.execute(storage_usage_upsert(deltas))
+    return [row.file_url for row in rows]
+
+
+async def _record_progress(db: AsyncSession, job_id: UUID, **increments):
+    await db.execute(
+        update(FolderDeletion)
+        .where(FolderDeletion.id == job_id)
+        .values({name: getattr(FolderDeletion, name) + n for name, n in increments.items()})
+    )
+
+
+async def _remove_files(session_maker, job_id: UUID, file_urls: list[str]):
+    deleted, failed = await delete_files(file_urls, concurrency=settings.FOLDER_DELETE_FILE_CONCURRENCY)
+    if failed:
+        logger.warning(f"Folder deletion {job_id}: {failed} files could not be removed")
+    async with session_maker() as db:
+        await _record_progress(db, job_id, files_deleted=deleted, files_failed=failed)
+        await db.commit()
+
+
+async def run_folder_deletion(job_id: UUID, session_maker=None):
+    """Run (or resume) a folder deletion job to completion."""
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    async with session_maker() as db:
+        job = await db.get(FolderDeletion, job_id)
+        if job is None or job.finished_at is not None:
+            return
+        job.status = FolderDeletionStatus.RUNNING
+        company_id, folder_id = job.company_id, job.folder_id
+        await db.commit()
+
+    folder_ids = _subtree_ids(company_id, folder_id)
+    try:
+        while True:
+            async with session_maker() as db:
+                file_urls = await _delete_documents(db, folder_ids, settings.FOLDER_DELETE_BATCH_SIZE)
+                if not file_urls:
+                    break
+                await _record_progress(db, job_id, documents_deleted=len(file_urls))
+                await db.commit()
+            await _remove_files(session_maker, job_id, file_urls)
+
+        async with session_maker() as db:
+            # Locking the folders makes concurrent uploads into them wait, then fail
+            ids = list((await db.execute(
+                select(Folder.id).where(Folder.id.in_(folder_ids)).with_for_update()
+            )).scalars().all())
+            # Documents added since the last batch
+            file_urls = await _delete_documents(db, ids, None) if ids else []
+            if ids:
+                await _unlink(db, _FOLDER_LINKS, ids, datetime.utcnow())
+                await db.execute(delete(Folder).where(Folder.id.in_(ids)))
+            await _record_progress(db, job_id, documents_deleted=len(file_urls), folders_deleted=len(ids))
+            await db.execute(
+                update(FolderDeletion)
+                .where(FolderDeletion.id == job_id)
+                .values(status=FolderDeletionStatus.COMPLETED, finished_at=datetime.utcnow())
+            )
+            await db.commit()
+        if file_urls:
+            await _remove_files(session_maker, job_id, file_urls)
+    except asyncio.CancelledError:
+        # Shutdown; resumed by the next worker
+        raise
+    except Exception as e:
+        logger.error(f"Folder deletion {job_id} failed: {e}")
+        async with session_maker() as db:
+            await db.execute(
+                update(FolderDeletion)
+                .where(FolderDeletion.id == job_id)
+                .values(status=FolderDeletionStatus.FAILED, error=str(e)[:1000], finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+
+folder_deletions = BackgroundJobs(
+    "folder deletions",
+    FolderDeletion,
+    FolderDeletion.id,
+    FolderDeletion.finished_at.is_(None),
+    run_folder_deletion,
+    lambda: settings.FOLDER_DELETE_STALE_SECONDS,
+    interrupted_values={"status": FolderDeletionStatus.PENDING},
+)
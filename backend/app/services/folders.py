@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import AccessType, Document, Folder, FolderDeletion, User
+from app.models.document import folder_access
+from app.services.access import can_access
+
+# Guards the recursion against parent_id cycles
+MAX_FOLDER_DEPTH = 100
+
+
+def pending_deletions():
+    """Folders with an unfinished deletion job; hidden from listings."""
+    return select(FolderDeletion.folder_id).where(FolderDeletion.finished_at.is_(None))
+
+
+def subtree_cte(company_id: UUID, parent_id: Optional[UUID], include_deleting: bool = False):
+    """
+    Recursive CTE (id, parent_id, depth) of every folder below parent_id
+    (or below the company root); direct children have depth 1. Folders
+    being deleted are left out with their subtrees unless include_deleting.
+    """
+    top = Folder.parent_id == parent_id if parent_id else Folder.parent_id.is_(None)
+    anchor = select(Folder.id, Folder.parent_id, literal(1).label("depth")).where(Folder.company_id == company_id, top)
+    if not include_deleting:
+        anchor = anchor.where(Folder.id.not_in(pending_deletions()))
+    tree = anchor.cte("folder_tree", recursive=True)
+    step = (
+        select(Folder.id, Folder.parent_id, tree.c.depth + 1)
+        .join(tree, Folder.parent_id == tree.c.id)
+        .where(Folder.company_id == company_id, tree.c.depth < MAX_FOLDER_DEPTH)
+    )
+    if not include_deleting:
+        step = step.where(Folder.id.not_in(pending_deletions()))
+    return tree.union_all(step)
+
+
+@dataclass
+class FolderNode:
+    id: UUID
+    name: str
+    parent_id: Optional[UUID]
+    access_type: AccessType
+    owner_id: UUID
+    client_id: Optional[UUID]
+    depth: int
+    document_count: int  # documents directly in the folder
+    document_bytes: int
+    total_document_count: int = 0  # including every visible subfolder
+    total_bytes: int = 0
+    children: list["FolderNode"] = field(default_factory=list)
+
+    def to_dict(self, max_depth: int) -> dict:
+        expanded = self.depth < max_depth
+        return {
+            "id": self.id,
+            "name": self.name,
+            "parent_id": self.parent_id,
+            "access_type": self.access_type.value,
+            "owner_id": self.owner_id,
+            "client_id": self.client_id,
+            "depth": self.depth,
+            "document_count": self.document_count,
+            "total_document_count": self.total_document_count,
+            "total_bytes": self.total_bytes,
+            "has_children": bool(self.children),
+            "children": [c.to_dict(max_depth) for c in self.children] if expanded else [],
+        }
+
+
+def build_folder_tree(nodes: list[FolderNode], visible: set[UUID]) -> list[FolderNode]:
+    """
+    Link nodes (as loaded from subtree_cte) into a forest of visible folders
+    and roll document totals up from the leaves. A hidden folder hides its
+    whole subtree, and its documents are not counted in any total.
+    """
+    roots: list[FolderNode] = []
+    shown: dict[UUID, FolderNode] = {}
+    for node in sorted(nodes, key=lambda n: (n.depth, n.name.lower())):
+        if node.id not in visible or node.id in shown:
+            continue
+        if node.depth == 1:
+            roots.append(node)
+        elif node.parent_id in shown:
+            shown[node.parent_id].children.append(node)
+        else:
+            continue
+        shown[node.id] = node
+
+    # Deepest first, so every child is final before it is added to its parent
+    for node in reversed(list(shown.values())):
+        node.total_document_count += node.document_count
+        node.total_bytes += node.document_bytes
+        if node.depth > 1:
+            parent = shown[node.parent_id]
+            parent.total_document_count += node.total_document_count
+            parent.total_bytes += node.total_bytes
+    return roots
+
+
+async def load_folder_tree(db: AsyncSession, user: User, parent_id: Optional[UUID]) -> list[FolderNode]:
+    """
+    Every folder below parent_id the user can see, with document counts
+    and sizes, in one query.
+    """
+    tree = subtree_cte(user.company_id, parent_id)
+    has_access = exists().where(
+        folder_access.c.folder_id == Folder.id, folder_access.c.user_id == user.id
+    )
+    result = await db.execute(
+        select(
+            Folder.id, Folder.name, Folder.parent_id, Folder.access_type, Folder.owner_id,
+            Folder.client_id, tree.c.depth,
+            func.count(Document.id), func.coalesce(func.sum(Document.file_size), 0),
+            has_access,
+        )
+        .select_from(tree)
+        .join(Folder, Folder.id == tree.c.id)
+        .outerjoin(Document, Document.folder_id == tree.c.id)
+        .group_by(Folder.id, tree.c.depth)
+    )
+    nodes, visible = [], set()
+    for (folder_id, name, folder_parent_id, access_type, owner_id, client_id, depth,
+         document_count, document_bytes, user_has_access) in result.all():
+        nodes.append(FolderNode(
+            id=folder_id, name=name, parent_id=folder_parent_id, access_type=access_type,
+            owner_id=owner_id, client_id=client_id, depth=depth,
+            document_count=document_count, document_bytes=int(document_bytes),
+        ))
+        if can_access(user, access_type, owner_id, user_has_access):
+            visible.add(folder_id)
+    return build_folder_tree(nodes, visible)
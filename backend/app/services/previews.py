@@ -0,0 +1,104 @@
+"""
+Thumbnails and previews of uploaded documents.
+
+upload_document records a pending DocumentPreview and starts a background
+job. The job hashes the file and renders a thumbnail and a larger preview
+(first page of a PDF, or a downscaled image) as WebP in the worker
+process pool. Preview files are named by the content hash, so a duplicate
+upload finds them in storage and skips rendering. Pending previews
+interrupted by a restart are retried by app.services.background_jobs.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models import Document, DocumentPreview, PreviewStatus
+from app.services.background_jobs import BackgroundJobs
+from app.utils.files import upload_key
+from app.utils.previews import file_sha256, preview_file_url, preview_source_type, render_previews_async
+from app.utils.storage import get_storage, scratch_dir
+
+logger = logging.getLogger(__name__)
+
+
+def new_preview(document: Document) -> Optional[DocumentPreview]:
+    """Preview row for a just-flushed document; pending if previews can be rendered from its file."""
+    if not settings.PREVIEWS_ENABLED:
+        return None
+    supported = preview_source_type(document.file_type, document.file_url) is not None
+    return DocumentPreview(
+        document_id=document.id,
+        status=PreviewStatus.PENDING if supported else PreviewStatus.UNSUPPORTED
+    )
+
+
+async def _finish(session_maker, document_id: UUID, **values):
+    async with session_maker() as db:
+        await db.execute(
+            update(DocumentPreview).where(DocumentPreview.document_id == document_id).values(**values)
+        )
+        await db.commit()
+
+
+async def generate_preview(document_id: UUID, session_maker=None):
+    """Render (or reuse) a document's thumbnail and preview and record their URLs."""
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    async with session_maker() as db:
+        result = await db.execute(
+            select(Document.file_url, Document.file_type)
+            .join(DocumentPreview, DocumentPreview.document_id == Document.id)
+            .where(Document.id == document_id, DocumentPreview.status == PreviewStatus.PENDING)
+        )
+        row = result.first()
+    if row is None:
+        return
+
+    source_type = preview_source_type(row.file_type, row.file_url)
+    key = upload_key(row.file_url)
+    if source_type is None or key is None:
+        await _finish(session_maker, document_id, status=PreviewStatus.UNSUPPORTED)
+        return
+
+    storage = get_storage()
+    try:
+        async with storage.local_copy(key) as source:
+            content_hash = await asyncio.to_thread(file_sha256, source)
+            sizes = (settings.PREVIEW_THUMBNAIL_SIZE, settings.PREVIEW_SIZE)
+            urls = [preview_file_url(content_hash, size) for size in sizes]
+            # Identical files were rendered before
+            if not all([await storage.exists(upload_key(url)) for url in urls]):
+                with scratch_dir() as directory:
+                    targets = [(Path(directory) / f"{size}.webp", size) for size in sizes]
+                    await render_previews_async(source, source_type, targets)
+                    for (path, _), url in zip(targets, urls):
+                        await storage.save_file(upload_key(url), path, "image/webp")
+    except asyncio.CancelledError:
+        # Shutdown; retried by the next worker
+        raise
+    except Exception as e:
+        logger.warning(f"Preview of document {document_id} failed: {e!r}")
+        await _finish(session_maker, document_id, status=PreviewStatus.FAILED, error=repr(e)[:1000])
+        return
+
+    await _finish(
+        session_maker, document_id, status=PreviewStatus.READY, content_hash=content_hash,
+        thumbnail_url=urls[0], preview_url=urls[1], error=None
+    )
+
+
+document_previews = BackgroundJobs(
+    "document previews",
+    DocumentPreview,
+    DocumentPreview.document_id,
+    DocumentPreview.status == PreviewStatus.PENDING,
+    generate_preview,
+    lambda: settings.PREVIEW_STALE_SECONDS,
+)
@@ -0,0 +1,197 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for sliding-window counters.
+
+    Each key keeps a counter per fixed window; the sliding estimate is the
+    current window's count plus the previous window's count weighted by how
+    much of it still overlaps the sliding window.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str, window_seconds: int, now: Optional[float] = None) -> float:
+        """Record an attempt and return the estimated attempts in the sliding window."""
+
+    @abstractmethod
+    async def reset(self, key: str):
+        """Forget all attempts for a key."""
+
+
+def _sliding_estimate(previous: int, current: int, window_seconds: int, now: float) -> float:
+    elapsed = now % window_seconds
+    return previous * (window_seconds - elapsed) / window_seconds + current
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters with LRU eviction. Suitable for a single worker."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (window_index, previous_count, current_count)
+        self._counters: "OrderedDict[str, tuple[int, int, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    async def hit(self, key: str, window_seconds: int, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        window = int(now // window_seconds)
+
+        entry = self._counters.pop(key, None)
+        if entry is None or entry[0] < window - 1:
+            previous, current = 0, 0
+        elif entry[0] == window - 1:
+            previous, current = entry[2], 0
+        else:
+            previous, current = entry[1], entry[2]
+
+        current += 1
+        self._counters[key] = (window, previous, current)
+        self._evict()
+
+        return _sliding_estimate(previous, current, window_seconds, now)
+
+    async def reset(self, key: str):
+        self._counters.pop(key, None)
+
+    def _evict(self):
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Counters shared by all workers through the rate_limit_counters table."""
+
+    CLEANUP_INTERVAL_SECONDS = 60
+
+    def __init__(self, session_maker=None):
+        if session_maker is None:
+            from app.database import async_session_maker
+            session_maker = async_session_maker
+        self._session_maker = session_maker
+        self._last_cleanup = 0.0
+
+    async def hit(self, key: str, window_seconds: int, now: Optional[float] = None) -> float:
+        from app.models import RateLimitCounter
+
+        now = time.time() if now is None else now
+        window_start = int(now // window_seconds) * window_seconds
+        expires_at = datetime.utcfromtimestamp(window_start + 2 * window_seconds)
+
+        async with self._session_maker() as session:
+            stmt = insert(RateLimitCounter).values(
+                key=key, window_start=window_start, count=1, expires_at=expires_at
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RateLimitCounter.key, RateLimitCounter.window_start],
+                set_={"count": RateLimitCounter.count + 1},
+            ).returning(RateLimitCounter.count)
+            current = (await session.execute(stmt)).scalar_one()
+
+            result = await session.execute(
+                select(RateLimitCounter.count).where(
+                    RateLimitCounter.key == key,
+                    RateLimitCounter.window_start == window_start - window_seconds
+                )
+            )
+            previous = result.scalar_one_or_none() or 0
+
+            if now - self._last_cleanup > self.CLEANUP_INTERVAL_SECONDS:
+                self._last_cleanup = now
+                await session.execute(
+                    delete(RateLimitCounter).where(RateLimitCounter.expires_at < datetime.utcnow())
+                )
+
+            await session.commit()
+
+        return _sliding_estimate(previous, current, window_seconds, now)
+
+    async def reset(self, key: str):
+        from app.models import RateLimitCounter
+
+        async with self._session_maker() as session:
+            await session.execute(delete(RateLimitCounter).where(RateLimitCounter.key == key))
+            await session.commit()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> Optional[int]:
+        """
+        Record an attempt for key.
+        Returns: None if allowed, otherwise seconds to wait before retrying.
+        """
+        now = time.time()
+        estimate = await self.backend.hit(key, window_seconds, now=now)
+        if estimate <= limit:
+            return None
+        return max(1, math.ceil(window_seconds - now % window_seconds))
+
+    async def reset(self, key: str):
+        await self.backend.reset(key)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter for the configured backend."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        if settings.RATE_LIMIT_BACKEND == "database":
+            backend = DatabaseRateLimitBackend()
+        else:
+            backend = MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+        _rate_limiter = RateLimiter(backend)
+    return _rate_limiter
+
+
+def get_client_ip(request: Request) -> str:
+    """Get the client IP, honouring X-Forwarded-For only behind a trusted proxy."""
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_login_rate_limit(request: Request, scope: str, account: str):
+    """
+    Reject a login attempt if its IP or account exceeded the limit.
+    Must be called before any DB lookup or password verification.
+    """
+    limiter = get_rate_limiter()
+    window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+    checks = [
+        (f"{scope}:ip:{get_client_ip(request)}", settings.LOGIN_RATE_LIMIT_PER_IP),
+        (f"{scope}:account:{account.lower()}", settings.LOGIN_RATE_LIMIT_PER_ACCOUNT),
+    ]
+
+    for key, limit in checks:
+        retry_after = await limiter.hit(key, limit, window)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много попыток входа. Попробуйте позже.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+async def reset_login_rate_limit(scope: str, account: str):
+    """Clear the per-account counter after a successful login."""
+    await get_rate_limiter().reset(f"{scope}:account:{account.lower()}")
@@ -0,0 +1,250 @@
+"""
+Storage usage (storage_usage) and quotas: reads, the quota check of the
+upload paths, and recomputing the counters from scratch.
+
+Document counters are kept up to date by a flush hook (app.models.events),
+so rows written outside the ORM need a rebuild. Avatar sizes aren't in
+any table: they are recorded when an avatar is uploaded, and measured in
+storage by a rebuild.
+
+Usage (from backend/):
+    python -m app.services.storage_usage verify
+    python -m app.services.storage_usage rebuild
+"""
+import argparse
+import asyncio
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import settings
+from app.models import Client, Document, Folder, StorageQuota, StorageUsage, User
+from app.models.events import add_usage, storage_usage_upsert
+from app.models.storage_usage import AVATAR, CLIENT, FOLDER, NO_SCOPE_ID, TOTAL
+from app.services.avatars import avatar_usage
+
+_MB = 1024 * 1024
+
+
+def _expected_document_usage():
+    """Document counters computed from the documents table; mirrors app.models.events.storage_keys."""
+    no_scope = literal(NO_SCOPE_ID, PG_UUID(as_uuid=True))
+    rows = union_all(
+        select(Document.company_id, literal(TOTAL), no_scope, Document.file_size),
+        select(Document.company_id, literal(FOLDER), func.coalesce(Document.folder_id, no_scope), Document.file_size),
+        select(Document.company_id, literal(CLIENT), func.coalesce(Document.client_id, no_scope), Document.file_size),
+    ).subquery()
+    company_id, scope, scope_id, file_size = rows.c
+    return (
+        select(company_id, scope, scope_id, func.sum(file_size), func.count())
+        .group_by(company_id, scope, scope_id)
+    )
+
+
+async def _measure_avatars(conn: AsyncConnection) -> dict:
+    """Avatar counters of every user in a company, measured in storage: {(company, AVATAR, user): (bytes, files)}."""
+    result = await conn.execute(
+        select(User.id, User.company_id, User.avatar_url)
+        .where(User.company_id.is_not(None), User.avatar_url.is_not(None))
+    )
+    semaphore = asyncio.Semaphore(8)
+
+    async def measure(url: str) -> tuple[int, int]:
+        async with semaphore:
+            return await avatar_usage(url)
+
+    users = result.all()
+    usages = await asyncio.gather(*(measure(user.avatar_url) for user in users))
+    return {(user.company_id, AVATAR, user.id): usage for user, usage in zip(users, usages) if usage[1]}
+
+
+async def rebuild_storage_usage(conn: AsyncConnection) -> int:
+    """Recompute every counter in the caller's transaction, measuring avatars. Returns the number of counters."""
+    avatars = await _measure_avatars(conn)
+    # Blocks concurrent updates until the rebuild commits; the recount
+    # below then sees every transaction that updated before it
+    await conn.execute(text("LOCK TABLE storage_usage IN EXCLUSIVE MODE"))
+    await conn.execute(delete(StorageUsage))
+    result = await conn.execute(
+        insert(StorageUsage).from_select(
+            ["company_id", "scope", "scope_id", "bytes", "files"], _expected_document_usage()
+        )
+    )
+    deltas: dict = {}
+    for (company_id, scope, user_id), (size, files) in avatars.items():
+        add_usage(deltas, [(company_id, TOTAL, NO_SCOPE_ID), (company_id, scope, user_id)], size, files)
+    if deltas:
+        await conn.execute(storage_usage_upsert(deltas))
+    return result.rowcount + len(avatars)
+
+
+async def verify_storage_usage(conn: AsyncConnection) -> list[tuple]:
+    """
+    Document counters and totals that differ from a recount, taking the
+    recorded avatar sizes as given: (company, scope, scope id, stored, expected).
+    """
+    expected = {
+        tuple(row[:3]): (int(row[3]), row[4]) for row in (await conn.execute(_expected_document_usage())).all()
+    }
+    stored = {
+        tuple(row[:3]): (row[3], row[4])
+        for row in (await conn.execute(
+            select(
+                StorageUsage.company_id, StorageUsage.scope, StorageUsage.scope_id,
+                StorageUsage.bytes, StorageUsage.files
+            ).where((StorageUsage.bytes != 0) | (StorageUsage.files != 0))
+        )).all()
+    }
+    for (company_id, scope, _), (size, files) in stored.items():
+        if scope == AVATAR:
+            total = expected.get((company_id, TOTAL, NO_SCOPE_ID), (0, 0))
+            expected[(company_id, TOTAL, NO_SCOPE_ID)] = (total[0] + size, total[1] + files)
+    return sorted(
+        (*key, stored.get(key, (0, 0)), expected.get(key, (0, 0)))
+        for key in expected.keys() | stored.keys()
+        if key[1] != AVATAR and stored.get(key, (0, 0)) != expected.get(key, (0, 0))
+    )
+
+
+async def ensure_storage_usage(conn: AsyncConnection) -> bool:
+    """Build the counters if the table is empty but there is data (first start). Returns True if built."""
+    if await conn.scalar(select(StorageUsage.company_id).limit(1)) is not None:
+        return False
+    has_data = await conn.scalar(select(
+        select(Document.id).exists() | select(User.id).where(User.avatar_url.is_not(None)).exists()
+    ))
+    if not has_data:
+        return False
+    await rebuild_storage_usage(conn)
+    return True
+
+
+async def set_avatar_usage(db: AsyncSession, user: User, url: Optional[str]):
+    """Record the storage of a user's new avatar (None: no avatar) in the caller's transaction."""
+    if user.company_id is None:
+        return
+    size, files = await avatar_usage(url)
+    previous = (await db.execute(
+        delete(StorageUsage)
+        .where(
+            StorageUsage.company_id == user.company_id, StorageUsage.scope == AVATAR, StorageUsage.scope_id == user.id
+        )
+        .returning(StorageUsage.bytes, StorageUsage.files)
+    )).first()
+    deltas: dict = {}
+    if previous is not None:
+        add_usage(deltas, [(user.company_id, TOTAL, NO_SCOPE_ID)], -previous.bytes, -previous.files)
+    add_usage(deltas, [(user.company_id, TOTAL, NO_SCOPE_ID), (user.company_id, AVATAR, user.id)], size, files)
+    stmt = storage_usage_upsert(deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+
+
+async def get_quota(db: AsyncSession, company_id: UUID) -> int:
+    """A company's quota in bytes; 0 for unlimited."""
+    quota = await db.scalar(select(StorageQuota.quota_bytes).where(StorageQuota.company_id == company_id))
+    return quota if quota is not None else settings.STORAGE_QUOTA_MB * _MB
+
+
+async def _used(db: AsyncSession, company_id: UUID) -> int:
+    used = await db.scalar(
+        select(StorageUsage.bytes).where(
+            StorageUsage.company_id == company_id, StorageUsage.scope == TOTAL, StorageUsage.scope_id == NO_SCOPE_ID
+        )
+    )
+    return used or 0
+
+
+async def check_storage_quota(db: AsyncSession, company_id: UUID, size: int = 0):
+    """
+    413 if storing size more bytes would take the company over its quota.
+    Called before an upload is written, and with size 0 after its row is
+    flushed: the counter row is then locked until commit, so concurrent
+    uploads can't pass the check together.
+    """
+    quota = await get_quota(db, company_id)
+    if not quota:
+        return
+    used = await _used(db, company_id)
+    if used + size > quota:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Недостаточно места в хранилище компании: занято {used / _MB:.1f} из {quota / _MB:.0f} МБ"
+        )
+
+
+async def get_storage_usage(db: AsyncSession, company_id: UUID) -> dict:
+    """A company's usage and quota, with documents by folder and client and avatars in total."""
+    result = await db.execute(
+        select(StorageUsage.scope, StorageUsage.scope_id, StorageUsage.bytes, StorageUsage.files)
+        .where(StorageUsage.company_id == company_id, (StorageUsage.bytes != 0) | (StorageUsage.files != 0))
+    )
+    rows = result.all()
+    total = next((row for row in rows if row.scope == TOTAL), None)
+    avatars = [row for row in rows if row.scope == AVATAR]
+
+    folder_ids = [row.scope_id for row in rows if row.scope == FOLDER and row.scope_id != NO_SCOPE_ID]
+    client_ids = [row.scope_id for row in rows if row.scope == CLIENT and row.scope_id != NO_SCOPE_ID]
+    names = {}
+    if folder_ids:
+        names.update((await db.execute(select(Folder.id, Folder.name).where(Folder.id.in_(folder_ids)))).all())
+    if client_ids:
+        names.update((await db.execute(
+            select(Client.id, Client.company_name).where(Client.id.in_(client_ids))
+        )).all())
+
+    def breakdown(scope: str) -> list[dict]:
+        items = [
+            {
+                "id": None if row.scope_id == NO_SCOPE_ID else row.scope_id,
+                "name": names.get(row.scope_id),
+                "bytes": row.bytes,
+                "files": row.files,
+            }
+            for row in rows if row.scope == scope
+        ]
+        return sorted(items, key=lambda item: -item["bytes"])
+
+    quota = await get_quota(db, company_id)
+    return {
+        "bytes": total.bytes if total else 0,
+        "files": total.files if total else 0,
+        "quota_bytes": quota or None,
+        "avatar_bytes": sum(row.bytes for row in avatars),
+        "avatar_files": sum(row.files for row in avatars),
+        "folders": breakdown(FOLDER),
+        "clients": breakdown(CLIENT),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.utils.storage import close_storage
+
+    try:
+        async with engine.begin() as conn:
+            if args.command == "rebuild":
+                counters = await rebuild_storage_usage(conn)
+                print(f"Rebuilt {counters} counters")
+                return
+            mismatches = await verify_storage_usage(conn)
+    finally:
+        await close_storage()
+        await engine.dispose()
+
+    for company_id, scope, scope_id, stored, expected in mismatches:
+        print(f"{company_id} {scope}:{scope_id} stored={stored} expected={expected}")
+    print(f"{len(mismatches)} mismatched counters")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
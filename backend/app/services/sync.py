@@ -0,0 +1,76 @@
+import asyncio
+import base64
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete
+
+from app.config import settings
+from app.models import DeletedRecord
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+TOMBSTONE_PURGE_INTERVAL_SECONDS = 3600
+
+
+def _micros(at: datetime) -> int:
+    return (at - _EPOCH) // timedelta(microseconds=1)
+
+
+def encode_sync_token(since: datetime, after: Optional[dict[str, tuple[datetime, UUID]]] = None) -> str:
+    """
+    Opaque token for a sync position: a UTC timestamp, and for each entity
+    type cut off by the change limit, the (timestamp, id) of the last row sent.
+    """
+    raw: object = _micros(since)
+    if after:
+        raw = {"since": raw, "after": {entity: [_micros(at), str(row_id)] for entity, (at, row_id) in after.items()}}
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[datetime, dict[str, tuple[datetime, UUID]]]:
+    """(since, after) from a token; raises ValueError for malformed tokens."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if isinstance(raw, int) and not isinstance(raw, bool):
+            raw = {"since": raw, "after": {}}
+        since = _EPOCH + timedelta(microseconds=raw["since"])
+        after = {
+            entity: (_EPOCH + timedelta(microseconds=micros), UUID(row_id))
+            for entity, (micros, row_id) in raw["after"].items()
+        }
+    except (ValueError, TypeError, KeyError, AttributeError, OverflowError, UnicodeDecodeError):
+        raise ValueError("Invalid sync token")
+    return since, after
+
+
+def oldest_sync_position() -> datetime:
+    """Tokens older than this may have missed purged tombstones."""
+    return datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+async def purge_tombstones(session_maker=None):
+    """Delete tombstones past the retention period."""
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    async with session_maker() as session:
+        await session.execute(delete(DeletedRecord).where(DeletedRecord.deleted_at < oldest_sync_position()))
+        await session.commit()
+
+
+async def tombstone_purge_loop():
+    """Periodically purge expired tombstones."""
+    while True:
+        await asyncio.sleep(TOMBSTONE_PURGE_INTERVAL_SECONDS)
+        try:
+            await purge_tombstones()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Tombstone purge failed: {e}")
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Optional
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramService:
+    """Process-wide Telegram client with a pooled keep-alive HTTP connection."""
+
+    def __init__(
+        self,
+        token: str,
+        pool_size: int = 8,
+        max_concurrency: int = 4,
+        timeout: float = 10.0
+    ):
+        self.token = token
+        # One httpx client per process: connections are kept alive and reused
+        # between sends instead of paying a fresh TLS handshake per message.
+        self._request = HTTPXRequest(
+            connection_pool_size=pool_size,
+            read_timeout=timeout,
+            write_timeout=timeout,
+            connect_timeout=timeout,
+            pool_timeout=timeout,
+        )
+        self._bot = Bot(token=token, request=self._request)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._started = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._started
+
+    async def start(self):
+        """Open the underlying HTTP connection pool."""
+        if self._started:
+            return
+        await self._request.initialize()
+        self._started = True
+
+    async def stop(self):
+        """Close the underlying HTTP connection pool."""
+        if not self._started:
+            return
+        self._started = False
+        await self._request.shutdown()
+
+    async def __aenter__(self) -> "TelegramService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def send_message(self, chat_id: str, text: str, parse_mode: Optional[str] = "HTML"):
+        """Send a message, bounded by the service's concurrency limit."""
+        if not self._started:
+            await self.start()
+        async with self._semaphore:
+            return await self._bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode
+            )
+
+    async def send_admin_code(self, code: str, chat_id: Optional[str] = None):
+        """Send the admin login code to the admin chat."""
+        chat_id = chat_id or settings.ADMIN_TELEGRAM_CHAT_ID
+        if not chat_id:
+            return None
+        return await self.send_message(
+            chat_id,
+            f"🔐 <b>Код администратора</b>\n\n"
+            f"<code>{code}</code>\n\n"
+            f"⏰ Действителен {settings.ADMIN_CODE_TTL_HOURS} ч."
+        )
+
+
+_telegram_service: Optional[TelegramService] = None
+
+
+def get_telegram_service() -> Optional[TelegramService]:
+    """Get the shared Telegram service, or None if Telegram is not configured."""
+    return _telegram_service
+
+
+async def init_telegram_service() -> Optional[TelegramService]:
+    """Create and start the shared Telegram service (called from the app lifespan)."""
+    global _telegram_service
+    if not settings.TELEGRAM_BOT_TOKEN:
+        return None
+    if _telegram_service is None:
+        _telegram_service = TelegramService(
+            token=settings.TELEGRAM_BOT_TOKEN,
+            pool_size=settings.TELEGRAM_POOL_SIZE,
+            max_concurrency=settings.TELEGRAM_MAX_CONCURRENCY,
+            timeout=settings.TELEGRAM_TIMEOUT_SECONDS
+        )
+    await _telegram_service.start()
+    return _telegram_service
+
+
+async def close_telegram_service():
+    """Stop the shared Telegram service (called on app shutdown)."""
+    global _telegram_service
+    if _telegram_service is not None:
+        await _telegram_service.stop()
+        _telegram_service = None
@@ -0,0 +1,258 @@
+"""
+Collection of orphaned uploads: stored files no row refers to any more
+(files of deleted companies, replaced avatars, uploads whose request
+failed after the file was saved).
+
+The job streams the storage in batches and looks every batch up in one
+query per table: documents.file_url, users.avatar_url (any size of an
+avatar keeps all of them), document_previews.content_hash for preview
+images, and upload sessions for files uploaded straight to storage but
+not completed yet. Files younger than UPLOAD_GC_GRACE_HOURS are never
+candidates, so uploads in flight are safe. Orphans are moved to
+.orphaned/<YYYYMMDD>/<key> and deleted after UPLOAD_GC_QUARANTINE_DAYS
+(or deleted at once with UPLOAD_GC_ACTION=delete); to restore a file,
+move it back to its key. Runs in one worker at a time under an advisory lock.
+
+Usage (from backend/):
+    python -m app.services.upload_gc --dry-run
+    python -m app.services.upload_gc
+"""
+import argparse
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Document, DocumentPreview, UploadSession, User
+from app.services.avatars import avatar_urls
+from app.utils.files import QUARANTINE_DIR
+from app.utils.storage import StorageBackend, StoredFile, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+UPLOAD_GC_LOCK_KEY = 0x55474331
+
+QUARANTINE = "quarantine"
+DELETE = "delete"
+
+# Files moved or deleted in parallel
+_CONCURRENCY = 8
+
+_PREVIEW_KEY = re.compile(r"^previews/[0-9a-f]{2}/(?P<hash>[0-9a-f]{64})-\d+\.webp$")
+# Files uploaded with a presigned URL are named after their session
+_SESSION_KEY = re.compile(r"^[^/]+/(?P<id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(\.[^/]*)?$")
+
+
+@dataclass
+class GCReport:
+    scanned: int = 0
+    scanned_bytes: int = 0
+    orphaned: int = 0
+    orphaned_bytes: int = 0
+    failed: int = 0
+    # Quarantined files deleted after UPLOAD_GC_QUARANTINE_DAYS
+    purged: int = 0
+    # Freed by deleting orphans and purged files
+    reclaimed_bytes: int = 0
+
+    def __str__(self):
+        return (
+            f"scanned {self.scanned} files ({self.scanned_bytes} bytes), "
+            f"orphaned {self.orphaned} ({self.orphaned_bytes} bytes), failed {self.failed}, "
+            f"purged {self.purged}, reclaimed {self.reclaimed_bytes} bytes"
+        )
+
+
+def quarantine_key(key: str, day: date) -> str:
+    return f"{QUARANTINE_DIR}/{day:%Y%m%d}/{key}"
+
+
+async def referenced_keys(db: AsyncSession, keys: list[str]) -> set[str]:
+    """The keys among a batch that some row refers to."""
+    urls = {f"/uploads/{key}": key for key in keys}
+    avatar_candidates: dict[str, set[str]] = {}
+    preview_hashes: dict[str, set[str]] = {}
+    session_ids: dict[UUID, set[str]] = {}
+    for url, key in urls.items():
+        for candidate in [url, *avatar_urls(url).values()]:
+            avatar_candidates.setdefault(candidate, set()).add(key)
+        if match := _PREVIEW_KEY.match(key):
+            preview_hashes.setdefault(match["hash"], set()).add(key)
+        if match := _SESSION_KEY.match(key):
+            session_ids.setdefault(UUID(match["id"]), set()).add(key)
+
+    referenced = set()
+    for url in (await db.execute(select(Document.file_url).where(Document.file_url.in_(urls)))).scalars():
+        referenced.add(urls[url])
+    for url in (await db.execute(select(User.avatar_url).where(User.avatar_url.in_(avatar_candidates)))).scalars():
+        referenced.update(avatar_candidates[url])
+    if preview_hashes:
+        result = await db.execute(
+            select(DocumentPreview.content_hash).where(DocumentPreview.content_hash.in_(preview_hashes))
+        )
+        for content_hash in result.scalars():
+            referenced.update(preview_hashes[content_hash])
+    if session_ids:
+        result = await db.execute(select(UploadSession.id).where(UploadSession.id.in_(session_ids)))
+        for session_id in result.scalars():
+            referenced.update(session_ids[session_id])
+    return referenced
+
+
+async def _move_all(storage: StorageBackend, files: list[StoredFile], day: date) -> list[StoredFile]:
+    """Quarantine files; returns those that couldn't be moved."""
+    semaphore = asyncio.Semaphore(_CONCURRENCY)
+
+    async def move(file: StoredFile) -> bool:
+        async with semaphore:
+            try:
+                await storage.move(file.key, quarantine_key(file.key, day))
+            except FileNotFoundError:
+                # Removed meanwhile
+                pass
+            except Exception as e:
+                logger.warning(f"Upload GC: failed to quarantine {file.key}: {e}")
+                return False
+            return True
+
+    results = await asyncio.gather(*(move(file) for file in files))
+    return [file for file, moved in zip(files, results) if not moved]
+
+
+async def _delete_all(storage: StorageBackend, files: list[StoredFile]) -> list[StoredFile]:
+    """Delete files; returns those still there."""
+    _, failed = await storage.delete_many([file.key for file in files], _CONCURRENCY)
+    if not failed:
+        return []
+    return [file for file in files if await storage.exists(file.key)]
+
+
+async def collect_orphans(
+    storage: StorageBackend,
+    find_referenced: Callable[[list[str]], Awaitable[set[str]]],
+    action: str = QUARANTINE,
+    dry_run: bool = False,
+    now: Optional[float] = None,
+) -> GCReport:
+    """
+    Quarantine or delete stored files older than the grace period that
+    find_referenced doesn't return, and purge expired quarantine.
+    With dry_run, only reports what would be collected.
+    """
+    now = now if now is not None else time.time()
+    cutoff = now - settings.UPLOAD_GC_GRACE_HOURS * 3600
+    today = datetime.fromtimestamp(now).date()
+    report = GCReport()
+
+    async for batch in storage.iter_files(batch_size=settings.UPLOAD_GC_BATCH_SIZE):
+        # Dot names are never uploads: the quarantine itself, .gitkeep
+        batch = [file for file in batch if not any(part.startswith(".") for part in file.key.split("/"))]
+        report.scanned += len(batch)
+        report.scanned_bytes += sum(file.size for file in batch)
+        candidates = [file for file in batch if file.modified < cutoff]
+        if not candidates:
+            continue
+        referenced = await find_referenced([file.key for file in candidates])
+        orphans = [file for file in candidates if file.key not in referenced]
+        report.orphaned += len(orphans)
+        report.orphaned_bytes += sum(file.size for file in orphans)
+        if dry_run or not orphans:
+            continue
+        if action == DELETE:
+            failed = await _delete_all(storage, orphans)
+            report.reclaimed_bytes += sum(file.size for file in orphans) - sum(file.size for file in failed)
+        else:
+            failed = await _move_all(storage, orphans, today)
+        report.failed += len(failed)
+
+    if not dry_run:
+        await _purge_quarantine(storage, today - timedelta(days=settings.UPLOAD_GC_QUARANTINE_DAYS), report)
+    return report
+
+
+async def _purge_quarantine(storage: StorageBackend, before: date, report: GCReport):
+    """Delete files quarantined before the given day."""
+    async for batch in storage.iter_files(f"{QUARANTINE_DIR}/", settings.UPLOAD_GC_BATCH_SIZE):
+        expired = []
+        for file in batch:
+            day = file.key.split("/")[1]
+            if day.isdigit() and len(day) == 8 and datetime.strptime(day, "%Y%m%d").date() < before:
+                expired.append(file)
+        if not expired:
+            continue
+        failed = await _delete_all(storage, expired)
+        report.purged += len(expired) - len(failed)
+        report.reclaimed_bytes += sum(file.size for file in expired) - sum(file.size for file in failed)
+        report.failed += len(failed)
+
+
+async def collect_orphaned_uploads(
+    session_maker=None, action: Optional[str] = None, dry_run: bool = False
+) -> Optional[GCReport]:
+    """
+    Collect orphaned uploads in the configured storage.
+    Returns the report, or None if another worker holds the lock.
+    """
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    async with session_maker() as db:
+        # Released on rollback; a worker that doesn't get it skips this round
+        locked = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": UPLOAD_GC_LOCK_KEY})
+        if not locked:
+            await db.rollback()
+            return None
+        report = await collect_orphans(
+            get_storage(), lambda keys: referenced_keys(db, keys),
+            action=action or settings.UPLOAD_GC_ACTION, dry_run=dry_run
+        )
+        await db.rollback()
+    return report
+
+
+async def upload_gc_loop():
+    """Periodically collect orphaned uploads."""
+    while True:
+        await asyncio.sleep(settings.UPLOAD_GC_INTERVAL_SECONDS)
+        try:
+            report = await collect_orphaned_uploads()
+            if report is not None and (report.orphaned or report.purged or report.failed):
+                logger.info(f"Upload GC: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Upload GC failed: {e}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be collected")
+    parser.add_argument("--action", choices=[QUARANTINE, DELETE], help=f"default: {settings.UPLOAD_GC_ACTION}")
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.utils.storage import close_storage
+
+    try:
+        report = await collect_orphaned_uploads(action=args.action, dry_run=args.dry_run)
+    finally:
+        await close_storage()
+        await engine.dispose()
+    if report is None:
+        print("Another worker is collecting orphaned uploads")
+        raise SystemExit(1)
+    print(("Would collect: " if args.dry_run else "Collected: ") + str(report))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
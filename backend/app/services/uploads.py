@@ -0,0 +1,185 @@
+"""
+Resumable uploads.
+
+A session is opened for a file of known size and sha256. The file is
+then sent as fixed-size chunks, in any order and in parallel. Each chunk
+is streamed to its own file under UPLOAD_PARTIAL_DIR/<session id>/, so a
+chunk sent again simply replaces the earlier copy. The chunks on disk are
+the record of progress. Completing the session streams the chunks into
+storage while hashing them; the Document is created only if size and
+hash match. With object storage the client may instead PUT the whole
+file to a presigned URL, and the bucket checks its hash. Sessions idle
+for UPLOAD_SESSION_TTL_HOURS are swept together with their chunks.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+from uuid import UUID
+
+import aiofiles
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.models import UploadSession, UploadSessionStatus
+from app.utils.files import get_file_extension
+from app.utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkSizeError(ValueError):
+    """A chunk's body doesn't have the length its index requires."""
+
+
+def partial_dir(session_id: UUID) -> Path:
+    return Path(settings.UPLOAD_PARTIAL_DIR) / str(session_id)
+
+
+def _chunk_path(session_id: UUID, index: int) -> Path:
+    return partial_dir(session_id) / str(index)
+
+
+def received_chunks(session: UploadSession) -> list[int]:
+    """Indexes of the chunks stored completely, in order."""
+    try:
+        entries = list(os.scandir(partial_dir(session.id)))
+    except FileNotFoundError:
+        return []
+    received = []
+    for entry in entries:
+        # Chunks being written are temp files with a suffix
+        if entry.name.isdigit():
+            index = int(entry.name)
+            if index < session.chunk_count and entry.stat().st_size == session.chunk_length(index):
+                received.append(index)
+    return sorted(received)
+
+
+def upload_offset(session: UploadSession, received: list[int]) -> int:
+    """Bytes received without a gap from the start of the file."""
+    contiguous = 0
+    for index in received:
+        if index != contiguous:
+            break
+        contiguous += 1
+    return min(contiguous * session.chunk_size, session.size)
+
+
+async def write_chunk(session: UploadSession, index: int, body: AsyncIterator[bytes]):
+    """
+    Stream a chunk to disk. It replaces the stored chunk only once it is
+    complete, so an interrupted request leaves the previous copy intact.
+    """
+    expected = session.chunk_length(index)
+    target = _chunk_path(session.id, index)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{index}.{uuid.uuid4().hex}.tmp")
+    written = 0
+    try:
+        async with aiofiles.open(temp, "wb") as f:
+            async for data in body:
+                written += len(data)
+                if written > expected:
+                    raise ChunkSizeError(f"Chunk {index} is longer than {expected} bytes")
+                await f.write(data)
+        if written != expected:
+            raise ChunkSizeError(f"Chunk {index} has {written} of {expected} bytes")
+        os.replace(temp, target)
+    finally:
+        if temp.exists():
+            temp.unlink()
+
+
+async def assemble_upload(session: UploadSession, key: str, content_type: str) -> str:
+    """Store the chunks, concatenated, as key; returns the sha256 of the result."""
+    digest = hashlib.sha256()
+
+    async def chunks():
+        for index in range(session.chunk_count):
+            async with aiofiles.open(_chunk_path(session.id, index), "rb") as chunk:
+                while block := await chunk.read(1024 * 1024):
+                    digest.update(block)
+                    yield block
+
+    await get_storage().save(key, chunks(), content_type)
+    return digest.hexdigest()
+
+
+def direct_upload_key(session: UploadSession) -> str:
+    """Storage key a client uploads the whole file to with the session's presigned URL."""
+    return f"{session.company_id}/{session.id}{get_file_extension(session.name)}"
+
+
+def remove_chunks(session_id: UUID):
+    shutil.rmtree(partial_dir(session_id), ignore_errors=True)
+
+
+def session_expires_at(session: UploadSession) -> datetime:
+    return session.updated_at + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+
+def _stale_partial_dirs(known: set[str], cutoff: float) -> list[Path]:
+    """Chunk directories of sessions that no longer exist, untouched since cutoff."""
+    try:
+        entries = list(os.scandir(settings.UPLOAD_PARTIAL_DIR))
+    except FileNotFoundError:
+        return []
+    return [
+        Path(entry.path) for entry in entries
+        if entry.is_dir() and entry.name not in known and entry.stat().st_mtime < cutoff
+    ]
+
+
+async def sweep_upload_sessions(session_maker=None) -> int:
+    """
+    Delete sessions idle for UPLOAD_SESSION_TTL_HOURS (completed ones are
+    kept that long so completing again returns the same document), and
+    chunk directories left without a session. Returns the sessions swept.
+    """
+    if session_maker is None:
+        from app.database import async_session_maker
+        session_maker = async_session_maker
+
+    cutoff = datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    async with session_maker() as db:
+        # Each row is returned to one worker only, so several workers can sweep at once
+        result = await db.execute(
+            delete(UploadSession).where(UploadSession.updated_at < cutoff).returning(UploadSession)
+        )
+        swept = list(result.scalars().all())
+        await db.commit()
+        known = {str(session_id) for session_id in (await db.execute(select(UploadSession.id))).scalars().all()}
+
+    storage = get_storage()
+    if storage.direct_uploads:
+        # Files uploaded straight to storage but never completed
+        await storage.delete_many(
+            direct_upload_key(session) for session in swept if session.status == UploadSessionStatus.ACTIVE
+        )
+    stale = await asyncio.to_thread(
+        _stale_partial_dirs, known, time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+    )
+    for path in [partial_dir(session.id) for session in swept] + stale:
+        await asyncio.to_thread(shutil.rmtree, path, True)
+    return len(swept)
+
+
+async def upload_sweep_loop():
+    """Periodically sweep abandoned resumable uploads."""
+    while True:
+        await asyncio.sleep(settings.UPLOAD_SWEEP_INTERVAL_SECONDS)
+        try:
+            swept = await sweep_upload_sessions()
+            if swept:
+                logger.info(f"Swept {swept} upload sessions")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Upload session sweep failed: {e}")
@@ -1,7 +1,9 @@
 from app.utils.security import (
     verify_password, get_password_hash,
-    create_access_token, decode_token, get_user_id_from_token,
-    generate_admin_code, verify_admin_code, get_current_admin_code
+    verify_password_async, get_password_hash_async, verify_and_update_password,
+    init_jwt_keys, create_access_token, decode_token, get_user_id_from_token,
+    generate_refresh_token, hash_refresh_token,
+    generate_admin_code, hash_admin_code
 )
 from app.utils.files import (
     get_upload_dir, get_file_extension, generate_unique_filename,
@@ -11,8 +13,10 @@ from app.utils.files import (
 __all__ = [
     # Security
     "verify_password", "get_password_hash",
-    "create_access_token", "decode_token", "get_user_id_from_token",
-    "generate_admin_code", "verify_admin_code", "get_current_admin_code",
+    "verify_password_async", "get_password_hash_async", "verify_and_update_password",
+    "init_jwt_keys", "create_access_token", "decode_token", "get_user_id_from_token",
+    "generate_refresh_token", "hash_refresh_token",
+    "generate_admin_code", "hash_admin_code",
     # Files
     "get_upload_dir", "get_file_extension", "generate_unique_filename",
     "save_upload_file", "delete_file",
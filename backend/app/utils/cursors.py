@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+
+def encode_cursor(sort: str, value: Any, row_id: UUID) -> str:
+    """Opaque keyset cursor: the sort it belongs to, and the last row's sort value and id."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, str(row_id)], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, value_type: type) -> tuple[Any, UUID]:
+    """(sort value, id) from a cursor; raises ValueError if malformed or made for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, row_id = json.loads(raw)
+        if cursor_sort != sort:
+            raise ValueError("Cursor belongs to another sort")
+        if value_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, value_type) or isinstance(value, bool):
+            raise ValueError("Unexpected cursor value")
+        if not isinstance(row_id, str):
+            raise ValueError("Unexpected cursor id")
+        return value, UUID(row_id)
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,9 +1,18 @@
 import os
 import uuid
-import aiofiles
 from pathlib import Path
-from fastapi import UploadFile
+from typing import Iterable, Optional
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import RedirectResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
 from app.config import settings
+from app.utils.storage import get_storage
+
+# Upload subdirectories whose files never change once written (content-hashed names)
+IMMUTABLE_UPLOAD_DIRS = ("avatars", "previews")
+# Orphaned uploads awaiting deletion (app.services.upload_gc); never served
+QUARANTINE_DIR = ".orphaned"
 
 
 def get_upload_dir() -> Path:
@@ -27,51 +36,77 @@ def generate_unique_filename(original_filename: str) -> str:
 
 async def save_upload_file(file: UploadFile, subfolder: str = "") -> tuple[str, str, int]:
     """
-    Save an uploaded file to disk.
+    Stream an uploaded file into storage.
     Returns: (file_url, file_type, file_size)
     """
-    upload_dir = get_upload_dir()
-    
-    if subfolder:
-        upload_dir = upload_dir / subfolder
-        upload_dir.mkdir(parents=True, exist_ok=True)
-    
     unique_filename = generate_unique_filename(file.filename or "file")
-    file_path = upload_dir / unique_filename
-    
-    # Read file content
-    content = await file.read()
-    file_size = len(content)
-    
-    # Check file size
+    key = f"{subfolder}/{unique_filename}" if subfolder else unique_filename
+    file_type = file.content_type or "application/octet-stream"
     max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-    if file_size > max_size:
-        raise ValueError(f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB")
     
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        await out_file.write(content)
+    async def chunks():
+        size = 0
+        while data := await file.read(1024 * 1024):
+            size += len(data)
+            # Nothing is stored when this is raised
+            if size > max_size:
+                raise ValueError(f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB")
+            yield data
     
-    # Generate URL (relative to uploads directory)
-    file_url = f"/uploads/{subfolder}/{unique_filename}" if subfolder else f"/uploads/{unique_filename}"
-    file_type = file.content_type or "application/octet-stream"
+    file_size = await get_storage().save(key, chunks(), file_type)
     
-    return file_url, file_type, file_size
+    # Generate URL (relative to uploads directory)
+    return f"/uploads/{key}", file_type, file_size
+
+
+def upload_key(file_url: str) -> Optional[str]:
+    """Storage key of an uploaded file's URL, or None if it isn't an upload."""
+    if not file_url.startswith("/uploads/"):
+        return None
+    return file_url[9:]  # Remove "/uploads/" prefix
 
 
 async def delete_file(file_url: str) -> bool:
     """Delete a file by its URL."""
-    if not file_url.startswith("/uploads/"):
+    key = upload_key(file_url)
+    if key is None:
         return False
+    return await get_storage().delete(key)
+
+
+async def delete_files(file_urls: Iterable[str], concurrency: int = 8) -> tuple[int, int]:
+    """
+    Delete many uploaded files, at most `concurrency` requests at a time.
+    Returns: (deleted, failed)
+    """
+    file_urls = list(file_urls)
+    keys = [key for key in map(upload_key, file_urls) if key is not None]
+    deleted, failed = await get_storage().delete_many(keys, concurrency)
+    return deleted, failed + len(file_urls) - len(keys)
+
+
+def _hidden(parts: list[str]) -> bool:
+    """Dot names (the quarantine, "..") are never uploads."""
+    return any(part.startswith(".") for part in parts)
+
+
+class UploadStaticFiles(StaticFiles):
+    """Serves /uploads; files that never change are cached by browsers for a year."""
     
-    relative_path = file_url[9:]  # Remove "/uploads/" prefix
-    file_path = get_upload_dir() / relative_path
-    
-    try:
-        if file_path.exists():
-            os.remove(file_path)
-            return True
-    except Exception:
-        pass
-    
-    return False
+    async def get_response(self, path: str, scope: Scope):
+        if _hidden(path.split(os.sep)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and path.split(os.sep, 1)[0] in IMMUTABLE_UPLOAD_DIRS:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+async def redirect_upload(key: str) -> RedirectResponse:
+    """/uploads/<key> with object storage: the file is downloaded straight from the bucket."""
+    if _hidden(key.split("/")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    response = RedirectResponse(get_storage().download_url(key), status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    # The presigned URL stays valid at least this long
+    response.headers["Cache-Control"] = f"private, max-age={settings.S3_PRESIGN_EXPIRE_SECONDS // 2}"
+    return response
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+# Image decoding and resizing is CPU-bound and holds the GIL, so it runs in
+# worker processes. They are spawned rather than forked from the running event loop.
+_image_executor: Optional[ProcessPoolExecutor] = None
+
+AVATAR_FORMATS = {"JPEG", "PNG", "WEBP", "GIF", "BMP", "TIFF"}
+
+
+def _get_image_executor() -> ProcessPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        _image_executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=200
+        )
+    return _image_executor
+
+
+def shutdown_image_executor():
+    """Stop the image worker processes."""
+    global _image_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
+
+
+async def run_in_image_pool(func, *args):
+    """Run func(*args) in an image worker process."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_image_executor(), func, *args)
+
+
+def save_webp(image, target: str, quality: int = 80):
+    """Write image as WebP, atomically, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp = f"{target}.{os.getpid()}.tmp"
+    image.save(temp, "WEBP", quality=quality, method=4)
+    os.replace(temp, target)
+
+
+def render_avatar(data: bytes, directory: str, sizes: list[int]) -> str:
+    """
+    Center-crop an uploaded image to squares of the given sizes, written as
+    <sha256 of data>-<size>.webp in directory; returns the hash. Re-encoding
+    drops EXIF and other metadata. Raises ValueError for anything that
+    isn't a supported image. Runs in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    targets = [(os.path.join(directory, f"{content_hash}-{size}.webp"), size) for size in sizes]
+    if all(os.path.exists(target) for target, _ in targets):
+        return content_hash
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in AVATAR_FORMATS:
+            raise ValueError(f"Unsupported image format {image.format}")
+        largest = max(sizes)
+        image.draft("RGB", (largest, largest))
+        # Apply the camera orientation before the EXIF data is dropped
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(str(e)) from None
+
+    side = min(image.size)
+    image = ImageOps.fit(image, (side, side), Image.LANCZOS)
+    for target, size in sorted(targets, key=lambda t: -t[1]):
+        if size < image.width:
+            image = image.resize((size, size), Image.LANCZOS)
+        save_webp(image, target, quality=85)
+    return content_hash
@@ -0,0 +1,75 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from app.utils.images import run_in_image_pool, save_webp
+
+PDF_TYPES = {"application/pdf"}
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif", "image/tiff", "image/bmp"}
+_EXTENSIONS = {
+    ".pdf": "application/pdf",
+    ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp",
+    ".gif": "image/gif", ".tif": "image/tiff", ".tiff": "image/tiff", ".bmp": "image/bmp",
+}
+
+
+def preview_source_type(file_type: str, filename: str) -> Optional[str]:
+    """The MIME type previews are rendered as, or None if the file can't be previewed."""
+    if file_type in PDF_TYPES or file_type in IMAGE_TYPES:
+        return file_type
+    # Browsers often send application/octet-stream for scans
+    return _EXTENSIONS.get(Path(filename).suffix.lower())
+
+
+def file_sha256(path: Path) -> str:
+    """Hex sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def preview_file_url(content_hash: str, size: int) -> str:
+    """URL of the preview of the given size for a file's content; shared by identical files."""
+    return f"/uploads/previews/{content_hash[:2]}/{content_hash}-{size}.webp"
+
+
+def render_previews(source: str, source_type: str, targets: list[tuple[str, int]]):
+    """
+    Render the first page of a PDF, or an image, as WebP files no larger
+    than each target's size (longest side). Runs in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    largest = max(size for _, size in targets)
+    if source_type in PDF_TYPES:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(source)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            image = page.render(scale=largest / max(width, height, 1)).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(source)
+        # Lets JPEG decode at a fraction of the full resolution
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    # Largest first, each downscaled from the previous one
+    for target, size in sorted(targets, key=lambda t: -t[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        save_webp(image, target)
+
+
+async def render_previews_async(source: Path, source_type: str, targets: list[tuple[Path, int]]):
+    """render_previews in the image worker pool."""
+    await run_in_image_pool(
+        render_previews, str(source), source_type, [(str(path), size) for path, size in targets]
+    )
@@ -0,0 +1,73 @@
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (Decimal, UUID)):
+        # orjson only handles exact uuid.UUID; asyncpg returns its own subclass
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Serialises UUID, date/datetime and
+    enums natively, and Pydantic models via model_dump().
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Fast path for large responses: returning a Response from an endpoint skips
+# FastAPI's response_model re-validation and jsonable_encoder pass. The
+# response_model on the route is still used for the OpenAPI schema, so the
+# data passed here must already match it (plain dicts from *_to_dict helpers).
+
+def api_response(
+    data: Any,
+    message: Optional[str] = None,
+    headers: Optional[dict] = None,
+    status_code: int = 200
+) -> ORJSONResponse:
+    """ApiResponse envelope rendered directly, without response_model validation."""
+    return ORJSONResponse(
+        {"data": data, "success": True, "message": message}, status_code=status_code, headers=headers
+    )
+
+
+def paginated_response(
+    data: list,
+    total: int,
+    page: int,
+    page_size: int,
+    headers: Optional[dict] = None
+) -> ORJSONResponse:
+    """PaginatedResponse envelope rendered directly, without response_model validation."""
+    total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
+    return ORJSONResponse({
+        "data": data,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+    }, headers=headers)
+
+
+def cursor_response(
+    data: list,
+    next_cursor: Optional[str],
+    headers: Optional[dict] = None
+) -> ORJSONResponse:
+    """CursorResponse envelope rendered directly, without response_model validation."""
+    return ORJSONResponse(
+        {"data": data, "next_cursor": next_cursor, "success": True, "message": None},
+        headers=headers
+    )
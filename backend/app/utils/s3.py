@@ -0,0 +1,329 @@
+"""
+Minimal S3 client over httpx, signed with AWS Signature Version 4. It
+covers what object storage of uploads needs (objects, listings, multipart
+uploads, batch deletes and presigned URLs) and works with AWS S3 and compatible
+servers such as MinIO.
+"""
+import base64
+import hashlib
+import hmac
+import io
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import AsyncIterator, NamedTuple, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+# Objects per DeleteObjects request (the S3 maximum)
+DELETE_BATCH_SIZE = 1000
+
+
+class S3Error(Exception):
+    """An S3 request failed."""
+
+    def __init__(self, status_code: int, code: str, message: str = ""):
+        super().__init__(f"S3 {status_code} {code}: {message}".rstrip(": "))
+        self.status_code = status_code
+        self.code = code
+
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    last_modified: datetime
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(query: dict[str, str]) -> str:
+    return "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items()))
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _error(response: httpx.Response) -> S3Error:
+    code, message = response.reason_phrase, ""
+    try:
+        root = ET.fromstring(response.content)
+        code = root.findtext("Code") or code
+        message = root.findtext("Message") or ""
+    except ET.ParseError:
+        pass
+    return S3Error(response.status_code, code, message)
+
+
+class _ObjectReader(io.RawIOBase):
+    """Blocking file-like read of an object's body."""
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            self._pending = next(self._chunks, b"")
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        self._response.close()
+        super().close()
+
+
+class S3Client:
+    """
+    One bucket. With path_style, objects are addressed as
+    <endpoint>/<bucket>/<key> (MinIO); otherwise as <bucket>.<endpoint host>/<key> (AWS).
+    """
+
+    def __init__(
+        self, endpoint_url: str, bucket: str, region: str, access_key: str, secret_key: str,
+        path_style: bool = False, timeout: float = 60.0
+    ):
+        endpoint = urlsplit(endpoint_url.rstrip("/"))
+        self.bucket = bucket
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        if path_style:
+            self._base = f"{endpoint.scheme}://{endpoint.netloc}/{bucket}"
+        else:
+            self._base = f"{endpoint.scheme}://{bucket}.{endpoint.netloc}"
+        self._timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+
+    def object_url(self, key: str) -> str:
+        return f"{self._base}/{_uri_encode(key, safe='/-_.~')}"
+
+    def _signing_key(self, day: str) -> bytes:
+        key = _hmac(f"AWS4{self.secret_key}".encode(), day)
+        for part in (self.region, "s3", "aws4_request"):
+            key = _hmac(key, part)
+        return key
+
+    def _signature(
+        self, method: str, url: str, query: dict[str, str], headers: dict[str, str], payload_hash: str,
+        timestamp: str
+    ) -> str:
+        names = sorted(headers)
+        canonical_request = "\n".join([
+            method,
+            urlsplit(url).path or "/",
+            _canonical_query(query),
+            "".join(f"{name}:{headers[name].strip()}\n" for name in names),
+            ";".join(names),
+            payload_hash,
+        ])
+        scope = f"{timestamp[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", timestamp, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        return hmac.new(self._signing_key(timestamp[:8]), string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def _signed_headers(
+        self, method: str, url: str, query: dict[str, str], headers: dict[str, str], payload_hash: str
+    ) -> dict[str, str]:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        signed = {
+            **{name.lower(): value for name, value in headers.items()},
+            "host": urlsplit(url).netloc,
+            "x-amz-date": timestamp,
+            "x-amz-content-sha256": payload_hash,
+        }
+        signature = self._signature(method, url, query, signed, payload_hash, timestamp)
+        credential = f"{self.access_key}/{timestamp[:8]}/{self.region}/s3/aws4_request"
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={credential},"
+            f"SignedHeaders={';'.join(sorted(signed))},Signature={signature}"
+        )
+        del signed["host"]
+        return signed
+
+    def presigned_url(
+        self, method: str, key: str, expires: int, signed_at: Optional[datetime] = None,
+        query: Optional[dict[str, str]] = None, headers: Optional[dict[str, str]] = None
+    ) -> str:
+        """
+        URL granting method on the object for expires seconds from signed_at
+        (default now). headers must be sent as given by whoever uses the URL.
+        """
+        signed_at = signed_at or datetime.now(timezone.utc)
+        timestamp = signed_at.strftime("%Y%m%dT%H%M%SZ")
+        url = self.object_url(key)
+        signed = {"host": urlsplit(url).netloc, **{name.lower(): value for name, value in (headers or {}).items()}}
+        params = {
+            **(query or {}),
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{timestamp[:8]}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": timestamp,
+            "X-Amz-Expires": str(expires),
+            "X-Amz-SignedHeaders": ";".join(sorted(signed)),
+        }
+        signature = self._signature(method, url, params, signed, UNSIGNED_PAYLOAD, timestamp)
+        return f"{url}?{_canonical_query(params)}&X-Amz-Signature={signature}"
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+        return self._client
+
+    async def _request(
+        self, method: str, key: str, query: Optional[dict[str, str]] = None, body: bytes = b"",
+        headers: Optional[dict[str, str]] = None, ok: tuple[int, ...] = (200,)
+    ) -> httpx.Response:
+        query = query or {}
+        url = self.object_url(key)
+        signed = self._signed_headers(
+            method, url, query, headers or {}, hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+        )
+        if query:
+            # Encoded exactly as signed
+            url = f"{url}?{_canonical_query(query)}"
+        response = await self._get_client().request(method, url, content=body or None, headers=signed)
+        if response.status_code not in ok:
+            raise _error(response)
+        return response
+
+    async def put_object(self, key: str, body: bytes, content_type: str):
+        await self._request("PUT", key, body=body, headers={"content-type": content_type})
+
+    async def head_object(self, key: str) -> Optional[int]:
+        """The object's size, or None if it doesn't exist."""
+        response = await self._request("HEAD", key, ok=(200, 404))
+        if response.status_code == 404:
+            return None
+        return int(response.headers["content-length"])
+
+    async def object_sha256(self, key: str) -> Optional[str]:
+        """Hex sha256 the bucket recorded when the object was uploaded with a checksum, if any."""
+        response = await self._request("HEAD", key, headers={"x-amz-checksum-mode": "ENABLED"}, ok=(200, 404))
+        checksum = response.headers.get("x-amz-checksum-sha256", "")
+        # Multipart uploads have a checksum of the part checksums ("...-<parts>")
+        if response.status_code == 404 or not checksum or "-" in checksum:
+            return None
+        return base64.b64decode(checksum).hex()
+
+    async def copy_object(self, source: str, key: str):
+        """Copy an object within the bucket (up to 5 GB, the S3 limit for one request)."""
+        response = await self._request(
+            "PUT", key, headers={"x-amz-copy-source": _uri_encode(f"/{self.bucket}/{source}", safe="/-_.~")}
+        )
+        # Like multipart completion, a copy can fail after the status was sent
+        if b"<Error>" in response.content:
+            raise _error(httpx.Response(500, content=response.content))
+
+    async def list_objects(
+        self, prefix: str = "", continuation_token: Optional[str] = None, max_keys: int = 1000
+    ) -> tuple[list[ObjectInfo], Optional[str]]:
+        """
+        One page of the objects whose key starts with prefix, in key order.
+        Returns: (objects, token of the next page or None)
+        """
+        query = {"list-type": "2", "max-keys": str(max_keys)}
+        if prefix:
+            query["prefix"] = prefix
+        if continuation_token:
+            query["continuation-token"] = continuation_token
+        root = ET.fromstring((await self._request("GET", "", query=query)).content)
+        objects = [
+            ObjectInfo(
+                item.findtext("{*}Key"), int(item.findtext("{*}Size")),
+                datetime.fromisoformat(item.findtext("{*}LastModified").replace("Z", "+00:00"))
+            )
+            for item in root.iterfind("{*}Contents")
+        ]
+        if root.findtext("{*}IsTruncated") == "true":
+            return objects, root.findtext("{*}NextContinuationToken")
+        return objects, None
+
+    async def delete_object(self, key: str):
+        # Deleting a missing object succeeds too
+        await self._request("DELETE", key, ok=(200, 204))
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:
+        """Delete up to DELETE_BATCH_SIZE objects in one request; returns the keys that failed."""
+        root = ET.Element("Delete")
+        ET.SubElement(root, "Quiet").text = "true"
+        for key in keys:
+            ET.SubElement(ET.SubElement(root, "Object"), "Key").text = key
+        body = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+        response = await self._request(
+            "POST", "", query={"delete": ""}, body=body,
+            headers={"content-md5": base64.b64encode(hashlib.md5(body).digest()).decode()}
+        )
+        return [error.findtext("{*}Key") for error in ET.fromstring(response.content).iterfind("{*}Error")]
+
+    async def create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = await self._request("POST", key, query={"uploads": ""}, headers={"content-type": content_type})
+        return ET.fromstring(response.content).findtext("{*}UploadId")
+
+    async def upload_part(self, key: str, upload_id: str, number: int, body: bytes) -> str:
+        """Upload part number (from 1); returns its ETag."""
+        response = await self._request("PUT", key, query={"partNumber": str(number), "uploadId": upload_id}, body=body)
+        return response.headers["etag"]
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, etags: list[str]):
+        root = ET.Element("CompleteMultipartUpload")
+        for number, etag in enumerate(etags, 1):
+            part = ET.SubElement(root, "Part")
+            ET.SubElement(part, "PartNumber").text = str(number)
+            ET.SubElement(part, "ETag").text = etag
+        response = await self._request(
+            "POST", key, query={"uploadId": upload_id}, body=ET.tostring(root, encoding="utf-8")
+        )
+        # Errors after the upload has started are reported with status 200
+        if b"<Error>" in response.content:
+            raise _error(httpx.Response(500, content=response.content))
+
+    async def abort_multipart_upload(self, key: str, upload_id: str):
+        await self._request("DELETE", key, query={"uploadId": upload_id}, ok=(200, 204, 404))
+
+    async def iter_object(self, key: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+        """The object's body, streamed. Raises FileNotFoundError if it doesn't exist."""
+        url = self.object_url(key)
+        headers = self._signed_headers("GET", url, {}, {}, EMPTY_SHA256)
+        async with self._get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            if response.status_code != 200:
+                await response.aread()
+                raise _error(response)
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    def open_object(self, key: str) -> io.RawIOBase:
+        """Blocking read of the object, for worker threads. Raises FileNotFoundError if it doesn't exist."""
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(timeout=self._timeout)
+        url = self.object_url(key)
+        headers = self._signed_headers("GET", url, {}, {}, EMPTY_SHA256)
+        response = self._sync_client.send(self._sync_client.build_request("GET", url, headers=headers), stream=True)
+        if response.status_code != 200:
+            response.read()
+            response.close()
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            raise _error(response)
+        return _ObjectReader(response)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
@@ -1,11 +1,50 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from uuid import UUID
-from jose import JWTError, jwt
+from uuid import UUID, uuid4
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from passlib.context import CryptContext
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost than BCRYPT_ROUNDS are reported by
+# verify_and_update() so they can be upgraded transparently on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt is CPU-bound (~250ms at cost 12) and releases the GIL, so it runs in
+# a bounded thread pool instead of blocking the event loop.
+_password_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash"
+        )
+    return _password_executor
+
+
+def shutdown_password_executor():
+    """Stop the password hashing worker pool."""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False)
+        _password_executor = None
+
+
+async def _run_in_password_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), func, *args)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,36 +57,100 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await _run_in_password_executor(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_in_password_executor(get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses an outdated cost, rehash it.
+    Returns: (is_valid, new_hash_or_None)
+    """
+    return await _run_in_password_executor(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+# JWT key objects are built once: passing the raw secret makes python-jose
+# parse it and construct a new key on every encode/decode.
+_signing_key: Optional[Key] = None
+_verification_key: Optional[Key] = None
+
+
+def init_jwt_keys():
+    """Prepare the JWT signing and verification keys (called at startup)."""
+    global _signing_key, _verification_key
+    _signing_key = jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+    if settings.ALGORITHM.startswith("HS"):
+        _verification_key = _signing_key
+    else:
+        _verification_key = _signing_key.public_key()
+
+
+def _get_signing_key() -> Key:
+    if _signing_key is None:
+        init_jwt_keys()
+    return _signing_key
+
+
+def _get_verification_key() -> Key:
+    if _verification_key is None:
+        init_jwt_keys()
+    return _verification_key
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None
 ) -> str:
-    """Create a JWT access token."""
+    """Create a short-lived JWT access token."""
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid4().hex, "typ": "access"})
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.SECRET_KEY,
+        _get_signing_key(),
         algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token."""
+    """Decode and verify a JWT access token."""
     try:
         payload = jwt.decode(
             token,
-            settings.SECRET_KEY,
+            _get_verification_key(),
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    if payload.get("typ", "access") != "access":
+        return None
+    return payload
+
+
+def generate_refresh_token() -> str:
+    """Generate an opaque refresh token (only its hash is stored)."""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and lookup."""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 def get_user_id_from_token(token: str) -> Optional[UUID]:
@@ -60,35 +163,17 @@ def get_user_id_from_token(token: str) -> Optional[UUID]:
     return None
 
 
-# Admin code management
-_admin_code: Optional[str] = None
-_admin_code_expires: Optional[datetime] = None
-
+# Admin code management (storage and rotation live in app.services.admin_code)
 
 def generate_admin_code() -> str:
-    """Generate a new admin code that expires in 24 hours."""
-    import random
-    global _admin_code, _admin_code_expires
-    _admin_code = str(random.randint(100000, 999999))  # 6 digit numeric code
-    _admin_code_expires = datetime.utcnow() + timedelta(hours=24)
-    return _admin_code
-
-
-def verify_admin_code(code: str) -> bool:
-    """Verify the admin code."""
-    global _admin_code, _admin_code_expires
-    if not _admin_code or not _admin_code_expires:
-        return False
-    if datetime.utcnow() > _admin_code_expires:
-        return False
-    return code == _admin_code
-
-
-def get_current_admin_code() -> Optional[str]:
-    """Get the current admin code if valid."""
-    global _admin_code, _admin_code_expires
-    if not _admin_code or not _admin_code_expires:
-        return None
-    if datetime.utcnow() > _admin_code_expires:
-        return None
-    return _admin_code
+    """Generate a new random admin code."""
+    return secrets.token_hex(4)  # 8 hex characters
+
+
+def hash_admin_code(code: str) -> str:
+    """Keyed hash of an admin code, safe to store and compare across workers."""
+    return hmac.new(
+        settings.SECRET_KEY.encode(),
+        code.strip().lower().encode(),
+        hashlib.sha256
+    ).hexdigest()
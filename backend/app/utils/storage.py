@@ -0,0 +1,401 @@
+"""
+Where uploaded files live. Files are addressed by key, the part of their
+URL after /uploads/ (e.g. "<company id>/<uuid>.pdf"), so stored URLs don't
+depend on the backend.
+
+"local" keeps them under UPLOAD_DIR and the app serves them. "s3" keeps
+them in a bucket of S3 or a compatible server (MinIO): /uploads/<key>
+redirects to a presigned URL, so downloads don't go through the API
+workers, and clients can upload straight to the bucket with a presigned
+PUT. Either way files are written to their key only once complete.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Iterable, Iterator, Optional
+
+import aiofiles
+
+from app.config import settings
+from app.utils.s3 import DELETE_BATCH_SIZE, S3Client, S3Error
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class StoredFile:
+    key: str
+    size: int
+    modified: float  # Unix time
+
+
+def _scan(root: Path, prefix: str) -> Iterator[StoredFile]:
+    """Files under root/prefix, depth first, one directory listing open at a time."""
+    pending = [root / prefix]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    key = Path(entry.path).relative_to(root).as_posix()
+                    yield StoredFile(key, stat.st_size, stat.st_mtime)
+
+
+def scratch_dir() -> tempfile.TemporaryDirectory:
+    """Temporary directory for files on their way into storage; removed on exit."""
+    os.makedirs(settings.UPLOAD_PARTIAL_DIR, exist_ok=True)
+    return tempfile.TemporaryDirectory(dir=settings.UPLOAD_PARTIAL_DIR)
+
+
+class StorageBackend(ABC):
+    """Storage of uploaded files by key."""
+
+    # Whether clients can upload straight to storage with upload_url
+    direct_uploads = False
+
+    @abstractmethod
+    async def save(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        """
+        Store the streamed chunks as key; returns the size. If chunks raises,
+        nothing is stored and the exception propagates.
+        """
+
+    @abstractmethod
+    async def save_file(self, key: str, source: Path, content_type: str):
+        """Move a local file into storage as key."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Blocking read of a stored file, for worker threads. Raises FileNotFoundError."""
+
+    @abstractmethod
+    def local_copy(self, key: str):
+        """Async context manager yielding a path on disk with the file's content."""
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Size of a stored file, or None if there is none."""
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    @abstractmethod
+    async def sha256(self, key: str) -> str:
+        """Hex sha256 of a stored file's content. Raises FileNotFoundError."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Delete a file; True if it is gone (including if it never existed)."""
+
+    @abstractmethod
+    async def move(self, key: str, target: str):
+        """Rename a stored file. Raises FileNotFoundError if there is none."""
+
+    @abstractmethod
+    def iter_files(self, prefix: str = "", batch_size: int = 1000) -> AsyncIterator[list[StoredFile]]:
+        """Every stored file under the prefix (a directory, ending in "/"), in batches, without listing all at once."""
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str], concurrency: int = 8) -> tuple[int, int]:
+        """
+        Delete many files.
+        Returns: (deleted, failed)
+        """
+
+    @abstractmethod
+    def download_url(self, key: str) -> str:
+        """URL a client downloads the file from."""
+
+    def upload_url(self, key: str, sha256: str) -> Optional[tuple[str, dict[str, str]]]:
+        """
+        Presigned URL and headers for a client to PUT the file with the given
+        sha256 straight to storage, or None if the backend can't take direct uploads.
+        """
+        return None
+
+    async def close(self):
+        pass
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files under a directory on local disk."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def save(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        size = 0
+        try:
+            async with aiofiles.open(temp, "wb") as f:
+                async for data in chunks:
+                    size += len(data)
+                    await f.write(data)
+            os.replace(temp, target)
+        finally:
+            if temp.exists():
+                temp.unlink()
+        return size
+
+    async def save_file(self, key: str, source: Path, content_type: str):
+        await asyncio.to_thread(self._move, source, self.path(key))
+
+    @staticmethod
+    def _move(source: Path, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+        except OSError:
+            # Another filesystem: copy next to the target first so it appears complete
+            temp = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(source, temp)
+            os.replace(temp, target)
+            os.remove(source)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[Path]:
+        yield self.path(key)
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    async def sha256(self, key: str) -> str:
+        return await asyncio.to_thread(_file_sha256, self.path(key))
+
+    @staticmethod
+    def _remove(path: Path) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            # Already gone counts as deleted
+            return True
+        except OSError:
+            return False
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._remove, self.path(key))
+
+    async def move(self, key: str, target: str):
+        await asyncio.to_thread(self._move, self.path(key), self.path(target))
+
+    async def iter_files(self, prefix: str = "", batch_size: int = 1000) -> AsyncIterator[list[StoredFile]]:
+        files = _scan(self.root, prefix)
+        while batch := await asyncio.to_thread(lambda: list(islice(files, batch_size))):
+            yield batch
+
+    async def delete_many(self, keys: Iterable[str], concurrency: int = 8) -> tuple[int, int]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def remove(key: str) -> bool:
+            async with semaphore:
+                return await self.delete(key)
+
+        results = await asyncio.gather(*(remove(key) for key in keys))
+        deleted = sum(results)
+        return deleted, len(results) - deleted
+
+    def download_url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Files in an S3 bucket. Streams larger than part_size are stored as
+    multipart uploads, holding one part in memory at a time.
+    """
+
+    direct_uploads = True
+
+    def __init__(self, client: S3Client, part_size: int, presign_expires: int):
+        self.client = client
+        self.part_size = part_size
+        self.presign_expires = presign_expires
+
+    async def save(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        etags: list[str] = []
+        try:
+            async for data in chunks:
+                buffer += data
+                size += len(data)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        upload_id = await self.client.create_multipart_upload(key, content_type)
+                    part = bytes(buffer[:self.part_size])
+                    del buffer[:self.part_size]
+                    etags.append(await self.client.upload_part(key, upload_id, len(etags) + 1, part))
+            if upload_id is None:
+                await self.client.put_object(key, bytes(buffer), content_type)
+                return size
+            if buffer:
+                etags.append(await self.client.upload_part(key, upload_id, len(etags) + 1, bytes(buffer)))
+            await self.client.complete_multipart_upload(key, upload_id, etags)
+        except BaseException:
+            if upload_id is not None:
+                # Parts of an unfinished upload are billed until aborted
+                try:
+                    await asyncio.shield(self.client.abort_multipart_upload(key, upload_id))
+                except Exception:
+                    pass
+            raise
+        return size
+
+    async def save_file(self, key: str, source: Path, content_type: str):
+        async def chunks():
+            async with aiofiles.open(source, "rb") as f:
+                while data := await f.read(1024 * 1024):
+                    yield data
+
+        await self.save(key, chunks(), content_type)
+        source.unlink()
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.open_object(key)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[Path]:
+        with scratch_dir() as directory:
+            path = Path(directory) / Path(key).name
+            async with aiofiles.open(path, "wb") as f:
+                async for data in self.client.iter_object(key):
+                    await f.write(data)
+            yield path
+
+    async def size(self, key: str) -> Optional[int]:
+        return await self.client.head_object(key)
+
+    async def sha256(self, key: str) -> str:
+        recorded = await self.client.object_sha256(key)
+        if recorded:
+            return recorded
+        # The server keeps no checksum for the object: read it back
+        digest = hashlib.sha256()
+        async for data in self.client.iter_object(key):
+            digest.update(data)
+        return digest.hexdigest()
+
+    async def delete(self, key: str) -> bool:
+        try:
+            await self.client.delete_object(key)
+            return True
+        except Exception:
+            return False
+
+    async def delete_many(self, keys: Iterable[str], concurrency: int = 8) -> tuple[int, int]:
+        keys = list(keys)
+        batches = [keys[i:i + DELETE_BATCH_SIZE] for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def remove(batch: list[str]) -> int:
+            async with semaphore:
+                try:
+                    return len(await self.client.delete_objects(batch))
+                except Exception:
+                    return len(batch)
+
+        failed = sum(await asyncio.gather(*(remove(batch) for batch in batches)))
+        return len(keys) - failed, failed
+
+    async def move(self, key: str, target: str):
+        try:
+            await self.client.copy_object(key, target)
+        except S3Error as e:
+            if e.status_code == 404:
+                raise FileNotFoundError(key) from e
+            raise
+        await self.client.delete_object(key)
+
+    async def iter_files(self, prefix: str = "", batch_size: int = 1000) -> AsyncIterator[list[StoredFile]]:
+        token = None
+        while True:
+            # S3 returns at most 1000 keys per page
+            objects, token = await self.client.list_objects(prefix, token, min(batch_size, 1000))
+            if objects:
+                yield [StoredFile(o.key, o.size, o.last_modified.timestamp()) for o in objects]
+            if token is None:
+                return
+
+    def _signed_at(self) -> datetime:
+        """
+        Now, rounded down to half the URL lifetime: repeated downloads get the
+        same URL for a while, so browsers can cache the file.
+        """
+        window = max(self.presign_expires // 2, 1)
+        now = int(datetime.now(timezone.utc).timestamp())
+        return datetime.fromtimestamp(now - now % window, timezone.utc)
+
+    def download_url(self, key: str) -> str:
+        return self.client.presigned_url("GET", key, self.presign_expires, signed_at=self._signed_at())
+
+    def upload_url(self, key: str, sha256: str) -> Optional[tuple[str, dict[str, str]]]:
+        # Signed in, so the bucket rejects a body with any other content
+        headers = {"x-amz-checksum-sha256": base64.b64encode(bytes.fromhex(sha256)).decode()}
+        return self.client.presigned_url("PUT", key, self.presign_expires, headers=headers), headers
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Get the process-wide storage for the configured backend."""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            client = S3Client(
+                settings.S3_ENDPOINT_URL or f"https://s3.{settings.S3_REGION}.amazonaws.com",
+                settings.S3_BUCKET, settings.S3_REGION, settings.S3_ACCESS_KEY, settings.S3_SECRET_KEY,
+                path_style=settings.S3_PATH_STYLE
+            )
+            # S3 requires parts of at least 5 MB
+            part_size = max(settings.S3_PART_SIZE_MB, 5) * 1024 * 1024
+            _storage = S3StorageBackend(client, part_size, settings.S3_PRESIGN_EXPIRE_SECONDS)
+        else:
+            _storage = LocalStorageBackend(Path(settings.UPLOAD_DIR))
+    return _storage
+
+
+async def close_storage():
+    """Close connections to the storage (called on shutdown)."""
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
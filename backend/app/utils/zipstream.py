@@ -0,0 +1,114 @@
+import io
+import logging
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import BinaryIO, Callable, Iterable, Iterator
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 128 * 1024
+
+# Formats that are already compressed; deflating them again only costs CPU
+STORED_EXTENSIONS = {
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".tif", ".tiff",
+    ".zip", ".rar", ".7z", ".gz", ".bz2", ".xz",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+    ".mp3", ".mp4", ".mov", ".avi",
+}
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    name: str  # path inside the archive
+    key: str  # file in storage
+    modified: datetime
+    size: int
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable output: zipfile writes data descriptors, and the bytes are drained after every write."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_info(entry: ZipEntry) -> zipfile.ZipInfo:
+    # ZIP can't represent timestamps before 1980
+    modified = max(entry.modified, datetime(1980, 1, 1))
+    info = zipfile.ZipInfo(entry.name, date_time=modified.timetuple()[:6])
+    info.external_attr = 0o644 << 16
+    if PurePosixPath(entry.key).suffix.lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def stream_zip(
+    entries: Iterable[ZipEntry], open_file: Callable[[str], BinaryIO], compresslevel: int = 6
+) -> Iterator[bytes]:
+    """
+    ZIP archive of the entries, read with open_file(key), generated chunk by
+    chunk. Memory use is a few chunks whatever the archive size; missing
+    files are skipped. Synchronous, so StreamingResponse runs it in the threadpool.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        for entry in entries:
+            try:
+                source = open_file(entry.key)
+            except OSError as e:
+                logger.warning(f"Skipping {entry.name} in ZIP: {e}")
+                continue
+            with source:
+                info = _zip_info(entry)
+                with archive.open(info, "w", force_zip64=entry.size > zipfile.ZIP64_LIMIT) as target:
+                    while chunk := source.read(CHUNK_SIZE):
+                        target.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
+
+
+def unique_name(name: str, used: set[str]) -> str:
+    """name, or "name (2).ext", ... if it is already taken in the archive."""
+    candidate = name
+    stem, dot, suffix = name.rpartition(".")
+    if not dot or "/" in suffix:
+        stem, suffix = name, ""
+    counter = 2
+    while candidate.lower() in used:
+        candidate = f"{stem} ({counter}).{suffix}" if suffix else f"{stem} ({counter})"
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def safe_name(name: str) -> str:
+    """A file or folder name usable as one path component."""
+    cleaned = name.replace("/", "_").replace("\\", "_").strip().strip(".")
+    return cleaned or "_"
+
+
+def zip_response_headers(filename: str) -> dict:
+    """Content-Disposition for downloading the archive, with a UTF-8 file name."""
+    fallback = filename.encode("ascii", "replace").decode().replace("?", "_").replace('"', "_")
+    return {"Content-Disposition": f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"}
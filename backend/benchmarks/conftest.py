@@ -0,0 +1,191 @@
+"""
+API benchmark harness.
+
+Runs the hot list/statistics endpoints against a seeded tenant in a separate
+database and compares latency and SQL query counts with baselines.json.
+
+Usage (from backend/):
+    pytest benchmarks                      # compare with baselines
+    pytest benchmarks --bench-update       # record new baselines
+    pytest benchmarks --bench-scale 0.1    # smaller tenant (query counts only)
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.utils.security import create_access_token
+from benchmarks.seed import expected_counts, find_tenant, seed_tenant
+
+BENCH_DIR = Path(__file__).parent
+BASELINES_FILE = BENCH_DIR / "baselines.json"
+RESULTS_FILE = BENCH_DIR / "results.json"
+
+BENCH_DATABASE_URL = os.environ.get(
+    "BENCH_DATABASE_URL", settings.DATABASE_URL.replace("crm_db", "crm_bench_db")
+)
+
+WARMUP_ROUNDS = 2
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-scale", type=float, default=1.0, help="Tenant size relative to the full-size tenant")
+    group.addoption("--bench-rounds", type=int, default=10, help="Timed requests per endpoint")
+    group.addoption("--bench-tolerance", type=float, default=0.25, help="Allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    group.addoption("--bench-update", action="store_true", help="Write this run's results as the new baselines")
+    group.addoption("--bench-reseed", action="store_true", help="Recreate the tenant even if one exists")
+
+
+@pytest.fixture(scope="session")
+def event_loop() -> Generator:
+    """Create event loop for the benchmark session."""
+    loop = asyncio.get_event_loop_policy().new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def bench_options(request) -> dict:
+    config = request.config
+    return {
+        "scale": config.getoption("--bench-scale"),
+        "rounds": config.getoption("--bench-rounds"),
+        "tolerance": config.getoption("--bench-tolerance"),
+        "update": config.getoption("--bench-update"),
+        "reseed": config.getoption("--bench-reseed"),
+    }
+
+
+@pytest.fixture(scope="session")
+async def bench_engine():
+    engine = create_async_engine(BENCH_DATABASE_URL, pool_size=5)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def tenant(bench_engine, bench_options):
+    """The seeded tenant, reusing an existing one of the right size."""
+    existing = None if bench_options["reseed"] else await find_tenant(bench_engine)
+    if existing and existing.counts == expected_counts(bench_options["scale"]):
+        return existing
+    return await seed_tenant(bench_engine, scale=bench_options["scale"])
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture(scope="session")
+def query_counter(bench_engine) -> QueryCounter:
+    counter = QueryCounter()
+    event.listen(bench_engine.sync_engine, "after_cursor_execute", counter)
+    return counter
+
+
+@pytest.fixture(scope="session")
+async def bench_client(bench_engine, tenant):
+    session_maker = async_sessionmaker(bench_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def auth_headers(tenant) -> dict:
+    """Bearer headers per benchmarked role."""
+    return {
+        "director": {"Authorization": f"Bearer {create_access_token({'sub': str(tenant.director_id)})}"},
+        "employee": {"Authorization": f"Bearer {create_access_token({'sub': str(tenant.employee_ids[0])})}"},
+        "admin": {"Authorization": f"Bearer {create_access_token({'sub': str(tenant.admin_id)})}"},
+    }
+
+
+@pytest.fixture(scope="session")
+def bench_results(bench_options):
+    """Collects results and writes results.json (and baselines.json with --bench-update)."""
+    results: dict = {}
+    yield results
+    if not results:
+        return
+    report = {"scale": bench_options["scale"], "rounds": bench_options["rounds"], "endpoints": results}
+    RESULTS_FILE.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    if bench_options["update"]:
+        BASELINES_FILE.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def load_baselines() -> dict:
+    if not BASELINES_FILE.exists():
+        return {}
+    return json.loads(BASELINES_FILE.read_text())
+
+
+@pytest.fixture
+def benchmark_endpoint(bench_client, query_counter, bench_options, bench_results):
+    """
+    Time GET requests to an endpoint and check them against the baseline.
+    Query counts must not grow; p50 latency may grow by --bench-tolerance
+    (only compared when the baseline was recorded at the same scale).
+    """
+    async def run(name: str, url: str, headers: dict) -> dict:
+        for _ in range(WARMUP_ROUNDS):
+            response = await bench_client.get(url, headers=headers)
+            assert response.status_code == 200, response.text
+
+        timings, queries = [], []
+        for _ in range(bench_options["rounds"]):
+            before = query_counter.count
+            started = time.perf_counter()
+            response = await bench_client.get(url, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(query_counter.count - before)
+            assert response.status_code == 200, response.text
+
+        timings.sort()
+        result = {
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            # Steady state: ignore the occasional auth-cache refill
+            "queries": min(queries),
+            "response_bytes": len(response.content),
+        }
+        bench_results[name] = result
+
+        baselines = load_baselines()
+        baseline = baselines.get("endpoints", {}).get(name)
+        if bench_options["update"] or baseline is None:
+            return result
+
+        assert result["queries"] <= baseline["queries"], (
+            f"{name}: {result['queries']} queries per request, baseline {baseline['queries']}"
+        )
+        if baselines.get("scale") == bench_options["scale"]:
+            limit = baseline["p50_ms"] * (1 + bench_options["tolerance"])
+            assert result["p50_ms"] <= limit, (
+                f"{name}: p50 {result['p50_ms']}ms, baseline {baseline['p50_ms']}ms (limit {limit:.1f}ms)"
+            )
+        return result
+
+    return run
@@ -0,0 +1,90 @@
+"""
+Login throughput benchmark.
+
+Runs N concurrent password verifications (the CPU-heavy part of /auth/login)
+while a probe coroutine measures how late the event loop wakes it up.
+Compares verifying inline on the event loop with the worker pool used by
+the login endpoint.
+
+Usage (from backend/):
+    python -m benchmarks.login_throughput --logins 32 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.utils.security import (
+    pwd_context, verify_password, verify_password_async, shutdown_password_executor
+)
+
+PROBE_INTERVAL = 0.01  # seconds
+
+
+async def _probe_loop_lag(samples: list[float], stop: asyncio.Event):
+    """Record how much later than requested the event loop resumes us."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    return verify_password(password, hashed)
+
+
+async def _pooled_login(password: str, hashed: str) -> bool:
+    return await verify_password_async(password, hashed)
+
+
+async def run_scenario(name: str, login, logins: int, password: str, hashed: str) -> dict:
+    samples: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(samples, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    assert all(results)
+
+    samples.sort()
+    return {
+        "scenario": name,
+        "logins": logins,
+        "elapsed_s": elapsed,
+        "logins_per_s": logins / elapsed,
+        "lag_p50_ms": statistics.median(samples) * 1000 if samples else 0.0,
+        "lag_p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000 if samples else 0.0,
+        "lag_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+async def main(logins: int, rounds: int):
+    password = "benchmark-password"
+    hashed = pwd_context.hash(password, rounds=rounds)
+
+    rows = [
+        await run_scenario("inline", _inline_login, logins, password, hashed),
+        await run_scenario("worker-pool", _pooled_login, logins, password, hashed),
+    ]
+    shutdown_password_executor()
+
+    print(f"bcrypt rounds={rounds}, concurrent logins={logins}")
+    print(f"{'scenario':<12} {'logins/s':>9} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<12} {row['logins_per_s']:>9.1f} "
+            f"{row['lag_p50_ms']:>11.1f} {row['lag_p99_ms']:>11.1f} {row['lag_max_ms']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="number of concurrent logins")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds))
@@ -0,0 +1,293 @@
+"""
+Synthetic tenant generator for the API benchmarks.
+
+Seeds one large declarant company (clients, declarations with vehicles,
+certificates with actions, tasks and notifications) plus a number of small
+companies so admin-wide statistics have something to count. Rows are
+written with COPY, so a full-size tenant takes well under a minute.
+
+Usage (from backend/):
+    python -m benchmarks.seed --scale 0.1 --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.database import Base
+from app.models import Company
+from app.models.declaration import DeclarationMode, VehicleType
+from app.models.certificate import CertificateStatus
+from app.models.task import TaskPriority, TaskStatus
+from app.models.notification import NotificationType
+from app.services.company_stats import rebuild_company_stats
+from app.utils.security import get_password_hash
+
+# Full-size tenant; multiplied by --scale
+TENANT_SIZE = {
+    "employees": 25,
+    "clients": 10_000,
+    "declarations": 200_000,
+    "certificates": 50_000,
+    "tasks": 100_000,
+    "notifications": 100_000,
+    "other_companies": 200,
+}
+VEHICLES_PER_DECLARATION = (1, 3)
+ACTIONS_PER_CERTIFICATE = (1, 4)
+
+BENCH_COMPANY_INN = "900000001"
+BENCH_PASSWORD = "benchmark"
+
+COPY_BATCH = 20_000
+
+
+@dataclass
+class SeededTenant:
+    company_id: uuid.UUID
+    director_id: uuid.UUID
+    admin_id: uuid.UUID
+    employee_ids: list[uuid.UUID] = field(default_factory=list)
+    counts: dict = field(default_factory=dict)
+
+
+def _scaled(scale: float) -> dict:
+    return {name: max(1, int(count * scale)) for name, count in TENANT_SIZE.items()}
+
+
+async def _copy(conn, table: str, rows: list[dict]):
+    """Bulk-load rows with COPY through the raw asyncpg connection."""
+    if not rows:
+        return
+    raw = await conn.get_raw_connection()
+    columns = list(rows[0].keys())
+    for start in range(0, len(rows), COPY_BATCH):
+        batch = rows[start:start + COPY_BATCH]
+        await raw.driver_connection.copy_records_to_table(
+            table, records=[tuple(r[c] for c in columns) for r in batch], columns=columns
+        )
+
+
+async def find_tenant(engine: AsyncEngine) -> SeededTenant | None:
+    """Return the seeded tenant if the database already has one."""
+    async with engine.connect() as conn:
+        company = (await conn.execute(
+            select(Company.id, Company.director_id).where(Company.inn == BENCH_COMPANY_INN)
+        )).first()
+        if company is None:
+            return None
+        admin_id = (await conn.execute(
+            text("SELECT id FROM users WHERE role = 'ADMIN' ORDER BY created_at LIMIT 1")
+        )).scalar()
+        employee_ids = (await conn.execute(
+            text("SELECT id FROM users WHERE company_id = :c AND role = 'EMPLOYEE'"),
+            {"c": company.id}
+        )).scalars().all()
+        counts = {}
+        for table, column in (
+            ("clients", "company_id"), ("declarations", "company_id"),
+            ("certificates", "company_id"), ("tasks", "target_company_id"),
+        ):
+            counts[table] = (await conn.execute(
+                text(f"SELECT count(*) FROM {table} WHERE {column} = :c"), {"c": company.id}
+            )).scalar()
+    return SeededTenant(
+        company_id=company.id,
+        director_id=company.director_id,
+        admin_id=admin_id,
+        employee_ids=list(employee_ids),
+        counts=counts,
+    )
+
+
+async def reset_schema(engine: AsyncEngine):
+    """Drop and recreate every table (drop_all can't order the users/companies cycle)."""
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_tenant(engine: AsyncEngine, scale: float = 1.0, seed: int = 1234) -> SeededTenant:
+    """Seed a fresh schema with the benchmark tenant."""
+    rng = random.Random(seed)
+    size = _scaled(scale)
+    now = datetime.utcnow()
+    today = date.today()
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    def ts(days_back: int = 365) -> datetime:
+        return now - timedelta(seconds=rng.randint(0, days_back * 86400))
+
+    def user_row(company_id, role, email, activity="DECLARANT"):
+        created = ts()
+        return {
+            "id": uuid.uuid4(), "email": email, "password_hash": password_hash,
+            "full_name": f"Bench {email.split('@')[0]}", "phone": "998900000000",
+            "activity_type": activity, "company_id": company_id, "role": role,
+            "is_blocked": False, "created_at": created, "updated_at": created,
+        }
+
+    await reset_schema(engine)
+
+    company_id = uuid.uuid4()
+    companies = [{
+        "id": company_id, "name": "Benchmark Logistics", "inn": BENCH_COMPANY_INN,
+        "activity_type": "DECLARANT", "is_blocked": False, "director_id": None,
+        "created_at": ts(), "updated_at": now,
+    }]
+    for i in range(size["other_companies"]):
+        created = ts()
+        companies.append({
+            "id": uuid.uuid4(), "name": f"Company {i}", "inn": f"{800000000 + i}",
+            "activity_type": rng.choice(["DECLARANT", "CERTIFICATION"]), "is_blocked": False,
+            "director_id": None, "created_at": created, "updated_at": created,
+        })
+
+    admin = user_row(None, "ADMIN", "admin@admin.com")
+    director = user_row(company_id, "DIRECTOR", "director@bench.local")
+    employees = [
+        user_row(company_id, "EMPLOYEE", f"employee{i}@bench.local")
+        for i in range(size["employees"])
+    ]
+    other_directors = [
+        user_row(c["id"], "DIRECTOR", f"director{i}@company.local", c["activity_type"])
+        for i, c in enumerate(companies[1:])
+    ]
+    staff = [director] + employees
+    staff_ids = [u["id"] for u in staff]
+
+    clients = []
+    for i in range(size["clients"]):
+        created = ts()
+        clients.append({
+            "id": uuid.uuid4(), "company_name": f"Client {i}", "inn": f"{300000000 + i}",
+            "director_name": f"Director {i}", "note": None, "access_type": "PUBLIC",
+            "owner_id": rng.choice(staff_ids), "company_id": company_id,
+            "created_at": created, "updated_at": created,
+        })
+    client_ids = [c["id"] for c in clients]
+
+    modes = [m.name for m in DeclarationMode]
+    vehicle_types = [v.name for v in VehicleType]
+    declarations, vehicles = [], []
+    for i in range(size["declarations"]):
+        created = ts()
+        declaration_id = uuid.uuid4()
+        declarations.append({
+            "id": declaration_id, "post_number": f"{rng.randint(0, 99999):05d}",
+            "date": created.date(), "declaration_number": f"{i % 10_000_000:07d}",
+            "client_id": rng.choice(client_ids), "mode": rng.choice(modes), "note": None,
+            "group_id": None, "owner_id": rng.choice(staff_ids), "company_id": company_id,
+            "created_at": created, "updated_at": created,
+        })
+        for _ in range(rng.randint(*VEHICLES_PER_DECLARATION)):
+            vehicles.append({
+                "id": uuid.uuid4(), "declaration_id": declaration_id,
+                "number": f"01A{rng.randint(100, 999)}AA", "type": rng.choice(vehicle_types),
+            })
+
+    statuses = [s.name for s in CertificateStatus]
+    certificates, actions = [], []
+    for i in range(size["certificates"]):
+        created = ts()
+        certificate_id = uuid.uuid4()
+        owner_id = rng.choice(staff_ids)
+        certificates.append({
+            "id": certificate_id, "certifier_company_id": None, "type": "Сертификат соответствия",
+            "deadline": today + timedelta(days=rng.randint(-60, 60)), "number": f"UZ.{i:08d}",
+            "number_to_be_filled_by_certifier": False, "client_id": rng.choice(client_ids),
+            "note": None, "sent_date": created, "status": rng.choice(statuses),
+            "owner_id": owner_id, "assigned_to_id": None, "company_id": company_id,
+            "declarant_company_id": None, "created_at": created, "updated_at": created,
+        })
+        for n in range(rng.randint(*ACTIONS_PER_CERTIFICATE)):
+            actions.append({
+                "id": uuid.uuid4(), "certificate_id": certificate_id, "action": f"Действие {n}",
+                "note": None, "performed_by_id": owner_id,
+                "created_at": created + timedelta(hours=n),
+            })
+
+    priorities = [p.name for p in TaskPriority]
+    task_statuses = [s.name for s in TaskStatus]
+    tasks = []
+    for i in range(size["tasks"]):
+        created = ts()
+        tasks.append({
+            "id": uuid.uuid4(), "target_company_id": company_id,
+            "target_employee_id": rng.choice(staff_ids), "name": f"Задача {i}", "note": None,
+            "priority": rng.choice(priorities), "status": rng.choice(task_statuses),
+            "deadline": today + timedelta(days=rng.randint(-30, 60)),
+            "created_by_user_id": director["id"], "created_by_company_id": company_id,
+            "created_at": created, "updated_at": created,
+        })
+
+    notification_types = [t.name for t in NotificationType]
+    notifications = [{
+        "id": uuid.uuid4(), "user_id": rng.choice(staff_ids), "title": "Уведомление",
+        "message": f"Сообщение {i}", "type": rng.choice(notification_types),
+        "is_read": rng.random() < 0.7, "link": None, "created_at": ts(90),
+    } for i in range(size["notifications"])]
+
+    async with engine.begin() as conn:
+        await _copy(conn, "companies", companies)
+        await _copy(conn, "users", [admin] + staff + other_directors)
+        await conn.execute(
+            text("UPDATE companies SET director_id = :d WHERE id = :c"),
+            {"d": director["id"], "c": company_id}
+        )
+        for company, user in zip(companies[1:], other_directors):
+            await conn.execute(
+                text("UPDATE companies SET director_id = :d WHERE id = :c"),
+                {"d": user["id"], "c": company["id"]}
+            )
+        await _copy(conn, "clients", clients)
+        await _copy(conn, "declarations", declarations)
+        await _copy(conn, "vehicles", vehicles)
+        await _copy(conn, "certificates", certificates)
+        await _copy(conn, "certificate_actions", actions)
+        await _copy(conn, "tasks", tasks)
+        await _copy(conn, "notifications", notifications)
+        # COPY bypasses the ORM hooks that maintain the dashboard counters
+        await rebuild_company_stats(conn)
+        await conn.execute(text("ANALYZE"))
+
+    return SeededTenant(
+        company_id=company_id,
+        director_id=director["id"],
+        admin_id=admin["id"],
+        employee_ids=[u["id"] for u in employees],
+        counts={
+            "clients": len(clients), "declarations": len(declarations),
+            "certificates": len(certificates), "tasks": len(tasks),
+        },
+    )
+
+
+def expected_counts(scale: float) -> dict:
+    size = _scaled(scale)
+    return {name: size[name] for name in ("clients", "declarations", "certificates", "tasks")}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--database-url", required=True, help="Database to (re)create; all its data is dropped")
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    try:
+        tenant = await seed_tenant(engine, scale=args.scale, seed=args.seed)
+        print(f"Seeded company {tenant.company_id}: {tenant.counts}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
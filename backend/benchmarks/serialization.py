@@ -0,0 +1,107 @@
+"""
+List serialization benchmark.
+
+Measures CPU time to turn a page of certificates into response bytes.
+It compares FastAPI's default path with the orjson fast path used by the
+list endpoints. The default path builds response models, re-validates them
+against response_model, runs jsonable_encoder and then json.dumps. The fast
+path builds plain dicts and encodes them once with ORJSONResponse.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.v1.certificates import certificate_to_dict, certificate_to_response
+from app.models.certificate import CertificateStatus
+from app.schemas import CertificateResponse, PaginatedResponse
+from app.utils.responses import paginated_response
+
+
+def fake_certificates(rows: int, seed: int = 1234) -> list[SimpleNamespace]:
+    """Certificate-shaped objects with a few actions each (no database needed)."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    statuses = list(CertificateStatus)
+    certificates = []
+    for i in range(rows):
+        certificate_id = uuid.uuid4()
+        owner = SimpleNamespace(id=uuid.uuid4(), full_name=f"Declarant {i}")
+        actions = [
+            SimpleNamespace(
+                id=uuid.uuid4(), certificate_id=certificate_id, action=f"Действие {n}",
+                note=None, attached_files=[], performed_by_id=owner.id,
+                created_at=now + timedelta(hours=n),
+            ) for n in range(rng.randint(1, 4))
+        ]
+        certificates.append(SimpleNamespace(
+            id=certificate_id, certifier_company_id=None, type="Сертификат соответствия",
+            deadline=date.today() + timedelta(days=rng.randint(-60, 60)), number=f"UZ.{i:08d}",
+            number_to_be_filled_by_certifier=False, client_id=uuid.uuid4(), note=None,
+            sent_date=now, status=rng.choice(statuses), owner_id=owner.id, assigned_to_id=None,
+            company_id=uuid.uuid4(), certifier_company=None, assigned_to=None,
+            declarant_company_id=None, declarant_company=None, owner=owner,
+            linked_declarations=[], attached_documents=[], attached_folders=[],
+            actions=actions, created_at=now, updated_at=now,
+        ))
+    return certificates
+
+
+def render_default(certificates, field) -> bytes:
+    """What FastAPI does for a route returning response models."""
+    content = PaginatedResponse.create(
+        data=[certificate_to_response(c) for c in certificates],
+        total=len(certificates), page=1, page_size=len(certificates),
+    )
+    value = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def render_fast(certificates, field) -> bytes:
+    return paginated_response(
+        data=[certificate_to_dict(c) for c in certificates],
+        total=len(certificates), page=1, page_size=len(certificates),
+    ).body
+
+
+def measure(render, certificates, field, repeat: int) -> float:
+    """Best-of-repeat CPU seconds for one render."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        render(certificates, field)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main(rows: int, repeat: int):
+    certificates = fake_certificates(rows)
+    field = create_response_field(
+        name="response", type_=PaginatedResponse[CertificateResponse], mode="serialization"
+    )
+    body = render_fast(certificates, field)
+
+    print(f"certificates={rows}, body={len(body) / 1024:.0f} KiB, best of {repeat}")
+    print(f"{'path':<10} {'cpu ms':>8} {'ms / 1k rows':>13}")
+    for name, render in (("default", render_default), ("orjson", render_fast)):
+        seconds = measure(render, certificates, field, repeat)
+        print(f"{name:<10} {seconds * 1000:>8.1f} {seconds * 1000 * 1000 / rows:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="certificates per response")
+    parser.add_argument("--repeat", type=int, default=20, help="timed repetitions per path")
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
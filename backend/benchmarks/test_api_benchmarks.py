@@ -0,0 +1,23 @@
+import pytest
+
+# Share the session event loop with the seeded engine and client fixtures
+pytestmark = pytest.mark.asyncio(scope="session")
+
+ENDPOINTS = [
+    ("get_declarations", "/api/v1/declarations?page=1&page_size=20", "director"),
+    ("get_declarations_mine", "/api/v1/declarations?page=1&page_size=20&owner_type=mine", "employee"),
+    ("get_certificates", "/api/v1/certificates?page=1&page_size=20", "director"),
+    ("get_tasks", "/api/v1/tasks?page=1&page_size=20", "director"),
+    ("get_clients", "/api/v1/clients", "director"),
+    ("get_dashboard_stats", "/api/v1/dashboard", "director"),
+    ("get_admin_stats", "/api/v1/dashboard/admin", "admin"),
+]
+
+
+class TestApiBenchmarks:
+    """Latency and query-count benchmarks for the hot endpoints."""
+    
+    @pytest.mark.parametrize("name,url,role", ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+    async def test_endpoint(self, benchmark_endpoint, auth_headers, name, url, role):
+        """Test the endpoint stays within its latency and query baselines."""
+        await benchmark_endpoint(name, url, auth_headers[role])
@@ -8,10 +8,29 @@ logger = logging.getLogger(__name__)
 
 
 class CRMTelegramBot:
-    def __init__(self, token: str, admin_chat_id: Optional[str] = None):
+    def __init__(
+        self,
+        token: str,
+        admin_chat_id: Optional[str] = None,
+        service: Optional["TelegramService"] = None
+    ):
         self.token = token
         self.admin_chat_id = admin_chat_id
         self.application: Optional[Application] = None
+        self._service = service
+    
+    @property
+    def service(self) -> "TelegramService":
+        """Telegram client used for outgoing messages (the app-wide one when available)."""
+        if self._service is None:
+            from app.services.telegram import TelegramService, get_telegram_service
+
+            shared = get_telegram_service()
+            if shared is not None and shared.token == self.token:
+                self._service = shared
+            else:
+                self._service = TelegramService(self.token)
+        return self._service
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command."""
@@ -38,22 +57,12 @@ class CRMTelegramBot:
     
     async def send_message(self, chat_id: str, message: str):
         """Send a message to a specific chat."""
-        if self.application:
-            await self.application.bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+        await self.service.send_message(chat_id, message)
     
     async def send_admin_code(self, code: str):
         """Send admin code to the admin chat."""
         if self.admin_chat_id:
-            await self.send_message(
-                self.admin_chat_id,
-                f"🔐 <b>Код администратора</b>\n\n"
-                f"<code>{code}</code>\n\n"
-                f"⏰ Действителен 24 часа"
-            )
+            await self.service.send_admin_code(code, self.admin_chat_id)
     
     async def send_notification(self, chat_id: str, title: str, message: str, notification_type: str = "info"):
         """Send a notification to a user."""
@@ -70,9 +79,19 @@ class CRMTelegramBot:
             f"{icon} <b>{title}</b>\n\n{message}"
         )
     
+    async def _post_shutdown(self, application: Application):
+        """Close the outgoing Telegram client when polling stops."""
+        if self._service is not None:
+            await self._service.stop()
+    
     def run(self):
         """Run the bot."""
-        self.application = Application.builder().token(self.token).build()
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Add handlers
         self.application.add_handler(CommandHandler("start", self.start))
@@ -85,9 +104,16 @@ class CRMTelegramBot:
 
 async def send_telegram_message(token: str, chat_id: str, message: str):
     """Utility function to send a message without running the full bot."""
-    from telegram import Bot
-    bot = Bot(token=token)
-    await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+    from app.services.telegram import TelegramService, get_telegram_service
+    
+    service = get_telegram_service()
+    if service is not None and service.token == token:
+        await service.send_message(chat_id, message)
+        return
+    
+    # No app-wide client for this token (e.g. a one-off script) - use a short-lived one
+    async with TelegramService(token) as service:
+        await service.send_message(chat_id, message)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, instrument_engine
 from app.config import settings
 
 # Test database URL
@@ -29,6 +29,8 @@ async def test_engine():
         poolclass=NullPool,
         echo=False
     )
+    # Query counting and N+1 detection for requests made by the tests
+    instrument_engine(engine)
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,112 @@
+import uuid
+
+from app.services.auth_cache import (
+    BloomFilter, TokenRevocationCache, UserCache, is_cut_off, revocation_cache
+)
+from app.models import User
+
+
+class TestBloomFilter:
+    """Test the revocation Bloom filter."""
+    
+    def test_no_false_negatives(self):
+        """Test every added item is reported as present."""
+        bloom = BloomFilter(capacity=1000)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        
+        assert all(item in bloom for item in items)
+    
+    def test_low_false_positive_rate(self):
+        """Test unseen items are rarely reported as present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+class TestTokenRevocationCache:
+    """Test the in-memory revocation view."""
+    
+    def test_revoked_jti_is_confirmed(self):
+        """Test locally revoked tokens don't need a database lookup."""
+        cache = TokenRevocationCache(capacity=100)
+        cache.add_revoked("abc")
+        
+        assert cache.might_be_revoked("abc")
+        assert cache.confirmed("abc") is True
+        assert not cache.might_be_revoked("def")
+    
+    def test_cutoff_only_moves_forward(self):
+        """Test an older cutoff doesn't override a newer one."""
+        cache = TokenRevocationCache(capacity=100)
+        cache.set_cutoff("user", 200)
+        cache.set_cutoff("user", 100)
+        
+        assert cache.get_cutoff("user") == 200
+    
+    def test_replace_drops_stale_entries(self):
+        """Test a resync forgets jtis no longer in the store."""
+        cache = TokenRevocationCache(capacity=100)
+        cache.add_revoked("old")
+        cache.replace(["new"], {"user": 100})
+        
+        assert cache.might_be_revoked("new")
+        assert cache.confirmed("old") is None
+        assert cache.get_cutoff("user") == 100
+
+
+class TestIsCutOff:
+    """Test per-user token cutoffs."""
+    
+    def test_blocked_epoch_claim(self):
+        """Test tokens issued under an older cutoff are rejected."""
+        user_id = str(uuid.uuid4())
+        assert not is_cut_off({"sub": user_id, "bep": 0})
+        
+        revocation_cache.set_cutoff(user_id, 1000)
+        assert is_cut_off({"sub": user_id, "bep": 0})
+        assert not is_cut_off({"sub": user_id, "bep": 1000})
+    
+    def test_falls_back_to_issued_at(self):
+        """Test tokens without the epoch claim are checked by iat."""
+        user_id = str(uuid.uuid4())
+        revocation_cache.set_cutoff(user_id, 1000)
+        
+        assert is_cut_off({"sub": user_id, "iat": 999})
+        assert not is_cut_off({"sub": user_id, "iat": 1001})
+
+
+class TestUserCache:
+    """Test the per-process user cache."""
+    
+    def _user(self, email="a@example.com"):
+        return User(id=uuid.uuid4(), email=email, password_hash="x", full_name="A")
+    
+    def test_set_and_get(self):
+        """Test cached values round-trip."""
+        cache = UserCache(ttl_seconds=60)
+        user = self._user()
+        cache.set(user)
+        
+        assert cache.get(str(user.id))["email"] == "a@example.com"
+    
+    def test_expired_entry_is_dropped(self):
+        """Test entries expire after the TTL."""
+        cache = UserCache(ttl_seconds=-1)
+        user = self._user()
+        cache.set(user)
+        
+        assert cache.get(str(user.id)) is None
+    
+    def test_invalidate(self):
+        """Test invalidation removes the entry."""
+        cache = UserCache(ttl_seconds=60)
+        user = self._user()
+        cache.set(user)
+        cache.invalidate(str(user.id))
+        
+        assert cache.get(str(user.id)) is None
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from app.services.avatars import avatar_urls
+from app.utils.files import UploadStaticFiles
+from app.utils.images import render_avatar
+
+
+def _jpeg(size, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG", **kwargs)
+    return buffer.getvalue()
+
+
+class TestRenderAvatar:
+    """Test avatar processing."""
+
+    def test_square_sizes(self, tmp_path):
+        """Test a photo is cropped to squares of every size, named by content hash."""
+        content_hash = render_avatar(_jpeg((1200, 800)), str(tmp_path), [64, 256])
+
+        for size in (64, 256):
+            image = Image.open(tmp_path / f"{content_hash}-{size}.webp")
+            assert image.size == (size, size)
+            assert image.format == "WEBP"
+
+    def test_metadata_is_dropped(self, tmp_path):
+        """Test EXIF data (camera, location) is not carried over."""
+        exif = Image.Exif()
+        exif[0x010F] = "PhoneMaker"
+
+        content_hash = render_avatar(_jpeg((300, 300), exif=exif.tobytes()), str(tmp_path), [64])
+
+        assert dict(Image.open(tmp_path / f"{content_hash}-64.webp").getexif()) == {}
+
+    def test_identical_uploads_share_files(self, tmp_path):
+        """Test the same upload maps to the same files."""
+        data = _jpeg((300, 300))
+
+        assert render_avatar(data, str(tmp_path), [64]) == render_avatar(data, str(tmp_path), [64])
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_not_an_image(self, tmp_path):
+        """Test other files are rejected."""
+        with pytest.raises(ValueError):
+            render_avatar(b"%PDF-1.4", str(tmp_path), [64])
+
+
+class TestAvatarUrls:
+    """Test avatar URLs of every size."""
+
+    def test_processed_avatar(self):
+        """Test every configured size is derived from avatar_url."""
+        content_hash = "a" * 64
+
+        urls = avatar_urls(f"/uploads/avatars/{content_hash}-256.webp")
+
+        assert urls[64] == f"/uploads/avatars/{content_hash}-64.webp"
+        assert set(urls) == {64, 128, 256}
+
+    def test_legacy_avatar(self):
+        """Test avatars uploaded before processing have no sizes."""
+        assert avatar_urls("/uploads/avatars/3f2a.jpg") == {}
+        assert avatar_urls(None) == {}
+
+
+class TestUploadStaticFiles:
+    """Test caching of uploaded files."""
+
+    async def test_immutable_directories(self, tmp_path):
+        """Test content-hashed files are cached for a year and others are not."""
+        (tmp_path / "avatars").mkdir()
+        (tmp_path / "avatars" / "a-64.webp").write_bytes(b"x")
+        (tmp_path / "c").mkdir()
+        (tmp_path / "c" / "doc.pdf").write_bytes(b"x")
+        app = FastAPI()
+        app.mount("/uploads", UploadStaticFiles(directory=str(tmp_path)))
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            avatar = await client.get("/uploads/avatars/a-64.webp")
+            document = await client.get("/uploads/c/doc.pdf")
+
+        assert avatar.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert "cache-control" not in document.headers
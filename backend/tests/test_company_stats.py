@@ -0,0 +1,61 @@
+import uuid
+
+from app.models import Task, TaskStatus, Certificate, CertificateStatus, Declaration
+from app.models.company_stats import COMPANY_TOTAL, NO_STATUS
+from app.models.events import stat_keys
+
+
+class TestStatKeys:
+    """Test which dashboard counters a row counts towards."""
+
+    def test_task_between_companies(self):
+        """Test a cross-company task counts for both companies and its assignee."""
+        target, creator, employee = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+        keys = stat_keys(Task, {
+            "target_company_id": target, "created_by_company_id": creator,
+            "target_employee_id": employee, "status": TaskStatus.IN_PROGRESS,
+        })
+
+        assert sorted(keys, key=str) == sorted([
+            (target, COMPANY_TOTAL, "task", "IN_PROGRESS"),
+            (creator, COMPANY_TOTAL, "task", "IN_PROGRESS"),
+            (target, employee, "task", "IN_PROGRESS"),
+        ], key=str)
+
+    def test_task_within_company_counted_once(self):
+        """Test an internal task isn't counted twice in the company total."""
+        company, employee = uuid.uuid4(), uuid.uuid4()
+
+        keys = stat_keys(Task, {
+            "target_company_id": company, "created_by_company_id": company,
+            "target_employee_id": employee, "status": TaskStatus.NEW,
+        })
+
+        assert keys.count((company, COMPANY_TOTAL, "task", "NEW")) == 1
+        assert len(keys) == 2
+
+    def test_certificate_without_certifier(self):
+        """Test a certificate with no certifier only counts for its own company."""
+        company, owner = uuid.uuid4(), uuid.uuid4()
+
+        keys = stat_keys(Certificate, {
+            "company_id": company, "certifier_company_id": None,
+            "owner_id": owner, "status": CertificateStatus.COMPLETED,
+        })
+
+        assert sorted(keys, key=str) == sorted([
+            (company, COMPANY_TOTAL, "certificate", "COMPLETED"),
+            (company, owner, "certificate", "COMPLETED"),
+        ], key=str)
+
+    def test_declaration_has_no_status(self):
+        """Test declarations are counted without a status."""
+        company, owner = uuid.uuid4(), uuid.uuid4()
+
+        keys = stat_keys(Declaration, {"company_id": company, "owner_id": owner})
+
+        assert keys == [
+            (company, COMPANY_TOTAL, "declaration", NO_STATUS),
+            (company, owner, "declaration", NO_STATUS),
+        ]
@@ -0,0 +1,128 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from httpx import AsyncClient, ASGITransport
+
+from app.middleware.compression import CompressionMiddleware, choose_encoding
+
+LARGE = {"data": [{"id": i, "name": f"Client {i}"} for i in range(200)]}
+
+
+@pytest.fixture
+def compressed_app():
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=500,
+        content_types=["application/json", "text/"],
+        streaming=True,
+    )
+    
+    @app.get("/large")
+    async def large():
+        return LARGE
+    
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+    
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\x00" * 2000, media_type="application/pdf")
+    
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(100):
+                yield f"line {i}\n" * 10
+        return StreamingResponse(lines(), media_type="text/csv")
+    
+    return app
+
+
+async def _get(app, path, accept_encoding):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        # stream() keeps httpx from decoding the body
+        async with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+            return response, b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+class TestCompressionMiddleware:
+    """Test response compression."""
+    
+    def test_choose_encoding(self):
+        """Test Accept-Encoding negotiation."""
+        assert choose_encoding("gzip, deflate, br") == "br"
+        assert choose_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+        assert choose_encoding("br;q=0, gzip") == "gzip"
+        assert choose_encoding("*") == "br"
+        assert choose_encoding("identity") is None
+        assert choose_encoding("") is None
+    
+    async def test_brotli(self, compressed_app):
+        """Test large JSON is brotli-compressed when accepted."""
+        response, body = await _get(compressed_app, "/large", "gzip, br")
+        
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(body)
+        assert json.loads(brotli.decompress(body)) == LARGE
+    
+    async def test_gzip(self, compressed_app):
+        """Test gzip is used when brotli isn't accepted."""
+        response, body = await _get(compressed_app, "/large", "gzip")
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(body)) == LARGE
+    
+    async def test_skips_small_and_unlisted_types(self, compressed_app):
+        """Test bodies under the threshold and non-allowlisted types are sent as is."""
+        response, body = await _get(compressed_app, "/small", "gzip, br")
+        assert "content-encoding" not in response.headers
+        assert json.loads(body) == {"ok": True}
+        
+        response, body = await _get(compressed_app, "/binary", "gzip, br")
+        assert "content-encoding" not in response.headers
+        assert len(body) == 2000
+    
+    async def test_identity_when_not_accepted(self, compressed_app):
+        """Test clients without Accept-Encoding get the plain body."""
+        response, body = await _get(compressed_app, "/large", "identity")
+        
+        assert "content-encoding" not in response.headers
+        assert json.loads(body) == LARGE
+    
+    async def test_streaming(self, compressed_app):
+        """Test streaming responses are compressed chunk by chunk."""
+        response, body = await _get(compressed_app, "/stream", "gzip")
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert gzip.decompress(body).decode() == "".join(f"line {i}\n" * 10 for i in range(100))
+    
+    async def test_streaming_disabled(self):
+        """Test streaming responses pass through when streaming compression is off."""
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=0, content_types=["text/"], streaming=False)
+        
+        @app.get("/stream")
+        async def stream():
+            async def lines():
+                yield "a" * 1000
+                yield "b" * 1000
+            return StreamingResponse(lines(), media_type="text/plain")
+        
+        @app.get("/text")
+        async def text():
+            return PlainTextResponse("c" * 1000)
+        
+        response, body = await _get(app, "/stream", "gzip")
+        assert "content-encoding" not in response.headers
+        assert body == b"a" * 1000 + b"b" * 1000
+        
+        response, body = await _get(app, "/text", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
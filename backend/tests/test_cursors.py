@@ -0,0 +1,43 @@
+import base64
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.utils.cursors import decode_cursor, encode_cursor
+
+
+class TestCursors:
+    """Test keyset pagination cursors."""
+    
+    @pytest.mark.parametrize("value, value_type", [
+        (datetime(2024, 5, 17, 10, 30, 15, 123456), datetime),
+        ("Акт № 5", str),
+        (1024, int),
+    ])
+    def test_round_trip(self, value, value_type):
+        """Test a cursor decodes to the sort value and id it was made from."""
+        row_id = uuid4()
+        cursor = encode_cursor("name:asc", value, row_id)
+        
+        assert "=" not in cursor
+        assert decode_cursor(cursor, "name:asc", value_type) == (value, row_id)
+    
+    def test_other_sort_rejected(self):
+        """Test a cursor can't be reused with a different sort."""
+        cursor = encode_cursor("created_at:desc", datetime(2024, 1, 1), uuid4())
+        
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "created_at:asc", datetime)
+    
+    @pytest.mark.parametrize("cursor", [
+        "", "!!!", "bm90LWpzb24",
+        encode_cursor("file_size:asc", "big", uuid4()),
+        # A number as the id
+        base64.urlsafe_b64encode(b'["file_size:asc",5,5]').decode(),
+        base64.urlsafe_b64encode(b'["file_size:asc",5,"not-a-uuid"]').decode(),
+    ])
+    def test_malformed(self, cursor):
+        """Test malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "file_size:asc", int)
@@ -0,0 +1,78 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from app.models import JobWatermark
+from app.services.deadlines import (
+    DUE_SOON, OVERDUE, Reminder, format_reminder, sweep_windows
+)
+
+
+class TestSweepWindows:
+    """Test which deadlines a reminder sweep looks at."""
+    
+    def test_first_sweep(self):
+        """Test the first sweep covers yesterday's overdue items and everything due soon."""
+        today = date(2024, 5, 17)
+        
+        windows = sweep_windows(today, 2, None)
+        
+        assert windows.overdue_from == date(2024, 5, 16)
+        assert windows.due_soon_after == date(2024, 5, 16)
+        assert windows.horizon == date(2024, 5, 19)
+        assert windows.created_since is None
+    
+    def test_continues_from_watermark(self):
+        """Test a later sweep only covers deadlines reached since the last one."""
+        last_run_at = datetime(2024, 5, 14, 9, 0)
+        watermark = JobWatermark(name="deadline_reminders", last_run_at=last_run_at, last_run_date=date(2024, 5, 14))
+        
+        windows = sweep_windows(date(2024, 5, 17), 2, watermark)
+        
+        assert windows.overdue_from == date(2024, 5, 14)
+        assert windows.due_soon_after == date(2024, 5, 16)
+        assert windows.horizon == date(2024, 5, 19)
+        assert windows.created_since == last_run_at
+    
+    def test_same_day_sweep_has_empty_date_windows(self):
+        """Test repeated sweeps on one day only pick up newly created items."""
+        today = date(2024, 5, 17)
+        watermark = JobWatermark(name="deadline_reminders", last_run_at=datetime(2024, 5, 17, 8, 0), last_run_date=today)
+        
+        windows = sweep_windows(today, 1, watermark)
+        
+        assert windows.overdue_from == today
+        assert windows.due_soon_after == windows.horizon
+
+
+class TestFormatReminder:
+    """Test batched reminder text."""
+    
+    def _reminder(self, entity, label, kind=DUE_SOON):
+        return Reminder(uuid.uuid4(), kind, entity, label, date(2024, 5, 17))
+    
+    def test_lists_items_up_to_limit(self):
+        """Test items beyond the limit are summarised."""
+        reminders = [self._reminder("task", f"Задача «{i}»") for i in range(5)]
+        
+        title, message, link = format_reminder(DUE_SOON, reminders, max_items=3)
+        
+        assert title == "Приближается срок"
+        assert message.splitlines() == [
+            "Задача «0» — срок 17.05.2024",
+            "Задача «1» — срок 17.05.2024",
+            "Задача «2» — срок 17.05.2024",
+            "и ещё 2",
+        ]
+        assert link == "/tasks"
+    
+    def test_mixed_entities_link_to_dashboard(self):
+        """Test a reminder about tasks and certificates links to the dashboard."""
+        reminders = [
+            self._reminder("task", "Задача «A»", OVERDUE),
+            self._reminder("certificate", "Сертификат «B»", OVERDUE),
+        ]
+        
+        title, _, link = format_reminder(OVERDUE, reminders, max_items=10)
+        
+        assert title == "Срок истёк"
+        assert link == "/dashboard"
@@ -0,0 +1,42 @@
+from datetime import datetime
+from uuid import uuid4
+
+from app.utils.etags import make_etag, etag_matches, not_modified
+
+
+class TestETags:
+    """Test ETag helpers used for conditional GETs."""
+    
+    def test_make_etag(self):
+        """Test ETags are weak and change with the version parts."""
+        entity_id = uuid4()
+        updated_at = datetime(2024, 1, 1, 12, 0, 0)
+        etag = make_etag("certificate", entity_id, updated_at)
+        
+        assert etag.startswith('W/"') and etag.endswith('"')
+        assert etag == make_etag("certificate", entity_id, updated_at)
+        assert etag != make_etag("certificate", entity_id, datetime(2024, 1, 1, 12, 0, 1))
+        assert make_etag("tasks", 10, None) != make_etag("tasks", 11, None)
+    
+    def test_etag_matches(self):
+        """Test If-None-Match uses weak comparison and accepts lists and *."""
+        etag = make_etag("declaration", uuid4(), datetime(2024, 1, 1))
+        strong = etag.removeprefix("W/")
+        
+        assert etag_matches(etag, etag)
+        assert etag_matches(strong, etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('W/"other"', etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches("", etag)
+    
+    def test_not_modified(self):
+        """Test 304 responses carry the ETag and no body."""
+        etag = make_etag("task", uuid4(), datetime(2024, 1, 1))
+        response = not_modified(etag)
+        
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["cache-control"] == "private, no-cache"
+        assert response.body == b""
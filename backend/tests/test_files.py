@@ -0,0 +1,32 @@
+from app.config import settings
+from app.utils.files import delete_files
+
+
+class TestDeleteFiles:
+    """Test bulk removal of uploaded files."""
+    
+    async def test_removes_files(self, tmp_path, monkeypatch):
+        """Test every uploaded file is removed and counted."""
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        (tmp_path / "c").mkdir()
+        urls = []
+        for i in range(20):
+            (tmp_path / "c" / f"{i}.pdf").write_bytes(b"x")
+            urls.append(f"/uploads/c/{i}.pdf")
+        
+        deleted, failed = await delete_files(urls, concurrency=3)
+        
+        assert (deleted, failed) == (20, 0)
+        assert list((tmp_path / "c").iterdir()) == []
+    
+    async def test_missing_file_counts_as_deleted(self, tmp_path, monkeypatch):
+        """Test a file that is already gone doesn't fail the cleanup."""
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        
+        assert await delete_files(["/uploads/c/gone.pdf"]) == (1, 0)
+    
+    async def test_foreign_urls_fail(self, tmp_path, monkeypatch):
+        """Test URLs outside the upload directory are not touched."""
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        
+        assert await delete_files(["https://example.com/a.pdf"]) == (0, 1)
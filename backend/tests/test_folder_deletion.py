@@ -0,0 +1,256 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import Document, Folder, FolderDeletion, FolderDeletionStatus, StorageUsage
+from app.models.storage_usage import NO_SCOPE_ID, TOTAL
+from app.services import folder_deletion
+from app.services.folder_deletion import folder_deletions, run_folder_deletion
+from app.utils.storage import LocalStorageBackend
+
+
+@pytest.fixture
+def session_maker(test_engine):
+    """Sessions for the job, which commits on its own."""
+    return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorageBackend(tmp_path)
+    monkeypatch.setattr("app.utils.files.get_storage", lambda: storage)
+    return storage
+
+
+async def register(client: AsyncClient, user_data: dict, company_data: dict) -> tuple[dict, uuid.UUID, uuid.UUID]:
+    """Register a director with a company; returns (auth headers, user id, company id)."""
+    response = await client.post("/api/v1/auth/register", json=user_data)
+    data = response.json()["data"]
+    headers = {"Authorization": f"Bearer {data['token']}"}
+    response = await client.post("/api/v1/companies/register", json=company_data, headers=headers)
+    return headers, uuid.UUID(data["user"]["id"]), uuid.UUID(response.json()["data"]["id"])
+
+
+async def make_tree(db: AsyncSession, tmp_path, user_id: uuid.UUID, company_id: uuid.UUID) -> dict[str, Folder]:
+    """
+    Folders "Архив" > "2024" > "Q1" with 3, 2 and 1 documents, and a sibling
+    "Прочее" with 1, each document with a 10 byte file.
+    """
+    folders = {}
+    for name, parent in [("Архив", None), ("2024", "Архив"), ("Q1", "2024"), ("Прочее", None)]:
+        folders[name] = Folder(
+            name=name, parent=folders.get(parent), owner_id=user_id, company_id=company_id
+        )
+    db.add_all(folders.values())
+    (tmp_path / "docs").mkdir()
+    for name, count in [("Архив", 3), ("2024", 2), ("Q1", 1), ("Прочее", 1)]:
+        for _ in range(count):
+            key = f"docs/{uuid.uuid4()}.pdf"
+            (tmp_path / key).write_bytes(b"x" * 10)
+            db.add(Document(
+                name="Акт.pdf", file_url=f"/uploads/{key}", file_type="application/pdf", file_size=10,
+                folder=folders[name], owner_id=user_id, company_id=company_id
+            ))
+    await db.commit()
+    return folders
+
+
+async def new_job(db: AsyncSession, folder: Folder, user_id: uuid.UUID, **values) -> FolderDeletion:
+    job = FolderDeletion(
+        folder_id=folder.id, folder_name=folder.name, company_id=folder.company_id, requested_by_id=user_id, **values
+    )
+    db.add(job)
+    await db.commit()
+    return job
+
+
+class TestFolderDeletionJob:
+    """Test the background job deleting a folder subtree."""
+
+    async def test_deletes_subtree_in_batches(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test the folder, its subfolders, documents and files go in batches, and nothing else does."""
+        monkeypatch.setattr(settings, "FOLDER_DELETE_BATCH_SIZE", 2)
+        _, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        job = await new_job(db_session, folders["Архив"], user_id)
+        batches = []
+        delete_files = folder_deletion.delete_files
+
+        async def record_batch(file_urls, concurrency):
+            batches.append(len(file_urls))
+            return await delete_files(file_urls, concurrency)
+
+        monkeypatch.setattr(folder_deletion, "delete_files", record_batch)
+
+        await run_folder_deletion(job.id, session_maker)
+
+        assert batches == [2, 2, 2]
+        async with session_maker() as db:
+            job = await db.get(FolderDeletion, job.id)
+            assert job.status == FolderDeletionStatus.COMPLETED and job.finished_at is not None
+            assert (job.documents_deleted, job.files_deleted, job.files_failed, job.folders_deleted) == (6, 6, 0, 3)
+            assert (await db.execute(select(Folder.name))).scalars().all() == ["Прочее"]
+            assert (await db.execute(select(Document.folder_id))).scalars().all() == [folders["Прочее"].id]
+            used = await db.scalar(select(StorageUsage.bytes).where(
+                StorageUsage.company_id == company_id, StorageUsage.scope == TOTAL, StorageUsage.scope_id == NO_SCOPE_ID
+            ))
+            assert used == 10
+        assert len(list((tmp_path / "docs").iterdir())) == 1
+
+    async def test_documents_added_meanwhile(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test a document uploaded into the subtree after the last batch goes in the final transaction."""
+        _, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        job = await new_job(db_session, folders["Архив"], user_id)
+        delete_files = folder_deletion.delete_files
+
+        async def upload_meanwhile(file_urls, concurrency):
+            if not (tmp_path / "docs" / "late.pdf").exists():
+                (tmp_path / "docs" / "late.pdf").write_bytes(b"x")
+                async with session_maker() as db:
+                    db.add(Document(
+                        name="late.pdf", file_url="/uploads/docs/late.pdf", file_type="application/pdf",
+                        file_size=1, folder_id=folders["Q1"].id, owner_id=user_id, company_id=company_id
+                    ))
+                    await db.commit()
+            return await delete_files(file_urls, concurrency)
+
+        monkeypatch.setattr(folder_deletion, "delete_files", upload_meanwhile)
+
+        await run_folder_deletion(job.id, session_maker)
+
+        async with session_maker() as db:
+            job = await db.get(FolderDeletion, job.id)
+            assert (job.documents_deleted, job.files_deleted, job.folders_deleted) == (7, 7, 3)
+            assert await db.scalar(select(func.count()).select_from(Document)) == 1
+        assert not (tmp_path / "docs" / "late.pdf").exists()
+
+    async def test_finished_job_runs_once(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data
+    ):
+        """Test running a finished job again changes nothing."""
+        _, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        job = await new_job(db_session, folders["2024"], user_id)
+
+        await run_folder_deletion(job.id, session_maker)
+        await run_folder_deletion(job.id, session_maker)
+
+        async with session_maker() as db:
+            job = await db.get(FolderDeletion, job.id)
+            assert (job.documents_deleted, job.files_deleted, job.folders_deleted) == (3, 3, 2)
+
+    async def test_interrupted_job_resumed(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test a job cancelled by shutdown is released, then reclaimed and finished from where it stopped."""
+        monkeypatch.setattr(settings, "FOLDER_DELETE_BATCH_SIZE", 2)
+        _, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        job = await new_job(db_session, folders["Архив"], user_id)
+        delete_files = folder_deletion.delete_files
+        removing = asyncio.Event()
+
+        async def hang(file_urls, concurrency):
+            removing.set()
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(folder_deletion, "delete_files", hang)
+        folder_deletions.start(job.id, session_maker)
+        await removing.wait()
+        await folder_deletions.stop(session_maker)
+
+        async with session_maker() as db:
+            job = await db.get(FolderDeletion, job.id)
+            assert job.status == FolderDeletionStatus.PENDING and job.finished_at is None
+            assert job.documents_deleted == 2
+
+        monkeypatch.setattr(folder_deletion, "delete_files", delete_files)
+        assert await folder_deletions.reclaim(session_maker) == 1
+        await asyncio.gather(*folder_deletions._running.values())
+
+        async with session_maker() as db:
+            job = await db.get(FolderDeletion, job.id)
+            assert job.status == FolderDeletionStatus.COMPLETED
+            assert (job.documents_deleted, job.files_deleted, job.folders_deleted) == (6, 4, 3)
+
+    async def test_only_stale_jobs_reclaimed(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test another worker's job is left alone until it has been idle for the stale period."""
+        started = []
+        monkeypatch.setattr(folder_deletions, "start", lambda job_id, session_maker=None: started.append(job_id))
+        _, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        stale_at = datetime.utcnow() - timedelta(seconds=settings.FOLDER_DELETE_STALE_SECONDS + 1)
+        stale = await new_job(
+            db_session, folders["Архив"], user_id, status=FolderDeletionStatus.RUNNING, updated_at=stale_at
+        )
+        await new_job(db_session, folders["Прочее"], user_id, status=FolderDeletionStatus.RUNNING)
+
+        assert await folder_deletions.reclaim(session_maker) == 1
+        # Claiming it made it fresh
+        assert await folder_deletions.reclaim(session_maker) == 0
+        assert started == [stale.id]
+
+
+class TestFolderDeletionEndpoints:
+    """Test the folder deletion endpoints."""
+
+    async def test_delete_and_poll(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test DELETE answers 202 with a job, hides the folder, and a repeat DELETE returns the same job."""
+        started = []
+        monkeypatch.setattr(folder_deletions, "start", lambda job_id, session_maker=None: started.append(job_id))
+        headers, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+
+        response = await client.delete(f"/api/v1/documents/folders/{folders['Архив'].id}", headers=headers)
+
+        assert response.status_code == 202
+        job = response.json()["data"]
+        assert job["status"] == "pending" and job["folder_name"] == "Архив"
+        assert started == [uuid.UUID(job["id"])]
+        response = await client.get("/api/v1/documents/folders", headers=headers)
+        assert [folder["name"] for folder in response.json()["data"]] == ["Прочее"]
+
+        response = await client.delete(f"/api/v1/documents/folders/{folders['Архив'].id}", headers=headers)
+        assert response.status_code == 202
+        assert response.json()["data"]["id"] == job["id"]
+        assert len(started) == 1
+
+        await run_folder_deletion(uuid.UUID(job["id"]), session_maker)
+        db_session.expire_all()
+        response = await client.get(f"/api/v1/documents/folders/deletions/{job['id']}", headers=headers)
+        assert response.status_code == 200
+        progress = response.json()["data"]
+        assert progress["status"] == "completed"
+        assert (progress["documents_deleted"], progress["files_deleted"], progress["folders_deleted"]) == (6, 6, 3)
+
+    async def test_other_company_job_not_found(
+        self, client, db_session, session_maker, storage, tmp_path, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test a deletion job can't be polled from another company."""
+        monkeypatch.setattr(folder_deletions, "start", lambda job_id, session_maker=None: None)
+        headers, user_id, company_id = await register(client, test_user_data, test_company_data)
+        folders = await make_tree(db_session, tmp_path, user_id, company_id)
+        response = await client.delete(f"/api/v1/documents/folders/{folders['Архив'].id}", headers=headers)
+        job_id = response.json()["data"]["id"]
+        other_headers, _, _ = await register(
+            client, {**test_user_data, "email": "other@example.com"}, {**test_company_data, "inn": "987654321"}
+        )
+
+        response = await client.get(f"/api/v1/documents/folders/deletions/{job_id}", headers=other_headers)
+
+        assert response.status_code == 404
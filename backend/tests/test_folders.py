@@ -0,0 +1,63 @@
+import uuid
+
+from app.models import AccessType
+from app.services.folders import FolderNode, build_folder_tree
+
+
+def _node(name, depth, parent=None, documents=0, size=0):
+    return FolderNode(
+        id=uuid.uuid4(), name=name, parent_id=parent.id if parent else None,
+        access_type=AccessType.PUBLIC, owner_id=uuid.uuid4(), client_id=None,
+        depth=depth, document_count=documents, document_bytes=size,
+    )
+
+
+class TestBuildFolderTree:
+    """Test folder tree assembly and subtree totals."""
+    
+    def test_totals_roll_up(self):
+        """Test each folder's totals include every subfolder."""
+        root = _node("root", 1, documents=1, size=10)
+        child = _node("child", 2, root, documents=2, size=20)
+        grandchild = _node("grandchild", 3, child, documents=3, size=30)
+        nodes = [grandchild, child, root]
+        
+        roots = build_folder_tree(nodes, {n.id for n in nodes})
+        
+        assert roots == [root]
+        assert root.children == [child] and child.children == [grandchild]
+        assert (root.total_document_count, root.total_bytes) == (6, 60)
+        assert (child.total_document_count, child.total_bytes) == (5, 50)
+    
+    def test_hidden_folder_hides_subtree(self):
+        """Test a folder the user can't see drops its subtree from the tree and totals."""
+        root = _node("root", 1, documents=1, size=10)
+        hidden = _node("hidden", 2, root, documents=2, size=20)
+        below_hidden = _node("below", 3, hidden, documents=3, size=30)
+        
+        roots = build_folder_tree([root, hidden, below_hidden], {root.id, below_hidden.id})
+        
+        assert roots == [root]
+        assert root.children == []
+        assert root.total_bytes == 10
+    
+    def test_depth_limits_output_not_totals(self):
+        """Test folders below the requested depth still count and mark has_children."""
+        root = _node("root", 1)
+        child = _node("child", 2, root, documents=4, size=40)
+        
+        roots = build_folder_tree([root, child], {root.id, child.id})
+        data = roots[0].to_dict(max_depth=1)
+        
+        assert data["children"] == []
+        assert data["has_children"] is True
+        assert data["total_document_count"] == 4
+    
+    def test_children_sorted_by_name(self):
+        """Test siblings are ordered case-insensitively by name."""
+        root = _node("root", 1)
+        b, a = _node("beta", 2, root), _node("Alpha", 2, root)
+        
+        build_folder_tree([root, b, a], {root.id, a.id, b.id})
+        
+        assert [c.name for c in root.children] == ["Alpha", "beta"]
@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from app.middleware.metrics import MetricsMiddleware, UNMATCHED_ROUTE
+
+
+def _count(method, route, status):
+    value = REGISTRY.get_sample_value(
+        "http_requests_total", {"method": method, "route": route, "status": status}
+    )
+    return value or 0
+
+
+@pytest.fixture
+def metrics_app():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, slow_request_ms=10_000)
+    
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+    
+    return app
+
+
+class TestMetricsMiddleware:
+    """Test request metrics recording."""
+    
+    async def test_records_route_template(self, metrics_app):
+        """Test requests are labelled with the route template, not the raw path."""
+        before = _count("GET", "/items/{item_id}", "200")
+        async with AsyncClient(transport=ASGITransport(app=metrics_app), base_url="http://test") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+        
+        assert _count("GET", "/items/{item_id}", "200") == before + 2
+        assert REGISTRY.get_sample_value(
+            "http_request_duration_seconds_count", {"method": "GET", "route": "/items/{item_id}"}
+        ) >= 2
+    
+    async def test_unmatched_paths_share_one_label(self, metrics_app):
+        """Test 404s don't create a label per path."""
+        before = _count("GET", UNMATCHED_ROUTE, "404")
+        async with AsyncClient(transport=ASGITransport(app=metrics_app), base_url="http://test") as client:
+            await client.get("/nope/1")
+            await client.get("/nope/2")
+        
+        assert _count("GET", UNMATCHED_ROUTE, "404") == before + 2
+    
+    async def test_slow_request_logged(self, caplog):
+        """Test requests over the threshold are logged with their route template."""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware, slow_request_ms=0)
+        
+        @app.get("/slow/{name}")
+        async def slow(name: str):
+            return {}
+        
+        with caplog.at_level(logging.WARNING, logger="app.middleware.metrics"):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                await client.get("/slow/abc")
+        
+        assert "GET /slow/{name} -> 200" in caplog.text
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import ActivityType, Company, Document, DocumentPreview, PreviewStatus, User
+from app.services import previews
+from app.services.previews import document_previews, generate_preview
+from app.utils.previews import preview_file_url, preview_source_type, render_previews
+from app.utils.storage import LocalStorageBackend
+
+
+class TestPreviewSourceType:
+    """Test which uploads get previews."""
+
+    def test_known_types(self):
+        """Test PDFs and images are previewed by their MIME type."""
+        assert preview_source_type("application/pdf", "/uploads/c/a.pdf") == "application/pdf"
+        assert preview_source_type("image/png", "/uploads/c/a") == "image/png"
+
+    def test_falls_back_to_extension(self):
+        """Test a generic MIME type is resolved from the file extension."""
+        assert preview_source_type("application/octet-stream", "/uploads/c/scan.JPG") == "image/jpeg"
+
+    def test_unsupported(self):
+        """Test other files get no preview."""
+        assert preview_source_type("application/msword", "/uploads/c/a.doc") is None
+
+    def test_url_is_content_addressed(self):
+        """Test identical files map to the same preview URL per size."""
+        content_hash = "ab" + "0" * 62
+
+        assert preview_file_url(content_hash, 256) == f"/uploads/previews/ab/{content_hash}-256.webp"
+
+
+class TestRenderPreviews:
+    """Test rendering thumbnails and previews."""
+
+    def test_image_is_downscaled(self, tmp_path):
+        """Test every target fits its size and keeps the aspect ratio."""
+        source = tmp_path / "photo.jpg"
+        Image.new("RGB", (2000, 1000), "red").save(source)
+        thumb, preview = tmp_path / "p" / "t.webp", tmp_path / "p" / "p.webp"
+
+        render_previews(str(source), "image/jpeg", [(str(thumb), 256), (str(preview), 1280)])
+
+        assert Image.open(thumb).size == (256, 128)
+        assert Image.open(preview).size == (1280, 640)
+        assert Image.open(preview).format == "WEBP"
+
+    def test_small_image_is_not_upscaled(self, tmp_path):
+        """Test images smaller than the target keep their size."""
+        source = tmp_path / "icon.png"
+        Image.new("RGBA", (100, 50)).save(source)
+        target = tmp_path / "t.webp"
+
+        render_previews(str(source), "image/png", [(str(target), 256)])
+
+        assert Image.open(target).size == (100, 50)
+        assert Image.open(target).mode == "RGBA"
+
+    def test_pdf_first_page(self, tmp_path):
+        """Test the first page of a PDF is rendered."""
+        source = tmp_path / "scan.pdf"
+        Image.new("RGB", (1240, 1754), "white").save(source, "PDF")
+        target = tmp_path / "t.webp"
+
+        render_previews(str(source), "application/pdf", [(str(target), 256)])
+
+        width, height = Image.open(target).size
+        assert height == 256 and 180 <= width <= 182
+
+
+@pytest.fixture
+def session_maker(test_engine):
+    """Sessions for the preview job, which commits on its own."""
+    return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorageBackend(tmp_path)
+    monkeypatch.setattr(previews, "get_storage", lambda: storage)
+    return storage
+
+
+async def add_image_documents(db: AsyncSession, tmp_path, count: int, **preview_values) -> list[Document]:
+    """Documents sharing one uploaded PNG, with pending previews."""
+    company = Company(name="Test Company", inn="123456789", activity_type=ActivityType.DECLARANT)
+    user = User(
+        email="test@example.com", password_hash="-", full_name="Test User", phone="+1234567890",
+        activity_type=ActivityType.DECLARANT, company=company
+    )
+    (tmp_path / "docs").mkdir()
+    Image.new("RGB", (2000, 1000), "red").save(tmp_path / "docs" / "scan.png")
+    documents = [
+        Document(
+            name="scan.png", file_url="/uploads/docs/scan.png", file_type="image/png", file_size=1,
+            owner=user, company=company
+        )
+        for _ in range(count)
+    ]
+    db.add_all(documents)
+    await db.flush()
+    db.add_all(DocumentPreview(document_id=document.id, **preview_values) for document in documents)
+    await db.commit()
+    return documents
+
+
+class TestGeneratePreview:
+    """Test the background preview job."""
+
+    async def test_renders_and_reuses_previews(self, db_session, session_maker, storage, tmp_path, monkeypatch):
+        """Test previews are rendered once per file content and recorded on every document."""
+        first, second = await add_image_documents(db_session, tmp_path, 2)
+
+        await generate_preview(first.id, session_maker)
+
+        async def fail(*args):
+            raise AssertionError("rendered twice")
+
+        monkeypatch.setattr(previews, "render_previews_async", fail)
+        await generate_preview(second.id, session_maker)
+
+        async with session_maker() as db:
+            first, second = await db.get(DocumentPreview, first.id), await db.get(DocumentPreview, second.id)
+        assert first.status == second.status == PreviewStatus.READY
+        assert first.thumbnail_url == second.thumbnail_url
+        assert first.thumbnail_url == preview_file_url(first.content_hash, settings.PREVIEW_THUMBNAIL_SIZE)
+        assert Image.open(tmp_path / first.thumbnail_url.removeprefix("/uploads/")).size == (256, 128)
+
+    async def test_missing_file_fails(self, db_session, session_maker, storage, tmp_path):
+        """Test a preview whose file is gone is marked failed rather than left pending."""
+        [document] = await add_image_documents(db_session, tmp_path, 1)
+        (tmp_path / "docs" / "scan.png").unlink()
+
+        await generate_preview(document.id, session_maker)
+
+        async with session_maker() as db:
+            preview = await db.get(DocumentPreview, document.id)
+        assert preview.status == PreviewStatus.FAILED and preview.error
+
+    async def test_interrupted_preview_resumed(self, db_session, session_maker, storage, tmp_path, monkeypatch):
+        """Test a preview cancelled by shutdown is retried as soon as a worker reclaims."""
+        [document] = await add_image_documents(db_session, tmp_path, 1)
+        render_previews_async = previews.render_previews_async
+        rendering = asyncio.Event()
+
+        async def hang(*args):
+            rendering.set()
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(previews, "render_previews_async", hang)
+        document_previews.start(document.id, session_maker)
+        await rendering.wait()
+        await document_previews.stop(session_maker)
+
+        monkeypatch.setattr(previews, "render_previews_async", render_previews_async)
+        assert await document_previews.reclaim(session_maker) == 1
+        await asyncio.gather(*document_previews._running.values())
+
+        async with session_maker() as db:
+            preview = await db.get(DocumentPreview, document.id)
+        assert preview.status == PreviewStatus.READY
+
+    async def test_only_stale_previews_reclaimed(self, db_session, session_maker, storage, tmp_path, monkeypatch):
+        """Test a pending preview another worker may be rendering is left alone until stale."""
+        started = []
+        monkeypatch.setattr(document_previews, "start", lambda key, session_maker=None: started.append(key))
+        stale_at = datetime.utcnow() - timedelta(seconds=settings.PREVIEW_STALE_SECONDS + 1)
+        [stale] = await add_image_documents(db_session, tmp_path, 1, updated_at=stale_at)
+
+        assert await document_previews.reclaim(session_maker) == 1
+        assert await document_previews.reclaim(session_maker) == 0
+        assert started == [stale.id]
@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, text
+
+from app.database import instrument_engine
+from app.middleware.queries import QueryStatsMiddleware
+
+
+@pytest.fixture
+def query_app():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, detect_n_plus_one=True, n_plus_one_threshold=3)
+    
+    @app.get("/queries/{n}")
+    def run_queries(n: int):
+        with engine.connect() as conn:
+            for i in range(n):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {}
+    
+    return app
+
+
+class TestQueryStatsMiddleware:
+    """Test per-request SQL instrumentation."""
+    
+    async def test_server_timing_header(self, query_app):
+        """Test the query count is reported in Server-Timing."""
+        async with AsyncClient(transport=ASGITransport(app=query_app), base_url="http://test") as client:
+            response = await client.get("/queries/2")
+        
+        server_timing = response.headers["server-timing"]
+        assert server_timing.startswith("db;dur=")
+        assert 'desc="2 queries"' in server_timing
+    
+    async def test_n_plus_one_logged(self, query_app, caplog):
+        """Test repeated identical statements are flagged."""
+        with caplog.at_level(logging.WARNING, logger="app.middleware.queries"):
+            async with AsyncClient(transport=ASGITransport(app=query_app), base_url="http://test") as client:
+                await client.get("/queries/2")
+                assert "Possible N+1" not in caplog.text
+                
+                await client.get("/queries/5")
+        
+        assert "Possible N+1 in GET /queries/{n}: statement executed 5 times" in caplog.text
@@ -0,0 +1,48 @@
+import pytest
+from app.services.rate_limit import MemoryRateLimitBackend, RateLimiter
+
+
+class TestMemoryRateLimitBackend:
+    """Test in-process sliding-window counters."""
+    
+    async def test_counts_within_window(self):
+        """Test attempts in the same window accumulate."""
+        backend = MemoryRateLimitBackend()
+        
+        assert await backend.hit("k", 60, now=0) == 1
+        assert await backend.hit("k", 60, now=10) == 2
+        assert await backend.hit("other", 60, now=10) == 1
+    
+    async def test_previous_window_is_weighted(self):
+        """Test the previous window counts in proportion to its overlap."""
+        backend = MemoryRateLimitBackend()
+        for _ in range(4):
+            await backend.hit("k", 60, now=30)
+        
+        # Halfway through the next window, half of the previous 4 still counts
+        assert await backend.hit("k", 60, now=90) == pytest.approx(3)
+        # Two windows later nothing remains
+        assert await backend.hit("k", 60, now=240) == 1
+    
+    async def test_evicts_least_recently_used_keys(self):
+        """Test the number of tracked keys stays bounded."""
+        backend = MemoryRateLimitBackend(max_keys=2)
+        await backend.hit("a", 60, now=0)
+        await backend.hit("b", 60, now=0)
+        await backend.hit("a", 60, now=1)
+        await backend.hit("c", 60, now=2)
+        
+        assert len(backend) == 2
+        assert await backend.hit("b", 60, now=3) == 1
+    
+    async def test_limiter_rejects_over_limit(self):
+        """Test the limiter returns a retry delay once over the limit."""
+        limiter = RateLimiter(MemoryRateLimitBackend())
+        
+        for _ in range(3):
+            assert await limiter.hit("k", limit=3, window_seconds=60) is None
+        retry_after = await limiter.hit("k", limit=3, window_seconds=60)
+        assert retry_after is not None and 1 <= retry_after <= 60
+        
+        await limiter.reset("k")
+        assert await limiter.hit("k", limit=3, window_seconds=60) is None
@@ -0,0 +1,58 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import uuid4
+
+from app.api.v1.certificates import certificate_to_dict, certificate_to_response
+from app.schemas import CertificateResponse, PaginatedResponse
+from app.utils.responses import ORJSONResponse, api_response, paginated_response
+from benchmarks.serialization import fake_certificates
+
+
+class TestORJSONResponse:
+    """Test orjson response rendering."""
+    
+    def test_native_types(self):
+        """Test UUID, dates, enums, models and decimals are serialised."""
+        certificate = certificate_to_response(fake_certificates(1)[0])
+        body = json.loads(ORJSONResponse({
+            "id": certificate.id,
+            "day": date(2024, 1, 2),
+            "at": datetime(2024, 1, 2, 3, 4, 5),
+            "status": certificate.status,
+            "amount": Decimal("1.50"),
+            "model": certificate,
+        }).body)
+        
+        assert body["id"] == str(certificate.id)
+        assert body["day"] == "2024-01-02"
+        assert body["at"] == "2024-01-02T03:04:05"
+        assert body["status"] == certificate.status.value
+        assert body["amount"] == "1.50"
+        assert body["model"]["number"] == certificate.number
+    
+    def test_matches_response_model_output(self):
+        """Test the fast path renders the same JSON as the validated schema."""
+        certificates = fake_certificates(20)
+        expected = PaginatedResponse[CertificateResponse].model_validate(
+            PaginatedResponse.create(
+                data=[certificate_to_response(c) for c in certificates],
+                total=45, page=2, page_size=20,
+            ).model_dump()
+        ).model_dump(mode="json")
+        
+        body = json.loads(paginated_response(
+            data=[certificate_to_dict(c) for c in certificates],
+            total=45, page=2, page_size=20,
+        ).body)
+        
+        assert body == expected
+        assert body["total_pages"] == 3
+    
+    def test_api_response_envelope(self):
+        """Test the ApiResponse envelope."""
+        body = json.loads(api_response([{"id": uuid4()}], message="ok").body)
+        
+        assert body["success"] is True
+        assert body["message"] == "ok"
+        assert len(body["data"]) == 1
@@ -0,0 +1,69 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.models.events import storage_keys, storage_usage_upsert
+from app.models.storage_usage import CLIENT, FOLDER, NO_SCOPE_ID, TOTAL
+from app.services.avatars import avatar_url, avatar_usage
+from app.utils.storage import LocalStorageBackend
+
+
+class TestStorageKeys:
+    """Test which storage counters a document counts towards."""
+
+    def test_folder_and_client(self):
+        """Test a document counts in the company total, its folder and its client."""
+        company, folder, client = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+        keys = storage_keys({"company_id": company, "folder_id": folder, "client_id": client})
+
+        assert keys == [(company, TOTAL, NO_SCOPE_ID), (company, FOLDER, folder), (company, CLIENT, client)]
+
+    def test_root_without_client(self):
+        """Test documents in the root and without a client have counters of their own."""
+        company = uuid.uuid4()
+
+        keys = storage_keys({"company_id": company, "folder_id": None, "client_id": None})
+
+        assert keys == [(company, TOTAL, NO_SCOPE_ID), (company, FOLDER, NO_SCOPE_ID), (company, CLIENT, NO_SCOPE_ID)]
+
+
+class TestStorageUsageUpsert:
+    """Test the statement applying counter deltas."""
+
+    def test_nothing_to_add(self):
+        """Test zero deltas (a document moved and moved back) produce no statement."""
+        company = uuid.uuid4()
+
+        assert storage_usage_upsert({(company, TOTAL, NO_SCOPE_ID): (0, 0)}) is None
+
+    def test_adds_to_existing_counters(self):
+        """Test deltas are added to stored counters rather than replacing them."""
+        company = uuid.uuid4()
+
+        stmt = storage_usage_upsert({(company, TOTAL, NO_SCOPE_ID): (-10, -1), (company, FOLDER, NO_SCOPE_ID): (0, 0)})
+        compiled = stmt.compile(dialect=postgresql.dialect())
+
+        assert "ON CONFLICT (company_id, scope, scope_id) DO UPDATE" in str(compiled)
+        assert "bytes = (storage_usage.bytes + excluded.bytes)" in str(compiled)
+        # The zero delta is left out
+        assert sorted(compiled.params.values(), key=str) == sorted([company, TOTAL, NO_SCOPE_ID, -10, -1], key=str)
+
+
+class TestAvatarUsage:
+    """Test measuring an avatar's files in storage."""
+
+    async def test_every_size_counted(self, tmp_path, monkeypatch):
+        """Test all sizes of a processed avatar are counted, and missing files aren't."""
+        storage = LocalStorageBackend(tmp_path)
+        monkeypatch.setattr("app.services.avatars.get_storage", lambda: storage)
+        monkeypatch.setattr(settings, "AVATAR_SIZES_STR", "64,128")
+        content_hash = "a" * 64
+        (tmp_path / "avatars").mkdir()
+        (tmp_path / "avatars" / f"{content_hash}-64.webp").write_bytes(b"x" * 10)
+        (tmp_path / "avatars" / f"{content_hash}-128.webp").write_bytes(b"x" * 30)
+
+        assert await avatar_usage(avatar_url(content_hash, 128)) == (40, 2)
+        assert await avatar_usage(avatar_url("b" * 64, 128)) == (0, 0)
+        assert await avatar_usage(None) == (0, 0)
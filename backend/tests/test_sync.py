@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.models import Certificate, Declaration, Task, Notification
+from app.models.events import _tombstones
+from app.services.sync import encode_sync_token, decode_sync_token
+
+
+class TestSyncTokens:
+    """Test sync position tokens."""
+    
+    def test_round_trip(self):
+        """Test tokens decode to the exact position they encode."""
+        position = datetime(2024, 5, 17, 10, 30, 15, 123456)
+        token = encode_sync_token(position)
+        
+        assert "=" not in token
+        assert decode_sync_token(token) == (position, {})
+    
+    def test_cut_off_types(self):
+        """Test tokens carry the last row sent of each type that was cut off."""
+        position = datetime(2024, 5, 17, 10, 30)
+        after = {"tasks": (datetime(2024, 5, 17, 10, 29, 59, 5), uuid.uuid4())}
+        
+        assert decode_sync_token(encode_sync_token(position, after)) == (position, after)
+    
+    @pytest.mark.parametrize("token", ["", "!!!", "bm90LWEtbnVtYmVy", "eyJzaW5jZSI6MX0", "W10"])
+    def test_invalid_tokens(self, token):
+        """Test malformed tokens raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_sync_token(token)
+
+
+class TestTombstones:
+    """Test tombstones recorded for deleted rows."""
+    
+    def test_certificate_scoped_to_owner_and_certifier(self):
+        """Test a certificate tombstone reaches both companies that see it."""
+        owner, certifier = uuid.uuid4(), uuid.uuid4()
+        certificate = Certificate(id=uuid.uuid4(), company_id=owner, certifier_company_id=certifier)
+        
+        tombstones = _tombstones(certificate)
+        
+        assert {t.company_id for t in tombstones} == {owner, certifier}
+        assert all(t.entity_type == "certificates" and t.entity_id == certificate.id for t in tombstones)
+    
+    def test_task_and_declaration(self):
+        """Test tasks within one company get a single tombstone."""
+        company = uuid.uuid4()
+        task = Task(id=uuid.uuid4(), target_company_id=company, created_by_company_id=company)
+        declaration = Declaration(id=uuid.uuid4(), company_id=company)
+        
+        assert [(t.entity_type, t.company_id) for t in _tombstones(task)] == [("tasks", company)]
+        assert [(t.entity_type, t.company_id) for t in _tombstones(declaration)] == [("declarations", company)]
+    
+    def test_notification_scoped_to_user(self):
+        """Test notification tombstones are scoped to their user."""
+        notification = Notification(id=uuid.uuid4(), user_id=uuid.uuid4())
+        
+        [tombstone] = _tombstones(notification)
+        
+        assert tombstone.user_id == notification.user_id
+        assert tombstone.company_id is None
+
+
+class TestSyncEndpoint:
+    """Test the sync endpoint."""
+    
+    async def test_pages_through_rows_sharing_a_timestamp(
+        self, client: AsyncClient, db_session, test_user_data, test_company_data, monkeypatch
+    ):
+        """Test more rows than the change limit with one timestamp are all sent, each once."""
+        monkeypatch.setattr(settings, "SYNC_MAX_CHANGES", 2)
+        response = await client.post("/api/v1/auth/register", json=test_user_data)
+        user_id = uuid.UUID(response.json()["data"]["user"]["id"])
+        headers = {"Authorization": f"Bearer {response.json()['data']['token']}"}
+        await client.post("/api/v1/companies/register", json=test_company_data, headers=headers)
+        now = datetime.utcnow()
+        notifications = [
+            Notification(user_id=user_id, title="Задача", message="Новая задача", created_at=now) for _ in range(5)
+        ]
+        db_session.add_all(notifications)
+        await db_session.commit()
+        
+        token = encode_sync_token(now - timedelta(seconds=1))
+        received, pages = [], 0
+        while True:
+            response = await client.get("/api/v1/sync", params={"since": token}, headers=headers)
+            data = response.json()["data"]
+            received += [n["id"] for n in data["notifications"]]
+            token = data["token"]
+            pages += 1
+            if not data["has_more"]:
+                break
+            assert pages < 5
+        
+        assert pages == 3
+        assert sorted(received) == sorted(str(n.id) for n in notifications)
@@ -0,0 +1,84 @@
+import os
+import time
+from datetime import date
+
+import pytest
+
+from app.config import settings
+from app.services.upload_gc import DELETE, collect_orphans
+from app.utils.storage import LocalStorageBackend
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageBackend(tmp_path)
+
+
+def _store(storage: LocalStorageBackend, key: str, data: bytes = b"abc", age: float = 0):
+    path = storage.path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+
+
+def _referencing(*keys: str):
+    async def find_referenced(candidates: list[str]) -> set[str]:
+        return set(candidates) & set(keys)
+    return find_referenced
+
+
+class TestCollectOrphans:
+    """Test collecting stored files no row refers to."""
+
+    async def test_quarantines_old_orphans(self, storage):
+        """Test only unreferenced files older than the grace period are moved, keeping their key."""
+        _store(storage, "c/orphan.pdf", b"12345", age=2 * DAY)
+        _store(storage, "c/used.pdf", age=2 * DAY)
+        _store(storage, "c/new.pdf")
+        _store(storage, ".gitkeep", b"", age=2 * DAY)
+
+        report = await collect_orphans(storage, _referencing("c/used.pdf"))
+
+        assert (report.scanned, report.orphaned, report.orphaned_bytes, report.reclaimed_bytes) == (3, 1, 5, 0)
+        assert not storage.path("c/orphan.pdf").exists()
+        assert storage.path(f".orphaned/{date.today():%Y%m%d}/c/orphan.pdf").read_bytes() == b"12345"
+        assert storage.path("c/used.pdf").exists()
+        assert storage.path("c/new.pdf").exists()
+        assert storage.path(".gitkeep").exists()
+
+    async def test_delete_reports_reclaimed_bytes(self, storage):
+        """Test deleting orphans outright counts the bytes freed."""
+        _store(storage, "c/a.pdf", b"12345", age=2 * DAY)
+        _store(storage, "avatars/b.webp", b"123", age=2 * DAY)
+
+        report = await collect_orphans(storage, _referencing(), action=DELETE)
+
+        assert (report.orphaned, report.reclaimed_bytes, report.failed) == (2, 8, 0)
+        assert not storage.path("c/a.pdf").exists()
+        assert not storage.path("avatars/b.webp").exists()
+
+    async def test_dry_run_changes_nothing(self, storage):
+        """Test a dry run reports orphans without moving them."""
+        _store(storage, "c/a.pdf", age=2 * DAY)
+
+        report = await collect_orphans(storage, _referencing(), action=DELETE, dry_run=True)
+
+        assert (report.orphaned, report.reclaimed_bytes) == (1, 0)
+        assert storage.path("c/a.pdf").exists()
+
+    async def test_purges_expired_quarantine(self, storage, monkeypatch):
+        """Test quarantined files are deleted once older than UPLOAD_GC_QUARANTINE_DAYS."""
+        monkeypatch.setattr(settings, "UPLOAD_GC_QUARANTINE_DAYS", 7)
+        now = time.mktime((2026, 3, 20, 12, 0, 0, 0, 0, -1))
+        expired = ".orphaned/20260312/c/a.pdf"
+        _store(storage, expired, b"1234")
+        _store(storage, ".orphaned/20260319/c/b.pdf")
+
+        report = await collect_orphans(storage, _referencing(), now=now)
+
+        assert (report.scanned, report.purged, report.reclaimed_bytes) == (0, 1, 4)
+        assert not storage.path(expired).exists()
+        assert storage.path(".orphaned/20260319/c/b.pdf").exists()
@@ -0,0 +1,80 @@
+import hashlib
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.models import UploadSession
+from app.services.uploads import (
+    ChunkSizeError, assemble_upload, partial_dir, received_chunks, upload_offset, write_chunk
+)
+from app.utils.storage import LocalStorageBackend
+
+
+async def _body(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    """A 10-byte upload in chunks of 4, 4 and 2 bytes."""
+    monkeypatch.setattr(settings, "UPLOAD_PARTIAL_DIR", str(tmp_path / "partial"))
+    return UploadSession(id=uuid.uuid4(), size=10, chunk_size=4)
+
+
+class TestUploadSession:
+    """Test chunk layout of an upload session."""
+
+    def test_chunk_lengths(self, session):
+        """Test every chunk is chunk_size bytes except the last one."""
+        assert session.chunk_count == 3
+        assert [session.chunk_length(i) for i in range(3)] == [4, 4, 2]
+
+
+class TestWriteChunk:
+    """Test storing chunks of a resumable upload."""
+
+    async def test_chunks_in_any_order(self, session):
+        """Test chunks are recorded as received regardless of order."""
+        await write_chunk(session, 2, _body(b"ij"))
+        await write_chunk(session, 0, _body(b"ab", b"cd"))
+
+        received = received_chunks(session)
+
+        assert received == [0, 2]
+        assert upload_offset(session, received) == 4
+
+    async def test_wrong_length(self, session):
+        """Test a short or long chunk is rejected and leaves nothing behind."""
+        with pytest.raises(ChunkSizeError):
+            await write_chunk(session, 0, _body(b"abc"))
+        with pytest.raises(ChunkSizeError):
+            await write_chunk(session, 2, _body(b"ijk"))
+
+        assert received_chunks(session) == []
+        assert list(partial_dir(session.id).iterdir()) == []
+
+    async def test_resent_chunk_replaces(self, session):
+        """Test sending a chunk again replaces the earlier copy."""
+        await write_chunk(session, 0, _body(b"xxxx"))
+        await write_chunk(session, 0, _body(b"abcd"))
+
+        assert (partial_dir(session.id) / "0").read_bytes() == b"abcd"
+
+
+class TestAssembleUpload:
+    """Test assembling a completed upload."""
+
+    async def test_concatenates_and_hashes(self, session, tmp_path, monkeypatch):
+        """Test chunks are stored joined in order and the sha256 of the file is returned."""
+        storage = LocalStorageBackend(tmp_path / "files")
+        monkeypatch.setattr("app.services.uploads.get_storage", lambda: storage)
+        for index, data in [(1, b"efgh"), (0, b"abcd"), (2, b"ij")]:
+            await write_chunk(session, index, _body(data))
+
+        digest = await assemble_upload(session, "c/doc.bin", "application/octet-stream")
+
+        assert (tmp_path / "files" / "c" / "doc.bin").read_bytes() == b"abcdefghij"
+        assert digest == hashlib.sha256(b"abcdefghij").hexdigest()
+        assert upload_offset(session, received_chunks(session)) == 10
@@ -1,12 +1,21 @@
 import pytest
+from datetime import timedelta
+from jose import jwt
+from app.config import settings
 from app.utils.security import (
+    pwd_context,
     get_password_hash,
     verify_password,
+    get_password_hash_async,
+    verify_password_async,
+    verify_and_update_password,
     create_access_token,
     decode_token,
-    generate_admin_code,
-    verify_admin_code
+    generate_refresh_token,
+    hash_refresh_token,
+    generate_admin_code
 )
+from app.services.admin_code import MemoryAdminCodeStore
 
 
 class TestSecurityUtils:
@@ -21,6 +30,33 @@ class TestSecurityUtils:
         assert verify_password(password, hashed) is True
         assert verify_password("wrongpassword", hashed) is False
     
+    async def test_password_hashing_async(self):
+        """Test password hashing and verification in the worker pool."""
+        password = "testpassword123"
+        hashed = await get_password_hash_async(password)
+        
+        assert await verify_password_async(password, hashed) is True
+        assert await verify_password_async("wrongpassword", hashed) is False
+    
+    async def test_password_rehash_on_cost_change(self):
+        """Test hashes with an outdated cost are upgraded on verification."""
+        password = "testpassword123"
+        current_rounds = pwd_context.to_dict()["bcrypt__rounds"]
+        old_hash = pwd_context.hash(password, rounds=current_rounds - 1)
+        
+        is_valid, new_hash = await verify_and_update_password(password, old_hash)
+        assert is_valid is True
+        assert new_hash is not None
+        assert verify_password(password, new_hash) is True
+        
+        is_valid, new_hash = await verify_and_update_password(password, await get_password_hash_async(password))
+        assert is_valid is True
+        assert new_hash is None
+        
+        is_valid, new_hash = await verify_and_update_password("wrongpassword", old_hash)
+        assert is_valid is False
+        assert new_hash is None
+    
     def test_jwt_token_creation_and_decode(self):
         """Test JWT token creation and decoding."""
         user_id = "test-user-id-123"
@@ -35,11 +71,47 @@ class TestSecurityUtils:
         payload = decode_token("invalid-token")
         assert payload is None
     
-    def test_admin_code_generation_and_verification(self):
+    def test_jwt_only_access_tokens_accepted(self):
+        """Test tokens of another type are rejected by decode_token."""
+        assert decode_token(create_access_token({"sub": "user"}))["typ"] == "access"
+        
+        forged = jwt.encode({"sub": "user", "typ": "refresh"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        assert decode_token(forged) is None
+    
+    def test_refresh_token_hashing(self):
+        """Test refresh tokens are random and hashed deterministically."""
+        token = generate_refresh_token()
+        
+        assert token != generate_refresh_token()
+        assert hash_refresh_token(token) == hash_refresh_token(token)
+        assert token not in hash_refresh_token(token)
+    
+    async def test_admin_code_generation_and_verification(self):
         """Test admin code generation and verification."""
-        code = generate_admin_code()
+        store = MemoryAdminCodeStore()
+        code = await store.rotate(timedelta(hours=24))
         
         assert code is not None
         assert len(code) == 8  # 4 bytes hex = 8 characters
-        assert verify_admin_code(code) is True
-        assert verify_admin_code("wrongcode") is False
+        assert await store.verify(code) is True
+        assert await store.verify("wrongcode") is False
+    
+    async def test_admin_code_issued_once_per_rotation(self):
+        """Test a valid code is not replaced until it expires."""
+        store = MemoryAdminCodeStore()
+        code = await store.rotate(timedelta(hours=24))
+        
+        assert await store.rotate(timedelta(hours=24)) is None
+        assert await store.verify(code) is True
+    
+    async def test_admin_code_expired(self):
+        """Test an expired code is rejected and a new one can be issued."""
+        store = MemoryAdminCodeStore()
+        code = await store.rotate(timedelta(seconds=-1))
+        
+        assert await store.verify(code) is False
+        assert await store.rotate(timedelta(hours=24)) is not None
+    
+    def test_generate_admin_code_is_random(self):
+        """Test generated admin codes differ."""
+        assert generate_admin_code() != generate_admin_code()
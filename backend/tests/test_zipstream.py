@@ -0,0 +1,85 @@
+import io
+import os
+import zipfile
+from datetime import datetime
+
+from app.utils.zipstream import CHUNK_SIZE, ZipEntry, stream_zip, unique_name, zip_response_headers
+
+
+def _entry(path, name=None):
+    size = path.stat().st_size if path.exists() else 0
+    return ZipEntry(name or path.name, str(path), datetime(2024, 5, 1, 12, 30), size)
+
+
+def _open(key):
+    return open(key, "rb")
+
+
+class TestStreamZip:
+    """Test ZIP archives generated chunk by chunk."""
+
+    def test_round_trip(self, tmp_path):
+        """Test the concatenated chunks form a valid archive with every file."""
+        text = tmp_path / "notes.txt"
+        text.write_bytes(b"hello " * 50000)
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(os.urandom(3 * CHUNK_SIZE + 17))
+
+        data = b"".join(stream_zip([_entry(text, "a/notes.txt"), _entry(scan, "a/b/scan.pdf")], _open))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            assert archive.read("a/notes.txt") == text.read_bytes()
+            assert archive.read("a/b/scan.pdf") == scan.read_bytes()
+            assert archive.getinfo("a/notes.txt").date_time == (2024, 5, 1, 12, 30, 0)
+
+    def test_compressed_formats_are_stored(self, tmp_path):
+        """Test PDFs and JPEGs are stored as is while other files are deflated."""
+        for name in ("a.pdf", "b.JPG", "c.txt"):
+            (tmp_path / name).write_bytes(b"x" * 10000)
+
+        data = b"".join(stream_zip([_entry(tmp_path / n) for n in ("a.pdf", "b.JPG", "c.txt")], _open))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            types = {info.filename: info.compress_type for info in archive.infolist()}
+        assert types == {"a.pdf": zipfile.ZIP_STORED, "b.JPG": zipfile.ZIP_STORED, "c.txt": zipfile.ZIP_DEFLATED}
+
+    def test_chunks_stay_small(self, tmp_path):
+        """Test no chunk holds much more than one read of a file."""
+        big = tmp_path / "big.pdf"
+        big.write_bytes(os.urandom(20 * CHUNK_SIZE))
+
+        chunks = list(stream_zip([_entry(big)], _open))
+
+        assert len(chunks) > 20
+        assert max(len(c) for c in chunks) < 2 * CHUNK_SIZE
+
+    def test_missing_files_are_skipped(self, tmp_path):
+        """Test a file gone from disk leaves the rest of the archive intact."""
+        kept = tmp_path / "kept.txt"
+        kept.write_bytes(b"kept")
+
+        data = b"".join(stream_zip([_entry(tmp_path / "gone.txt"), _entry(kept)], _open))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["kept.txt"]
+
+
+class TestArchiveNames:
+    """Test names inside archives and of the download."""
+
+    def test_unique_name(self):
+        """Test duplicate names get a counter before the extension."""
+        used = set()
+
+        names = [unique_name(n, used) for n in ("a.pdf", "A.pdf", "a.pdf", "dir", "dir", "x.y/readme")]
+
+        assert names == ["a.pdf", "A (2).pdf", "a (3).pdf", "dir", "dir (2)", "x.y/readme"]
+
+    def test_utf8_filename(self):
+        """Test non-ASCII names are sent as filename* with an ASCII fallback."""
+        header = zip_response_headers("Папка 1.zip")["Content-Disposition"]
+
+        assert header.startswith('attachment; filename="')
+        assert "filename*=UTF-8''%D0%9F%D0%B0%D0%BF%D0%BA%D0%B0%201.zip" in header
+        header.encode("latin-1")
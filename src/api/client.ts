@@ -2,12 +2,15 @@ import type {
   User,
   UserWithRole,
   Company,
+  StorageUsage,
   Declaration,
   DeclarationGroup,
   Certificate,
   Task,
   Document,
   Folder,
+  FolderDeletion,
+  UploadSession,
   Client,
   Partnership,
   Request,
@@ -23,35 +26,100 @@ import type {
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/api/v1';
 
+// A 401 from these means wrong credentials, not an expired token
+const NO_REFRESH_ENDPOINTS = ['/auth/login', '/auth/register', '/auth/admin/login'];
+
 class ApiClient {
   private baseUrl: string;
   private token: string | null = null;
+  private refreshToken: string | null = null;
+  private refreshing: Promise<boolean> | null = null;
 
   constructor(baseUrl: string) {
     this.baseUrl = baseUrl;
+    this.loadTokens();
+    // Follow tokens rotated, set or cleared by other tabs
+    window.addEventListener('storage', (event) => {
+      if (event.key === null || event.key === 'auth_token' || event.key === 'refresh_token') {
+        this.loadTokens();
+      }
+    });
+  }
+
+  private loadTokens() {
     this.token = localStorage.getItem('auth_token');
+    this.refreshToken = localStorage.getItem('refresh_token');
   }
 
-  setToken(token: string | null) {
+  setToken(token: string | null, refreshToken?: string | null) {
     this.token = token;
     if (token) {
       localStorage.setItem('auth_token', token);
     } else {
       localStorage.removeItem('auth_token');
     }
+    if (refreshToken !== undefined || !token) {
+      this.refreshToken = refreshToken ?? null;
+      if (this.refreshToken) {
+        localStorage.setItem('refresh_token', this.refreshToken);
+      } else {
+        localStorage.removeItem('refresh_token');
+      }
+    }
+  }
+
+  // Access tokens are short-lived: exchange the refresh token for a new pair.
+  // Concurrent 401s share one refresh request, and tabs refresh one at a time:
+  // refresh tokens are single-use, and presenting one another tab has already
+  // rotated revokes the whole session.
+  private refreshTokens(expiredToken: string | null): Promise<boolean> {
+    if (!this.refreshing) {
+      const refresh = async () => {
+        // Another tab may have refreshed while this one waited for the lock
+        this.loadTokens();
+        if (this.token && this.token !== expiredToken) return true;
+        const refreshToken = this.refreshToken;
+        if (!refreshToken) return false;
+        const response = await fetch(`${this.baseUrl}/auth/refresh`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        if (!response.ok) {
+          // Only log out if no other tab stored a new pair meanwhile
+          if (localStorage.getItem('refresh_token') !== refreshToken) {
+            this.loadTokens();
+            return this.token !== null;
+          }
+          this.setToken(null);
+          return false;
+        }
+        const data = await response.json();
+        this.setToken(data.data.token, data.data.refresh_token);
+        return true;
+      };
+      this.refreshing = ('locks' in navigator ? navigator.locks.request('auth-refresh', refresh) : refresh())
+        .catch(() => false)
+        .finally(() => {
+          this.refreshing = null;
+        });
+    }
+    return this.refreshing;
   }
 
   private async request<T>(
     endpoint: string,
-    options: RequestInit = {}
+    options: RequestInit = {},
+    retry = true
   ): Promise<T> {
     const headers: HeadersInit = {
       'Content-Type': 'application/json',
       ...options.headers,
     };
 
-    if (this.token) {
-      (headers as Record<string, string>)['Authorization'] = `Bearer ${this.token}`;
+    const token = this.token;
+    if (token) {
+      (headers as Record<string, string>)['Authorization'] = `Bearer ${token}`;
     }
 
     const response = await fetch(`${this.baseUrl}${endpoint}`, {
@@ -59,6 +127,13 @@ class ApiClient {
       headers,
     });
 
+    if (
+      response.status === 401 && retry && this.refreshToken &&
+      !NO_REFRESH_ENDPOINTS.includes(endpoint) && await this.refreshTokens(token)
+    ) {
+      return this.request<T>(endpoint, options, false);
+    }
+
     if (!response.ok) {
       const error = await response.json().catch(() => ({ message: 'Request failed' }));
       throw new Error(error.message || 'Request failed');
@@ -70,7 +145,7 @@ class ApiClient {
   // Auth endpoints
   auth = {
     login: (email: string, password: string) =>
-      this.request<ApiResponse<{ user: UserWithRole; token: string }>>('/auth/login', {
+      this.request<ApiResponse<{ user: UserWithRole; token: string; refresh_token: string }>>('/auth/login', {
         method: 'POST',
         body: JSON.stringify({ email, password }),
       }),
@@ -82,7 +157,7 @@ class ApiClient {
       phone: string;
       activityType: 'declarant' | 'certification';
     }) =>
-      this.request<ApiResponse<{ user: User; token: string }>>('/auth/register', {
+      this.request<ApiResponse<{ user: User; token: string; refresh_token: string }>>('/auth/register', {
         method: 'POST',
         body: JSON.stringify({
           email: data.email,
@@ -114,7 +189,7 @@ class ApiClient {
       }),
 
     adminLogin: (login: string, password: string, code: string) =>
-      this.request<ApiResponse<{ token: string }>>('/auth/admin/login', {
+      this.request<ApiResponse<{ token: string; refresh_token: string }>>('/auth/admin/login', {
         method: 'POST',
         body: JSON.stringify({ login, password, code }),
       }),
@@ -163,6 +238,16 @@ class ApiClient {
         method: 'POST',
         body: JSON.stringify({ message }),
       }),
+
+    getStorage: (id: string) =>
+      this.request<ApiResponse<StorageUsage>>(`/companies/${id}/storage`),
+
+    // quotaMb: 0 for unlimited, null for the server default
+    setStorageQuota: (id: string, quotaMb: number | null) =>
+      this.request<ApiResponse<StorageUsage>>(`/companies/${id}/storage-quota`, {
+        method: 'PUT',
+        body: JSON.stringify({ quotaMb }),
+      }),
   };
 
   // Users endpoints
@@ -191,7 +276,7 @@ class ApiClient {
           Authorization: `Bearer ${this.token}`,
         },
         body: formData,
-      }).then((res) => res.json()) as Promise<ApiResponse<{ avatarUrl: string }>>;
+      }).then((res) => res.json()) as Promise<ApiResponse<{ avatarUrl: string; avatarUrls: Record<string, string> }>>;
     },
 
     block: (id: string) =>
@@ -407,6 +492,33 @@ class ApiClient {
       }).then((res) => res.json()) as Promise<ApiResponse<Document>>;
     },
 
+    // Resumable upload: send chunks with uploadChunk (in any order), then completeUpload
+    createUpload: (data: { name: string; fileType: string; size: number; sha256: string; folderId?: string; clientId?: string }) =>
+      this.request<ApiResponse<UploadSession>>('/documents/uploads', {
+        method: 'POST',
+        body: JSON.stringify(data),
+      }),
+
+    getUpload: (id: string) =>
+      this.request<ApiResponse<UploadSession>>(`/documents/uploads/${id}`),
+
+    uploadChunk: (id: string, index: number, chunk: Blob) =>
+      this.request<ApiResponse<UploadSession>>(`/documents/uploads/${id}/chunks/${index}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: chunk,
+      }),
+
+    completeUpload: (id: string) =>
+      this.request<ApiResponse<Document>>(`/documents/uploads/${id}/complete`, {
+        method: 'POST',
+      }),
+
+    cancelUpload: (id: string) =>
+      this.request<ApiResponse<null>>(`/documents/uploads/${id}`, {
+        method: 'DELETE',
+      }),
+
     delete: (id: string) =>
       this.request<ApiResponse<null>>(`/documents/${id}`, {
         method: 'DELETE',
@@ -436,11 +548,15 @@ class ApiClient {
         body: JSON.stringify(data),
       }),
 
+    // Runs in the background; poll getFolderDeletion for progress
     deleteFolder: (id: string) =>
-      this.request<ApiResponse<null>>(`/documents/folders/${id}`, {
+      this.request<ApiResponse<FolderDeletion>>(`/documents/folders/${id}`, {
         method: 'DELETE',
       }),
 
+    getFolderDeletion: (jobId: string) =>
+      this.request<ApiResponse<FolderDeletion>>(`/documents/folders/deletions/${jobId}`),
+
     getFolders: (parentId?: string) =>
       this.request<ApiResponse<Folder[]>>(
         `/documents/folders?${parentId ? `parentId=${parentId}` : ''}`
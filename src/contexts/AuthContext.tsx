@@ -76,7 +76,7 @@ export function AuthProvider({ children }: AuthProviderProps) {
   const login = async (email: string, password: string) => {
     const response = await api.auth.login(email, password);
     if (response.success) {
-      api.setToken(response.data.token);
+      api.setToken(response.data.token, response.data.refresh_token);
       setUser(response.data.user);
       if (response.data.user.companyId) {
         const companyResponse = await api.companies.getById(response.data.user.companyId);
@@ -98,7 +98,7 @@ export function AuthProvider({ children }: AuthProviderProps) {
   }) => {
     const response = await api.auth.register(data);
     if (response.success) {
-      api.setToken(response.data.token);
+      api.setToken(response.data.token, response.data.refresh_token);
       setUser(response.data.user as UserWithRole);
     } else {
       throw new Error(response.message || 'Registration failed');
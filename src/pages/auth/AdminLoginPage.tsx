@@ -40,7 +40,7 @@ export default function AdminLoginPage() {
     try {
       const response = await api.auth.adminLogin(login, password, code);
       if (response.success) {
-        api.setToken(response.data.token);
+        api.setToken(response.data.token, response.data.refresh_token);
         await refreshUser(); // Load user profile immediately
         navigate('/admin/dashboard');
       }
@@ -31,6 +31,25 @@ export interface Company {
   updatedAt: string;
 }
 
+export interface StorageUsageItem {
+  // Missing for documents in the root folder / without a client
+  id?: string;
+  name?: string;
+  bytes: number;
+  files: number;
+}
+
+export interface StorageUsage {
+  bytes: number;
+  files: number;
+  // Missing when unlimited
+  quotaBytes?: number;
+  avatarBytes: number;
+  avatarFiles: number;
+  folders: StorageUsageItem[];
+  clients: StorageUsageItem[];
+}
+
 // Declaration types
 export type DeclarationMode = 
   | 'ЭК/10' | 'ЭК/11' | 'ЭК/12' | 'ИМ/40' | 'ИМ/41' | 'ИМ/42' | 'ИМ/51'
@@ -162,6 +181,8 @@ export interface Task {
 // Document types
 export type AccessType = 'private' | 'public' | 'selected';
 
+export type PreviewStatus = 'pending' | 'ready' | 'failed' | 'unsupported';
+
 export interface Document {
   id: string;
   name: string;
@@ -174,6 +195,10 @@ export interface Document {
   companyId: string;
   createdAt: string;
   updatedAt: string;
+  // Rendered in the background after upload; set once previewStatus is 'ready'
+  previewStatus?: PreviewStatus;
+  thumbnailUrl?: string;
+  previewUrl?: string;
 }
 
 export interface Folder {
@@ -189,6 +214,43 @@ export interface Folder {
   updatedAt: string;
 }
 
+export type FolderDeletionStatus = 'pending' | 'running' | 'completed' | 'failed';
+
+export interface FolderDeletion {
+  id: string;
+  folderId: string;
+  folderName: string;
+  status: FolderDeletionStatus;
+  documentsDeleted: number;
+  filesDeleted: number;
+  filesFailed: number;
+  foldersDeleted: number;
+  error?: string;
+  createdAt: string;
+  updatedAt: string;
+  finishedAt?: string;
+}
+
+export type UploadSessionStatus = 'active' | 'completed';
+
+export interface UploadSession {
+  id: string;
+  name: string;
+  size: number;
+  // Every chunk is chunkSize bytes except the last, which holds the rest
+  chunkSize: number;
+  chunkCount: number;
+  receivedChunks: number[];
+  // Bytes received without a gap from the start of the file
+  offset: number;
+  status: UploadSessionStatus;
+  documentId?: string;
+  expiresAt: string;
+  // Object storage only: PUT the whole file here, with these headers, instead of chunks
+  uploadUrl?: string;
+  uploadHeaders?: Record<string, string>;
+}
+
 // Client types
 export interface Client {
   id: string;